@@ -1,9 +1,10 @@
 from flask import Flask
 import os
 from dotenv import load_dotenv
-from config import EMAIL_CONFIG
+from config import (ADMISSION_CONFIG, ASSET_CONFIG, EMAIL_CONFIG, METRICS_CONFIG, PAGE_CACHE_CONFIG, PROFILING_CONFIG,
+                    QUEUE_CONFIG, RATE_LIMIT_CONFIG, TESTIMONIALS_CONFIG, UPLOAD_CONFIG)
 
-def create_app():
+def create_app(test_config=None):
     """Application factory pattern for creating Flask app"""
     # Load environment variables from .env file
     load_dotenv()
@@ -16,18 +17,92 @@ def create_app():
                 static_folder=os.path.join(root_dir, 'static'))
     app.secret_key = 'your-secret-key-here'  # Change this in production
     
+    # Validate resume uploads while the request body streams in
+    from app.uploads import UploadRequest
+    app.request_class = UploadRequest
+    
     # Configuration
-    UPLOAD_FOLDER = 'uploads'
+    UPLOAD_FOLDER = UPLOAD_CONFIG['folder']
     ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx'}
     
     app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+    app.config['MAX_RESUME_BYTES'] = UPLOAD_CONFIG['max_resume_bytes']
+    app.config['UPLOAD_SPOOL_SIZE'] = UPLOAD_CONFIG['spool_size']
+    app.config['JOB_QUEUE_PATH'] = QUEUE_CONFIG['db_path']
+    app.config['JOB_WORKERS_AUTOSTART'] = QUEUE_CONFIG['autostart']
+    app.config['PAGE_CACHE_PRERENDER'] = PAGE_CACHE_CONFIG['prerender']
+    app.config['ASSET_MANIFEST'] = os.path.join(app.static_folder, ASSET_CONFIG['output_dir'], 'manifest.json')
+    app.config['TESTIMONIALS_FILE'] = os.path.join(root_dir, TESTIMONIALS_CONFIG['data_file'])
+    app.config['METRICS_DIR'] = METRICS_CONFIG['dir']
+    app.config['METRICS_TOKEN'] = METRICS_CONFIG['token']
+    app.config['ADMISSION_LIMIT'] = ADMISSION_CONFIG['limit']
+    app.config['ADMISSION_QUEUE_SIZE'] = ADMISSION_CONFIG['queue_size']
+    app.config['ADMISSION_MAX_WAIT'] = ADMISSION_CONFIG['max_wait']
+    app.config['ADMISSION_RETRY_AFTER'] = ADMISSION_CONFIG['retry_after']
+    app.config['ADMISSION_DIR'] = ADMISSION_CONFIG['dir']
+    app.config['RATE_LIMIT_ENABLED'] = RATE_LIMIT_CONFIG['enabled']
+    app.config['RATE_LIMIT_BURST'] = RATE_LIMIT_CONFIG['burst']
+    app.config['RATE_LIMIT_PER_MINUTE'] = RATE_LIMIT_CONFIG['per_minute']
+    app.config['RATE_LIMIT_TRUSTED_PROXIES'] = RATE_LIMIT_CONFIG['trusted_proxies']
+    app.config['RATE_LIMIT_FILE'] = RATE_LIMIT_CONFIG['file']
+    app.config['PROFILE_SECRET'] = PROFILING_CONFIG['secret']
+    app.config['PROFILE_SAMPLE_RATE'] = PROFILING_CONFIG['sample_rate']
+    app.config['PROFILE_DIR'] = PROFILING_CONFIG['dir']
+    app.config['PROFILE_SIGNATURE_TTL'] = PROFILING_CONFIG['signature_ttl']
+    
+    # Apply overrides (used by the test suite)
+    if test_config:
+        app.config.from_mapping(test_config)
+    
+    # Reject oversized request bodies from Content-Length before reading them
+    if app.config['MAX_CONTENT_LENGTH'] is None:
+        app.config['MAX_CONTENT_LENGTH'] = app.config['MAX_RESUME_BYTES'] + UPLOAD_CONFIG['form_overhead_bytes']
     
     # Ensure upload folder exists
-    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    
+    # JSON logs written by a background thread, tagged with a per-request ID
+    from app.logs import init_logging
+    init_logging(app)
     
     # Register blueprints
     from app.routes import main_bp, api_bp
     app.register_blueprint(main_bp)
     app.register_blueprint(api_bp)
     
+    # Fingerprinted static files (before pages are pre-rendered with their URLs)
+    from app.assets import init_assets
+    init_assets(app)
+    
+    # Marketing pages are rendered once and served from memory
+    from app.page_cache import init_page_cache
+    init_page_cache(app)
+    
+    # Testimonials served from a pre-serialized data file
+    from app.testimonials import init_testimonials
+    init_testimonials(app)
+    
+    # Content-addressed resume storage
+    from app.resume_store import init_resume_store
+    init_resume_store(app)
+    
+    # Background queue for email delivery and cleanup
+    from app.job_queue import init_job_queue
+    init_job_queue(app)
+    
+    # Request and submission-stage timings at /metrics
+    from app.metrics import init_metrics
+    init_metrics(app)
+    
+    # Per-IP token buckets for /api, then the cap on concurrent submissions; both run after
+    # the metrics timer starts, so 429s and 503s show up in the request latencies
+    from app.rate_limit import init_rate_limit
+    init_rate_limit(app, api_bp)
+    from app.admission import init_admission
+    init_admission(app)
+    
+    # Opt-in cProfile capture of signed or sampled requests
+    from app.profiling import init_profiling
+    init_profiling(app)
+    
     return app 
\ No newline at end of file
@@ -0,0 +1,175 @@
+"""
+Admission Control for Apply Boost Studio
+Caps how many form submissions run at once across every gunicorn worker, so
+a burst of uploads cannot take all the threads that serve pages. Slots are
+lock files held with flock(): any process on the host sees the same limit,
+and a crashed worker's slots are released by the kernel. A few requests may
+wait briefly for a slot; beyond that they get 503 with Retry-After
+"""
+
+import fcntl
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional
+from flask import current_app, g, jsonify, request
+from config import ADMISSION_CONFIG
+from app.metrics import ADMISSIONS
+
+logger = logging.getLogger(__name__)
+
+
+class SlotSet:
+    """count named lock files; a slot is held while its file is flocked by this process"""
+
+    def __init__(self, directory: str, prefix: str, count: int):
+        self.directory = directory
+        self.prefix = prefix
+        self.count = count
+        self._fds: Dict[int, int] = {}
+        self._held = set()
+        self._pid = None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _fd(self, slot: int) -> int:
+        # Locks belong to open files: a forked child must not reuse its parent's descriptors
+        if self._pid != os.getpid():
+            self._fds, self._held, self._pid = {}, set(), os.getpid()
+        fd = self._fds.get(slot)
+        if fd is None:
+            fd = os.open(os.path.join(self.directory, f'{self.prefix}-{slot}.lock'), os.O_RDWR | os.O_CREAT, 0o600)
+            self._fds[slot] = fd
+        return fd
+
+    def try_acquire(self) -> Optional[int]:
+        """Take a free slot without blocking, or return None"""
+        with self._lock:
+            for slot in range(self.count):
+                # Threads of one process share descriptors, so flock alone cannot tell them apart
+                if slot in self._held and self._pid == os.getpid():
+                    continue
+                fd = self._fd(slot)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                self._held.add(slot)
+                return slot
+        return None
+
+    def release(self, slot: int):
+        with self._lock:
+            if slot in self._held and self._pid == os.getpid():
+                fcntl.flock(self._fds[slot], fcntl.LOCK_UN)
+                self._held.discard(slot)
+
+    def in_use(self) -> int:
+        """Slots held by any process (probes each lock, so only for tests and diagnostics)"""
+        busy = 0
+        for slot in range(self.count):
+            fd = os.open(os.path.join(self.directory, f'{self.prefix}-{slot}.lock'), os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                busy += 1
+            finally:
+                os.close(fd)
+        return busy
+
+
+class AdmissionController:
+    """limit requests in flight host-wide, queue_size more waiting up to max_wait seconds"""
+
+    def __init__(self, directory: str, limit: int, queue_size: int = 0, max_wait: float = 0.0,
+                 endpoints: Iterable[str] = (), poll_interval: float = 0.01):
+        self.limit = limit
+        self.endpoints = set(endpoints)
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.poll_interval = poll_interval
+        self.slots = SlotSet(directory, 'slot', limit)
+        self.waiters = SlotSet(directory, 'wait', queue_size)
+
+    def acquire(self) -> Optional[int]:
+        """A held slot, or None if the request should be shed"""
+        slot = self.slots.try_acquire()
+        if slot is not None:
+            ADMISSIONS.inc(outcome='admitted')
+            return slot
+
+        waiter = self.waiters.try_acquire() if self.queue_size and self.max_wait > 0 else None
+        if waiter is None:
+            ADMISSIONS.inc(outcome='shed')
+            return None
+        try:
+            deadline = time.monotonic() + self.max_wait
+            delay = self.poll_interval
+            while time.monotonic() < deadline:
+                time.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+                slot = self.slots.try_acquire()
+                if slot is not None:
+                    ADMISSIONS.inc(outcome='queued')
+                    return slot
+                delay = min(delay * 2, 0.1)
+        finally:
+            self.waiters.release(waiter)
+        ADMISSIONS.inc(outcome='shed')
+        return None
+
+    def release(self, slot: int):
+        self.slots.release(slot)
+
+
+def _admit():
+    controller = current_app.extensions['admission']
+    if request.endpoint not in controller.endpoints:
+        return None
+    slot = controller.acquire()
+    if slot is None:
+        retry_after = current_app.config['ADMISSION_RETRY_AFTER']
+        logger.warning("Shedding request: %d in flight and the wait queue is full", controller.limit)
+        response = jsonify({
+            'success': False,
+            'message': 'We are receiving a lot of submissions right now. Please try again in a few seconds.'
+        })
+        response.status_code = 503
+        response.headers['Retry-After'] = str(retry_after)
+        return response
+    g.admission_slot = slot
+
+
+def _release(exc=None):
+    slot = g.pop('admission_slot', None)
+    if slot is not None:
+        current_app.extensions['admission'].release(slot)
+
+
+def default_limit() -> int:
+    """Half of the server's request threads, so pages always have threads left"""
+    from app.server import worker_settings
+    settings = worker_settings()
+    per_worker = settings.get('worker_connections', settings['threads'])
+    return max(1, settings['workers'] * per_worker // 2)
+
+
+def init_admission(app) -> Optional[AdmissionController]:
+    """Limit concurrent requests to the configured endpoints (ADMISSION_LIMIT < 0 turns this off)"""
+    limit = app.config['ADMISSION_LIMIT']
+    if limit < 0:
+        return None
+    limit = limit or default_limit()
+    queue_size = app.config['ADMISSION_QUEUE_SIZE']
+    if queue_size < 0:
+        queue_size = max(1, limit // 2)
+    directory = app.config['ADMISSION_DIR'] or os.path.join(
+        os.path.dirname(os.path.abspath(app.config['JOB_QUEUE_PATH'])), 'admission'
+    )
+    controller = AdmissionController(directory, limit, queue_size, app.config['ADMISSION_MAX_WAIT'],
+                                     ADMISSION_CONFIG['endpoints'])
+    app.extensions['admission'] = controller
+    # Runs before the view touches request.files, so a shed upload is never read
+    app.before_request(_admit)
+    app.teardown_request(_release)
+    return controller
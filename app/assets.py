@@ -0,0 +1,218 @@
+"""
+Static Asset Pipeline for Apply Boost Studio
+`flask assets build` writes content-hashed copies of the static files, gzip and
+Brotli siblings and resized WebP image variants, plus a manifest. With the
+manifest loaded, url_for('static', ...) resolves to the hashed names, which
+are served with far-future immutable caching
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import shutil
+from typing import Any, Dict, List, Optional
+import click
+from flask import current_app, request, send_from_directory, url_for
+from flask.cli import AppGroup, with_appcontext
+from config import ASSET_CONFIG
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; .gz files are always written
+    brotli = None
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; images are then only fingerprinted
+    Image = None
+
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.svg', '.json', '.txt', '.html', '.map'}
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+SKIPPED_EXTENSIONS = {'.md'}
+
+
+def _hashed_name(relpath: str, data: bytes) -> str:
+    root, ext = os.path.splitext(relpath)
+    return f"{root}.{hashlib.sha256(data).hexdigest()[:ASSET_CONFIG['hash_length']]}{ext}"
+
+
+def _write(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _precompress(path: str, data: bytes) -> List[str]:
+    """Write .br/.gz next to path when they are smaller; returns the encodings written"""
+    if os.path.splitext(path)[1] not in COMPRESSIBLE_EXTENSIONS or len(data) < ASSET_CONFIG['min_compress_size']:
+        return []
+    encodings = []
+    if brotli is not None:
+        compressed = brotli.compress(data, quality=11)
+        if len(compressed) < len(data):
+            _write(f"{path}.br", compressed)
+            encodings.append('br')
+    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(compressed) < len(data):
+        _write(f"{path}.gz", compressed)
+        encodings.append('gzip')
+    return encodings
+
+
+def _image_variants(data: bytes, relpath: str, out_dir: str, output: str) -> List[Dict[str, Any]]:
+    """Resized WebP copies for srcset, never wider than the original"""
+    if Image is None:
+        return []
+    root = os.path.splitext(relpath)[0]
+    variants = []
+    with Image.open(io.BytesIO(data)) as image:
+        image.load()
+        widths = sorted({w for w in ASSET_CONFIG['image_widths'] if w < image.width} | {image.width})
+        for width in widths:
+            if width == image.width:
+                resized = image
+            else:
+                resized = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+            if resized.mode not in ('RGB', 'RGBA'):
+                resized = resized.convert('RGBA' if 'A' in resized.getbands() else 'RGB')
+            buffer = io.BytesIO()
+            resized.save(buffer, 'WEBP', quality=ASSET_CONFIG['webp_quality'], method=6)
+            name = _hashed_name(f"{root}.{width}w.webp", buffer.getvalue())
+            _write(os.path.join(out_dir, name), buffer.getvalue())
+            variants.append({'file': f"{output}/{name}", 'width': width, 'type': 'image/webp'})
+    return variants
+
+
+def build_assets(static_folder: str, output: Optional[str] = None, clean: bool = False) -> Dict[str, Dict[str, Any]]:
+    """Fingerprint every static file into static_folder/output and write its manifest"""
+    output = output or ASSET_CONFIG['output_dir']
+    out_dir = os.path.join(static_folder, output)
+    if clean:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+    manifest = {}
+    for directory, dirnames, filenames in os.walk(static_folder):
+        # Never feed earlier build output back in
+        dirnames[:] = sorted(d for d in dirnames if os.path.join(directory, d) != out_dir)
+        for filename in sorted(filenames):
+            ext = os.path.splitext(filename)[1].lower()
+            if filename.startswith('.') or ext in SKIPPED_EXTENSIONS:
+                continue
+            path = os.path.join(directory, filename)
+            relpath = os.path.relpath(path, static_folder).replace(os.sep, '/')
+            with open(path, 'rb') as f:
+                data = f.read()
+
+            hashed = _hashed_name(relpath, data)
+            _write(os.path.join(out_dir, hashed), data)
+            entry = {'file': f"{output}/{hashed}", 'size': len(data)}
+            encodings = _precompress(os.path.join(out_dir, hashed), data)
+            if encodings:
+                entry['encodings'] = encodings
+            if ext in IMAGE_EXTENSIONS:
+                variants = _image_variants(data, relpath, out_dir, output)
+                if variants:
+                    entry['variants'] = variants
+            manifest[relpath] = entry
+
+    _write(os.path.join(out_dir, 'manifest.json'), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest
+
+
+class AssetManifest:
+    """Source path -> fingerprinted file mapping produced by build_assets"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.built: Dict[str, Dict[str, Any]] = {}
+        if path:
+            self.load(path)
+
+    def load(self, path: str):
+        """Read a manifest; a missing one leaves plain static URLs in place"""
+        try:
+            with open(path, 'r') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = {}
+        built = {}
+        for entry in entries.values():
+            built[entry['file']] = entry
+            for variant in entry.get('variants', []):
+                built[variant['file']] = variant
+        self.entries, self.built = entries, built
+
+    def url_defaults(self, endpoint: str, values: Dict[str, Any]):
+        """Point url_for('static', filename=...) at the fingerprinted copy"""
+        # In debug, edits to static files must show up without a rebuild
+        if endpoint != 'static' or current_app.debug:
+            return
+        entry = self.entries.get(values.get('filename'))
+        if entry is not None:
+            values['filename'] = entry['file']
+
+    def srcset(self, filename: str) -> str:
+        """srcset value listing the WebP variants of an image ('' if none were built)"""
+        entry = self.entries.get(filename)
+        if current_app.debug or not entry:
+            return ''
+        return ', '.join(
+            f"{url_for('static', filename=variant['file'])} {variant['width']}w"
+            for variant in entry.get('variants', [])
+        )
+
+
+def serve_static(filename: str):
+    """Static view: fingerprinted files get precompressed bodies and immutable caching"""
+    manifest = current_app.extensions['assets']
+    entry = manifest.built.get(filename)
+    if entry is None:
+        return current_app.send_static_file(filename)
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if encoding in entry.get('encodings', ()) and request.accept_encodings[encoding]:
+            response = send_from_directory(current_app.static_folder, filename + suffix, mimetype=mimetype)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(current_app.static_folder, filename, mimetype=mimetype)
+    # The name changes whenever the content does
+    response.headers['Cache-Control'] = f"public, max-age={ASSET_CONFIG['max_age']}, immutable"
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+assets_cli = AppGroup('assets', help='Build fingerprinted static assets.')
+
+
+@assets_cli.command('build')
+@click.option('--clean', is_flag=True, help='Delete earlier builds first (keep them for rolling deploys)')
+@with_appcontext
+def build_command(clean):
+    """Write hashed, precompressed and resized static files plus the manifest"""
+    manifest = build_assets(current_app.static_folder, clean=clean)
+    variants = sum(len(entry.get('variants', [])) for entry in manifest.values())
+    compressed = sum(len(entry.get('encodings', [])) for entry in manifest.values())
+    click.echo(f"Built {len(manifest)} assets ({compressed} precompressed, {variants} image variants)")
+    if brotli is None:
+        click.echo("Brotli not installed: skipped .br files")
+    if Image is None:
+        click.echo("Pillow not installed: skipped WebP image variants")
+    current_app.extensions['assets'].load(current_app.config['ASSET_MANIFEST'])
+
+
+def init_assets(app) -> AssetManifest:
+    """Load the asset manifest and hook it into url_for, the static view and the CLI"""
+    manifest = AssetManifest(app.config['ASSET_MANIFEST'])
+    app.extensions['assets'] = manifest
+    app.url_defaults(manifest.url_defaults)
+    app.view_functions['static'] = serve_static
+    app.add_template_global(manifest.srcset, 'asset_srcset')
+    app.cli.add_command(assets_cli)
+    return manifest
@@ -0,0 +1,432 @@
+"""
+Google Drive Backends for Apply Boost Studio
+The operations GoogleDriveManager needs from Drive, and an offline stand-in that
+keeps files on the local filesystem with injectable latency and errors so the
+upload pipeline can be tested and benchmarked without the real API
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+MAX_BATCH_SIZE = 100
+
+
+class DriveBackendError(Exception):
+    """API error raised by a non-Google backend, carrying an HTTP status like HttpError"""
+
+    def __init__(self, status: int, reason: str = 'backendError'):
+        super().__init__(f"{status} {reason}")
+        self.status = status
+        self.reason = reason
+
+
+class ResumableUpload(ABC):
+    """One resumable upload session, sent chunk by chunk"""
+
+    size = 0
+    resumable_uri: Optional[str] = None
+
+    @abstractmethod
+    def resume(self, resumable_uri: str, offset: int):
+        """Continue an existing session; the server's offset is re-checked before sending"""
+
+    @abstractmethod
+    def restart(self):
+        """Forget the session so the next chunk starts a new one from byte zero"""
+
+    @abstractmethod
+    def next_chunk(self) -> Tuple[Optional[int], Optional[Dict[str, Any]]]:
+        """Send one chunk: returns (confirmed offset, None) or (None, file resource) when done"""
+
+
+class DriveBackend(ABC):
+    """Blocking Drive operations used by GoogleDriveManager (called on its thread pool)"""
+
+    @abstractmethod
+    def find_folder(self, name: str, parent_id: str) -> Optional[str]:
+        """ID of a non-trashed folder called name directly under parent_id"""
+
+    @abstractmethod
+    def create_folder(self, name: str, parent_id: str) -> str:
+        """Create a folder and return its ID"""
+
+    @abstractmethod
+    def list_page(self, folder_id: str, page_size: int, fields: str, page_token: Optional[str] = None,
+                  modified_after: Optional[str] = None, order_by: Optional[str] = None) -> Dict[str, Any]:
+        """One page of a folder listing: {'files': [...], 'nextPageToken': ...}"""
+
+    @abstractmethod
+    def create_upload(self, metadata: Dict[str, Any], file_path: str, chunk_size: int,
+                      fields: str) -> ResumableUpload:
+        """Prepare a resumable upload of file_path with the given file metadata"""
+
+    @abstractmethod
+    def execute_batch(self, indexed_operations: List[Tuple[int, Dict[str, Any]]]) -> Dict[int, Tuple[Any, Any]]:
+        """Apply up to 100 operations; returns {index: (response, exception)}"""
+
+
+def _rfc3339(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+def _parse_time(value: str) -> float:
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _project(resource: Dict[str, Any], fields: Optional[str]) -> Dict[str, Any]:
+    """Keep only the requested top-level fields, as Drive does"""
+    if not fields or fields == '*':
+        return dict(resource)
+    wanted = [field.strip().split('(')[0].split('/')[0] for field in fields.split(',')]
+    return {field: resource[field] for field in wanted if field in resource}
+
+
+def _upload_identity(metadata: Dict[str, Any]) -> str:
+    """Content hash when known (names carry timestamps), so injected errors repeat across runs"""
+    return (metadata.get('appProperties') or {}).get('sha256') or metadata.get('name', '')
+
+
+class LocalResumableUpload(ResumableUpload):
+    """Resumable upload against a LocalDriveBackend session"""
+
+    def __init__(self, backend: 'LocalDriveBackend', metadata: Dict[str, Any], file_path: str,
+                 chunk_size: int, fields: str):
+        self.backend = backend
+        self.metadata = metadata
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.fields = fields
+        self.size = os.path.getsize(file_path)
+        self.resumable_uri = None
+        self.offset = 0
+        self._query_offset = False
+
+    def resume(self, resumable_uri: str, offset: int):
+        self.resumable_uri = resumable_uri
+        self.offset = offset
+        self._query_offset = True
+
+    def restart(self):
+        self.resumable_uri = None
+        self.offset = 0
+        self._query_offset = False
+
+    def next_chunk(self) -> Tuple[Optional[int], Optional[Dict[str, Any]]]:
+        if self.resumable_uri is None:
+            self.resumable_uri = self.backend._start_session(self.metadata, self.size)
+            self.offset = 0
+        elif self._query_offset:
+            self.offset = self.backend._session_offset(self.resumable_uri)
+            self._query_offset = False
+
+        with open(self.file_path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(self.chunk_size)
+        self.offset = self.backend._append_chunk(self.resumable_uri, self.offset, data)
+        if self.offset < self.size:
+            return self.offset, None
+        return None, _project(self.backend._finish_session(self.resumable_uri), self.fields)
+
+
+class LocalDriveBackend(DriveBackend):
+    """Drive stand-in keeping files and metadata under a local directory
+
+    latency is added to every call: seconds, or a (min, max) range.
+    bandwidth (bytes/second) adds transfer time to upload chunks.
+    error_rate is the probability a call fails with a retryable 503, either
+    one rate for everything or a dict keyed by operation ('find', 'create',
+    'list', 'upload', 'batch', 'batch_item'). Injected latency and failures
+    are derived from seed and the call itself rather than from thread
+    timing, so a benchmark run can be repeated exactly.
+    """
+
+    def __init__(self, root: str, latency: Union[float, Tuple[float, float]] = 0,
+                 error_rate: Union[float, Dict[str, float]] = 0.0, seed: int = 0,
+                 bandwidth: Optional[float] = None):
+        self.root = root
+        self.latency = latency
+        self.error_rate = error_rate
+        self.seed = seed
+        self.bandwidth = bandwidth
+        self.files_dir = os.path.join(root, 'files')
+        self.sessions_dir = os.path.join(root, 'sessions')
+        self.db_path = os.path.join(root, 'index.sqlite3')
+        # Calls and injected errors per operation, for benchmark reports
+        self.calls = Counter()
+        self.errors = Counter()
+        self._attempts = Counter()
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
+
+        os.makedirs(self.files_dir, exist_ok=True)
+        os.makedirs(self.sessions_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    id TEXT PRIMARY KEY,
+                    parent TEXT,
+                    name TEXT NOT NULL,
+                    mime_type TEXT,
+                    trashed INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    modified_at REAL NOT NULL,
+                    resource TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS files_parent ON files (parent, trashed, name)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    uri TEXT PRIMARY KEY,
+                    metadata TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    received INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return a connection owned by the current thread and process"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _roll(self, operation: str, key: str) -> float:
+        """Deterministic number in [0, 1) for the nth call of an operation on key"""
+        with self._stats_lock:
+            self.calls[operation] += 1
+            self._attempts[(operation, key)] += 1
+            attempt = self._attempts[(operation, key)]
+        digest = hashlib.sha256(f"{self.seed}:{operation}:{key}:{attempt}".encode()).digest()
+        return int.from_bytes(digest[:8], 'big') / 2 ** 64
+
+    def _simulate(self, operation: str, key: str, transfer_bytes: int = 0, round_trip: bool = True):
+        """Apply injected latency, then fail the call if its roll is under the error rate"""
+        roll = self._roll(operation, key)
+        if not round_trip:
+            delay = 0
+        elif isinstance(self.latency, (tuple, list)):
+            delay = self.latency[0] + (self.latency[1] - self.latency[0]) * roll
+        else:
+            delay = self.latency
+        if self.bandwidth and transfer_bytes:
+            delay += transfer_bytes / self.bandwidth
+        if delay:
+            time.sleep(delay)
+
+        rate = self.error_rate.get(operation, 0.0) if isinstance(self.error_rate, dict) else self.error_rate
+        # Reuse the roll from the other end so slow calls are not also the failing ones
+        if rate and 1 - roll < rate:
+            with self._stats_lock:
+                self.errors[operation] += 1
+            raise DriveBackendError(503, 'backendError')
+
+    def _resource(self, row: sqlite3.Row) -> Dict[str, Any]:
+        return json.loads(row['resource'])
+
+    def _get_row(self, conn: sqlite3.Connection, file_id: str) -> sqlite3.Row:
+        row = conn.execute("SELECT * FROM files WHERE id = ?", (file_id,)).fetchone()
+        if row is None:
+            raise DriveBackendError(404, 'notFound')
+        return row
+
+    def _new_id(self, key: str) -> str:
+        """IDs follow from the seed and what is created, not from creation order"""
+        with self._stats_lock:
+            self._attempts[('id', key)] += 1
+            n = self._attempts[('id', key)]
+        return hashlib.sha256(f"{self.seed}:id:{key}:{n}".encode()).hexdigest()[:33]
+
+    def _insert(self, conn: sqlite3.Connection, metadata: Dict[str, Any], size: Optional[int] = None) -> Dict[str, Any]:
+        now = time.time()
+        parents = metadata.get('parents') or []
+        file_id = self._new_id(f"{(parents or [None])[0]}/{_upload_identity(metadata)}")
+        resource = dict(
+            metadata,
+            id=file_id,
+            mimeType=metadata.get('mimeType', 'application/octet-stream'),
+            parents=parents[:1],
+            createdTime=_rfc3339(now),
+            modifiedTime=_rfc3339(now),
+            trashed=False,
+            webViewLink=f"local-drive:///{file_id}"
+        )
+        if size is not None:
+            resource['size'] = str(size)
+        conn.execute(
+            "INSERT INTO files (id, parent, name, mime_type, created_at, modified_at, resource) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (file_id, parents[0] if parents else None, resource['name'], resource['mimeType'], now, now,
+             json.dumps(resource))
+        )
+        return resource
+
+    def blob_path(self, file_id: str) -> str:
+        """Where the content of an uploaded file is kept"""
+        return os.path.join(self.files_dir, file_id)
+
+    def find_folder(self, name: str, parent_id: str) -> Optional[str]:
+        self._simulate('find', f"{parent_id}/{name}")
+        row = self._connect().execute(
+            "SELECT id FROM files WHERE parent = ? AND name = ? AND mime_type = ? AND trashed = 0 ORDER BY created_at LIMIT 1",
+            (parent_id, name, FOLDER_MIME_TYPE)
+        ).fetchone()
+        return row['id'] if row else None
+
+    def create_folder(self, name: str, parent_id: str) -> str:
+        self._simulate('create', f"{parent_id}/{name}")
+        resource = self._insert(self._connect(), {'name': name, 'mimeType': FOLDER_MIME_TYPE, 'parents': [parent_id]})
+        return resource['id']
+
+    def list_page(self, folder_id: str, page_size: int, fields: str, page_token: Optional[str] = None,
+                  modified_after: Optional[str] = None, order_by: Optional[str] = None) -> Dict[str, Any]:
+        self._simulate('list', f"{folder_id}:{page_token}")
+        query = "SELECT * FROM files WHERE parent = ? AND trashed = 0"
+        params: List[Any] = [folder_id]
+        if modified_after:
+            query += " AND modified_at > ?"
+            params.append(_parse_time(modified_after))
+
+        columns = {'modifiedTime': 'modified_at', 'createdTime': 'created_at', 'name': 'name'}
+        ordering = []
+        for key in (order_by or 'createdTime').split(','):
+            parts = key.split()
+            if parts and parts[0] in columns:
+                ordering.append(columns[parts[0]] + (' DESC' if parts[-1] == 'desc' else ''))
+        query += " ORDER BY " + ", ".join(ordering + ['rowid'])
+
+        offset = int(page_token or 0)
+        query += " LIMIT ? OFFSET ?"
+        params += [page_size + 1, offset]
+        rows = self._connect().execute(query, params).fetchall()
+
+        page = {'files': [_project(self._resource(row), fields) for row in rows[:page_size]]}
+        if len(rows) > page_size:
+            page['nextPageToken'] = str(offset + page_size)
+        return page
+
+    def create_upload(self, metadata: Dict[str, Any], file_path: str, chunk_size: int,
+                      fields: str) -> ResumableUpload:
+        return LocalResumableUpload(self, metadata, file_path, chunk_size, fields)
+
+    def _session_path(self, uri: str) -> str:
+        return os.path.join(self.sessions_dir, uri.rsplit('/', 1)[1])
+
+    def _start_session(self, metadata: Dict[str, Any], size: int) -> str:
+        self._simulate('upload', f"{_upload_identity(metadata)}@start")
+        uri = f"local-drive:///upload/{uuid.uuid4().hex}"
+        open(self._session_path(uri), 'wb').close()
+        self._connect().execute(
+            "INSERT INTO sessions (uri, metadata, size) VALUES (?, ?, ?)", (uri, json.dumps(metadata), size)
+        )
+        return uri
+
+    def _get_session(self, uri: str) -> sqlite3.Row:
+        row = self._connect().execute("SELECT * FROM sessions WHERE uri = ?", (uri,)).fetchone()
+        if row is None:
+            raise DriveBackendError(404, 'notFound')
+        return row
+
+    def _session_offset(self, uri: str) -> int:
+        session = self._get_session(uri)
+        self._simulate('upload', f"{_upload_identity(json.loads(session['metadata']))}@status")
+        return session['received']
+
+    def _append_chunk(self, uri: str, offset: int, data: bytes) -> int:
+        session = self._get_session(uri)
+        self._simulate('upload', f"{_upload_identity(json.loads(session['metadata']))}@{offset}", len(data))
+        if offset > session['received']:
+            raise DriveBackendError(400, 'badContentRange')
+        with open(self._session_path(uri), 'r+b') as f:
+            f.seek(offset)
+            f.write(data)
+            f.truncate()
+        received = offset + len(data)
+        self._connect().execute("UPDATE sessions SET received = ? WHERE uri = ?", (received, uri))
+        return received
+
+    def _finish_session(self, uri: str) -> Dict[str, Any]:
+        session = self._get_session(uri)
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            resource = self._insert(conn, json.loads(session['metadata']), session['received'])
+            conn.execute("DELETE FROM sessions WHERE uri = ?", (uri,))
+            os.replace(self._session_path(uri), self.blob_path(resource['id']))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return resource
+
+    def _apply(self, conn: sqlite3.Connection, operation: Dict[str, Any]) -> Any:
+        action = operation['action']
+        if action not in ('update', 'move', 'trash', 'delete'):
+            raise ValueError(f"Unknown batch action: {action}")
+        row = self._get_row(conn, operation['file_id'])
+        if action == 'delete':
+            conn.execute("DELETE FROM files WHERE id = ?", (row['id'],))
+            if os.path.exists(self.blob_path(row['id'])):
+                os.remove(self.blob_path(row['id']))
+            return {}
+
+        resource = self._resource(row)
+        if action == 'update':
+            resource.update(operation.get('body', {}))
+        elif action == 'move':
+            resource['parents'] = [operation['parent_id']]
+        else:
+            resource['trashed'] = True
+        now = time.time()
+        resource['modifiedTime'] = _rfc3339(now)
+        conn.execute(
+            "UPDATE files SET parent = ?, name = ?, trashed = ?, modified_at = ?, resource = ? WHERE id = ?",
+            ((resource.get('parents') or [None])[0], resource['name'], int(bool(resource.get('trashed'))), now,
+             json.dumps(resource), row['id'])
+        )
+        return _project(resource, operation.get('fields', 'id'))
+
+    def execute_batch(self, indexed_operations: List[Tuple[int, Dict[str, Any]]]) -> Dict[int, Tuple[Any, Any]]:
+        if len(indexed_operations) > MAX_BATCH_SIZE:
+            raise DriveBackendError(400, 'batchSizeTooLarge')
+        self._simulate('batch', ','.join(str(op.get('file_id')) for _, op in indexed_operations))
+
+        outcomes = {}
+        conn = self._connect()
+        for index, operation in indexed_operations:
+            try:
+                # Items share the batch's round trip but can fail individually
+                self._simulate('batch_item', f"{operation.get('action')}:{operation.get('file_id')}", round_trip=False)
+                outcomes[index] = (self._apply(conn, operation), None)
+            except Exception as e:
+                outcomes[index] = (None, e)
+        return outcomes
+
+    def reset(self):
+        """Delete every stored file and session"""
+        conn = self._connect()
+        conn.execute("DELETE FROM files")
+        conn.execute("DELETE FROM sessions")
+        for directory in (self.files_dir, self.sessions_dir):
+            shutil.rmtree(directory, ignore_errors=True)
+            os.makedirs(directory, exist_ok=True)
+        with self._stats_lock:
+            self.calls.clear()
+            self.errors.clear()
+            self._attempts.clear()
@@ -0,0 +1,189 @@
+"""
+Shared Google Drive Credentials for Apply Boost Studio
+One token.json shared by every worker process: refreshes are coordinated with a
+file lock, tokens are refreshed in the background from worker start (backing
+off while refreshes keep failing), and the Drive service is built once per
+process from the bundled discovery document
+"""
+
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+from config import GOOGLE_DRIVE_CONFIG
+from app.lazy import lazy_import
+from app.resilience import backoff_delay
+
+logger = logging.getLogger(__name__)
+
+# Imported on first use: building the Drive client is the slow part of a cold start
+google_requests = lazy_import('google.auth.transport.requests')
+oauth2_credentials = lazy_import('google.oauth2.credentials')
+discovery = lazy_import('googleapiclient.discovery')
+
+
+def _utcnow() -> datetime:
+    """Current time as naive UTC, the form google-auth uses for Credentials.expiry"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class SharedCredentials:
+    """OAuth credentials backed by a token file that several processes share"""
+
+    def __init__(self, token_file: str, scopes, refresh_margin: float = 300,
+                 refresh_interval: float = 60, max_backoff: float = 600):
+        self.token_file = token_file
+        self.lock_file = f"{token_file}.lock"
+        self.scopes = scopes
+        self.refresh_margin = refresh_margin
+        self.refresh_interval = refresh_interval
+        self.max_backoff = max_backoff
+        self.refresh_failures = 0
+        self.creds: Optional['oauth2_credentials.Credentials'] = None
+        self._mtime = None
+        self._lock = threading.Lock()
+        self._refresher_pid = None
+        self.refresh_count = 0
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock across processes for read-refresh-write of the token file"""
+        directory = os.path.dirname(self.lock_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.lock_file, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _load(self) -> Optional['oauth2_credentials.Credentials']:
+        """Reload the token file if another process has rewritten it"""
+        try:
+            mtime = os.stat(self.token_file).st_mtime_ns
+        except OSError:
+            return self.creds
+        if mtime == self._mtime and self.creds is not None:
+            return self.creds
+
+        # A new object: holders re-read it through get() (see GoogleApiBackend._http)
+        with open(self.token_file, 'r') as f:
+            self.creds = oauth2_credentials.Credentials.from_authorized_user_info(json.load(f), self.scopes)
+        self._mtime = mtime
+        return self.creds
+
+    def _write(self, creds: 'oauth2_credentials.Credentials'):
+        tmp_path = f"{self.token_file}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(creds.to_json())
+        os.replace(tmp_path, self.token_file)
+        self._mtime = os.stat(self.token_file).st_mtime_ns
+
+    def _expiring(self, creds: 'oauth2_credentials.Credentials') -> bool:
+        if not creds.token:
+            return True
+        if creds.expiry is None:
+            return False
+        return creds.expiry - timedelta(seconds=self.refresh_margin) <= _utcnow()
+
+    def get(self) -> Optional['oauth2_credentials.Credentials']:
+        """Current credentials from the shared token file (blocking file I/O only)"""
+        with self._lock:
+            return self._load()
+
+    def refresh_if_needed(self) -> Optional['oauth2_credentials.Credentials']:
+        """Refresh if the token is expiring; only one process refreshes at a time (blocking)"""
+        with self._lock:
+            creds = self._load()
+            if creds is None or not self._expiring(creds):
+                return creds
+            with self._file_lock():
+                # Another worker may have refreshed while we waited for the lock
+                self._mtime = None
+                creds = self._load()
+                if self._expiring(creds) and creds.refresh_token:
+                    logger.info("Refreshing Google Drive token")
+                    creds.refresh(google_requests.Request())
+                    self._write(creds)
+                    self.refresh_count += 1
+            return creds
+
+    def save(self, creds: 'oauth2_credentials.Credentials'):
+        """Store newly obtained credentials for every worker"""
+        with self._lock:
+            with self._file_lock():
+                self._write(creds)
+            self.creds = creds
+
+    def seconds_until_refresh(self) -> float:
+        if self.refresh_failures:
+            # A revoked token fails the same way every time: back off instead of polling Google
+            return max(1.0, backoff_delay(self.refresh_failures, self.refresh_interval / 4, self.max_backoff))
+        creds = self.creds
+        if creds is None or creds.expiry is None:
+            return self.refresh_interval
+        remaining = (creds.expiry - _utcnow()).total_seconds() - self.refresh_margin
+        return min(max(remaining, 1), self.refresh_interval)
+
+    def start_refresher(self):
+        """Load the token now and refresh it in a background thread before expiry (one thread per process)"""
+        with self._lock:
+            if self._refresher_pid == os.getpid():
+                return
+            self._refresher_pid = os.getpid()
+        thread = threading.Thread(target=self._refresh_loop, name='drive-token-refresher', daemon=True)
+        thread.start()
+
+    def _refresh_loop(self):
+        while True:
+            try:
+                creds = self.refresh_if_needed()
+                if creds is not None and self._expiring(creds):
+                    raise RuntimeError("token expired and cannot be refreshed (no refresh token)")
+                self.refresh_failures = 0
+            except Exception as e:
+                self.refresh_failures += 1
+                logger.error("Background Google Drive token refresh failed (%d in a row): %s",
+                             self.refresh_failures, e)
+            time.sleep(self.seconds_until_refresh())
+
+
+# Process-wide caches
+_shared_credentials: Dict[str, SharedCredentials] = {}
+_services: Dict[Tuple[int, int], object] = {}
+_cache_lock = threading.Lock()
+
+
+def get_shared_credentials(token_file: str = None, scopes=None) -> SharedCredentials:
+    """Return the process-wide SharedCredentials for a token file"""
+    token_file = token_file or GOOGLE_DRIVE_CONFIG['token_file']
+    with _cache_lock:
+        shared = _shared_credentials.get(token_file)
+        if shared is None:
+            shared = SharedCredentials(
+                token_file,
+                scopes or GOOGLE_DRIVE_CONFIG['scopes'],
+                refresh_margin=GOOGLE_DRIVE_CONFIG['token_refresh_margin'],
+                refresh_interval=GOOGLE_DRIVE_CONFIG['token_refresh_interval'],
+                max_backoff=GOOGLE_DRIVE_CONFIG['token_refresh_max_backoff']
+            )
+            _shared_credentials[token_file] = shared
+        return shared
+
+
+def get_drive_service(creds: 'oauth2_credentials.Credentials'):
+    """Drive v3 service built once per process from the bundled discovery document"""
+    key = (os.getpid(), id(creds))
+    with _cache_lock:
+        service = _services.get(key)
+        if service is None:
+            # static_discovery avoids fetching the discovery document over the network
+            service = discovery.build('drive', 'v3', credentials=creds, static_discovery=True, cache_discovery=False)
+            _services[key] = service
+        return service
@@ -4,112 +4,522 @@ Handles file uploads to Google Drive with async functionality
 """
 
 import asyncio
+import functools
+import hashlib
 import os
 import json
+import logging
+import random
+import time
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional, Dict, Any
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
-from googleapiclient.errors import HttpError
-import aiofiles
-from config import GOOGLE_DRIVE_CONFIG
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
+from config import GOOGLE_DRIVE_CONFIG, RESILIENCE_CONFIG, UPLOAD_CONFIG
+from app.lazy import lazy_import, loaded_attr
+from app.metrics import stage
+from app.resilience import CircuitBreaker, CircuitOpenError, call_with_retries, get_breaker, retry_policy
+from app.resume_store import ResumeStore
+from app.drive_credentials import get_drive_service, get_shared_credentials
+from app.drive_backends import (
+    DriveBackend, DriveBackendError, LocalDriveBackend, ResumableUpload, FOLDER_MIME_TYPE
+)
+
+logger = logging.getLogger(__name__)
+
+# The Google client stack is only imported once the real API is used
+httplib2 = lazy_import('httplib2')
+google_auth_httplib2 = lazy_import('google_auth_httplib2')
+oauth_flow = lazy_import('google_auth_oauthlib.flow')
+googleapiclient_http = lazy_import('googleapiclient.http')
+
+
+def _api_errors() -> tuple:
+    """Exception types a Drive call can raise (HttpError only once googleapiclient is loaded)"""
+    http_error = loaded_attr('googleapiclient.errors', 'HttpError')
+    return (http_error, DriveBackendError) if http_error else (DriveBackendError,)
+
+
+class FolderCache:
+    """Thread-safe TTL/LRU cache of Drive folder IDs, optionally persisted to disk"""
+    
+    def __init__(self, max_entries: int = 256, ttl: float = 86400, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self._entries: 'OrderedDict[str, Tuple[str, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._load()
+    
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+    
+    def set(self, key: str, folder_id: str):
+        with self._lock:
+            self._entries[key] = (folder_id, time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            snapshot = dict(self._entries)
+        self._save(snapshot)
+    
+    def _load(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'r') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for key, (folder_id, expires) in sorted(entries.items(), key=lambda item: item[1][1]):
+            if expires > now:
+                self._entries[key] = (folder_id, expires)
+    
+    def _save(self, entries: Dict[str, Tuple[str, float]]):
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("Could not persist Drive folder cache: %s", e)
+
+
+class GoogleResumableUpload(ResumableUpload):
+    """Adapts googleapiclient's resumable HttpRequest to the ResumableUpload protocol"""
+    
+    def __init__(self, request, backend: 'GoogleApiBackend'):
+        self.request = request
+        self.backend = backend
+        self.size = request.resumable.size()
+    
+    @property
+    def resumable_uri(self) -> Optional[str]:
+        return self.request.resumable_uri
+    
+    def resume(self, resumable_uri: str, offset: int):
+        self.request.resumable_uri = resumable_uri
+        self.request.resumable_progress = offset
+        # Ask Drive for the offset it actually confirmed before sending more
+        self.request._in_error_state = True
+    
+    def restart(self):
+        self.request.resumable_uri = None
+        self.request.resumable_progress = 0
+        self.request._in_error_state = False
+    
+    def next_chunk(self) -> Tuple[Optional[int], Optional[Dict[str, Any]]]:
+        status, response = self.request.next_chunk(http=self.backend._http())
+        return (status.resumable_progress if status else None), response
+
+
+class GoogleApiBackend(DriveBackend):
+    """The real Drive v3 API through a googleapiclient service"""
+    
+    def __init__(self, service, creds=None, shared=None):
+        self.service = service
+        self.creds = creds
+        # SharedCredentials replaces its Credentials object whenever token.json changes
+        self.shared = shared
+        # httplib2 connections are not thread-safe: one per executor thread
+        self._thread_local = threading.local()
+    
+    def _http(self) -> 'google_auth_httplib2.AuthorizedHttp':
+        """Authorized HTTP transport owned by the calling thread"""
+        if self.shared is not None:
+            self.creds = self.shared.get() or self.creds
+        http = getattr(self._thread_local, 'http', None)
+        if http is None or http.credentials is not self.creds:
+            # httplib2 applies one socket timeout to the connect and to every read
+            http = google_auth_httplib2.AuthorizedHttp(
+                self.creds, http=httplib2.Http(timeout=RESILIENCE_CONFIG['drive']['timeout'])
+            )
+            self._thread_local.http = http
+        return http
+    
+    def _execute(self, request):
+        """Execute an API request on this thread's transport"""
+        return request.execute(http=self._http())
+    
+    def find_folder(self, name: str, parent_id: str) -> Optional[str]:
+        escaped_name = name.replace('\\', '\\\\').replace("'", "\\'")
+        query = f"name='{escaped_name}' and mimeType='{FOLDER_MIME_TYPE}' and '{parent_id}' in parents and trashed=false"
+        results = self._execute(
+            self.service.files().list(q=query, spaces='drive', fields='files(id, name)')
+        )
+        files = results.get('files', [])
+        return files[0]['id'] if files else None
+    
+    def create_folder(self, name: str, parent_id: str) -> str:
+        folder_metadata = {
+            'name': name,
+            'mimeType': FOLDER_MIME_TYPE,
+            'parents': [parent_id]
+        }
+        folder = self._execute(self.service.files().create(body=folder_metadata, fields='id'))
+        return folder.get('id')
+    
+    def list_page(self, folder_id: str, page_size: int, fields: str, page_token: Optional[str] = None,
+                  modified_after: Optional[str] = None, order_by: Optional[str] = None) -> Dict[str, Any]:
+        query = f"'{folder_id}' in parents and trashed=false"
+        if modified_after:
+            query += f" and modifiedTime > '{modified_after}'"
+        params = {
+            'q': query,
+            'spaces': 'drive',
+            'pageSize': page_size,
+            'fields': f'nextPageToken, files({fields})'
+        }
+        if order_by:
+            params['orderBy'] = order_by
+        return self._execute(self.service.files().list(pageToken=page_token, **params))
+    
+    def create_upload(self, metadata: Dict[str, Any], file_path: str, chunk_size: int,
+                      fields: str) -> ResumableUpload:
+        media = googleapiclient_http.MediaFileUpload(file_path, chunksize=chunk_size, resumable=True)
+        request = self.service.files().create(body=metadata, media_body=media, fields=fields)
+        return GoogleResumableUpload(request, self)
+    
+    def _build_batch_request(self, operation: Dict[str, Any]):
+        """Translate a housekeeping operation into a Drive API request"""
+        files = self.service.files()
+        action = operation['action']
+        file_id = operation['file_id']
+        fields = operation.get('fields', 'id')
+        if action == 'update':
+            return files.update(fileId=file_id, body=operation.get('body', {}), fields=fields)
+        if action == 'move':
+            return files.update(
+                fileId=file_id,
+                addParents=operation['parent_id'],
+                removeParents=operation.get('remove_parents', ''),
+                fields=fields
+            )
+        if action == 'trash':
+            return files.update(fileId=file_id, body={'trashed': True}, fields=fields)
+        if action == 'delete':
+            return files.delete(fileId=file_id)
+        raise ValueError(f"Unknown batch action: {action}")
+    
+    def execute_batch(self, indexed_operations: List[Tuple[int, Dict[str, Any]]]) -> Dict[int, Tuple[Any, Any]]:
+        """Send the operations as one multipart HTTP batch request"""
+        outcomes = {}
+        
+        def callback(request_id, response, exception):
+            outcomes[int(request_id)] = (response, exception)
+        
+        batch = self.service.new_batch_http_request(callback=callback)
+        for index, operation in indexed_operations:
+            try:
+                batch.add(self._build_batch_request(operation), request_id=str(index))
+            except Exception as e:
+                outcomes[index] = (None, e)
+        if len(outcomes) < len(indexed_operations):
+            batch.execute(http=self._http())
+        return outcomes
+
+
+def create_backend_from_config() -> Optional[DriveBackend]:
+    """Backend selected by GOOGLE_DRIVE_CONFIG['backend']; None means authenticate with Google"""
+    if GOOGLE_DRIVE_CONFIG['backend'] == 'local':
+        return LocalDriveBackend(
+            GOOGLE_DRIVE_CONFIG['local_dir'],
+            latency=GOOGLE_DRIVE_CONFIG['local_latency'],
+            error_rate=GOOGLE_DRIVE_CONFIG['local_error_rate'],
+            seed=GOOGLE_DRIVE_CONFIG['local_seed']
+        )
+    return None
 
 
 class GoogleDriveManager:
-    """Manages Google Drive operations with async support"""
+    """Manages Google Drive operations with async support
     
-    def __init__(self):
+    googleapiclient is blocking, so every network call (token refresh,
+    discovery, execute()) runs on a bounded thread pool and the coroutines
+    only await it. Uploads are additionally limited by a semaphore.
+    
+    Drive calls go through a DriveBackend: the Google API once authenticated,
+    or any backend passed in (e.g. LocalDriveBackend for offline benchmarks).
+    Each call is retried on transient errors and passes through the Drive
+    circuit breaker, so an outage fails uploads fast instead of piling up
+    threads waiting on timeouts.
+    """
+    
+    def __init__(self, backend: Optional[DriveBackend] = None, breaker: Optional[CircuitBreaker] = None,
+                 retry: Optional[Dict[str, Any]] = None):
         self.creds = None
         self.service = None
+        self.backend = backend if backend is not None else create_backend_from_config()
         self.folder_id = GOOGLE_DRIVE_CONFIG['folder_id']
         self.credentials_file = GOOGLE_DRIVE_CONFIG['credentials_file']
         self.token_file = GOOGLE_DRIVE_CONFIG['token_file']
         self.scopes = GOOGLE_DRIVE_CONFIG['scopes']
+        self.max_concurrent_uploads = GOOGLE_DRIVE_CONFIG['max_concurrent_uploads']
+        # Resumable chunks must be a multiple of 256 KB
+        self.upload_chunk_size = max(
+            256 * 1024,
+            GOOGLE_DRIVE_CONFIG['upload_chunk_size'] // (256 * 1024) * (256 * 1024)
+        )
+        self.checkpoint_dir = GOOGLE_DRIVE_CONFIG['checkpoint_dir']
+        # Internal progress counters: bytes confirmed by Drive, per upload and in total
+        self.upload_progress: Dict[str, Dict[str, int]] = {}
+        self.bytes_uploaded = 0
+        self._progress_lock = threading.Lock()
+        self.list_page_size = GOOGLE_DRIVE_CONFIG['list_page_size']
+        self.batch_size = min(100, GOOGLE_DRIVE_CONFIG['batch_size'])  # Drive batch limit
+        self.batch_max_attempts = GOOGLE_DRIVE_CONFIG['batch_max_attempts']
+        self.batch_retry_delay = GOOGLE_DRIVE_CONFIG['batch_retry_delay']
+        # Folder name -> ID resolution
+        self.shard_by = GOOGLE_DRIVE_CONFIG['shard_by']
+        self.folder_cache = FolderCache(
+            GOOGLE_DRIVE_CONFIG['folder_cache_size'],
+            GOOGLE_DRIVE_CONFIG['folder_cache_ttl'],
+            GOOGLE_DRIVE_CONFIG['folder_cache_file']
+        )
+        self._inflight_folders = weakref.WeakKeyDictionary()
+        self._folder_locks: Dict[str, threading.Lock] = {}
+        self._folder_locks_lock = threading.Lock()
+        self._resume_store = None
+        self.breaker = breaker or get_breaker('drive')
+        self.retry = retry or retry_policy('drive')
+        self.max_workers = GOOGLE_DRIVE_CONFIG['max_workers']
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='google-drive')
+        self._auth_lock = threading.Lock()
+        # asyncio primitives belong to a single event loop
+        self._upload_semaphores = weakref.WeakKeyDictionary()
+    
+    async def _run_blocking(self, func, *args, **kwargs):
+        """Run a blocking call on the Drive thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+    
+    def _call(self, func, *args, attempts: Optional[int] = None):
+        """Blocking Drive call with backoff retries behind the circuit breaker"""
+        retry = dict(self.retry, attempts=attempts) if attempts else self.retry
+        return call_with_retries(func, *args, retryable=self._is_retryable, breaker=self.breaker, **retry)
+    
+    def set_concurrency(self, max_uploads: int):
+        """Allow max_uploads uploads in flight, growing the thread pool to match (call between runs)"""
+        self.max_concurrent_uploads = max_uploads
+        self._upload_semaphores = weakref.WeakKeyDictionary()
+        if max_uploads > self.max_workers:
+            self.max_workers = max_uploads
+            old_executor = self._executor
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='google-drive')
+            old_executor.shutdown(wait=False)
+    
+    def _upload_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._upload_semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrent_uploads)
+            self._upload_semaphores[loop] = semaphore
+        return semaphore
+    
+    def _checkpoint_path(self, key: str) -> str:
+        return os.path.join(self.checkpoint_dir, f'{key}.json')
+    
+    def _load_checkpoint(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._checkpoint_path(key), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _save_checkpoint(self, key: str, checkpoint: Dict[str, Any]):
+        """Atomically persist the session URI and confirmed offset"""
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        tmp_path = self._checkpoint_path(key) + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, self._checkpoint_path(key))
+    
+    def _clear_checkpoint(self, key: str):
+        try:
+            os.remove(self._checkpoint_path(key))
+        except OSError:
+            pass
+    
+    def _record_progress(self, key: str, offset: int, total: int):
+        with self._progress_lock:
+            previous = self.upload_progress.get(key, {}).get('sent', 0)
+            self.bytes_uploaded += max(0, offset - previous)
+            self.upload_progress[key] = {'sent': offset, 'total': total}
+    
+    @staticmethod
+    def _upload_key(file_path: str, sha256: Optional[str]) -> str:
+        """Stable identity for an upload so a restarted worker finds its checkpoint"""
+        if sha256:
+            return sha256
+        stat = os.stat(file_path)
+        identity = f"{os.path.abspath(file_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+        return hashlib.sha256(identity.encode()).hexdigest()
+    
+    @staticmethod
+    def _error_status(exception) -> Optional[int]:
+        """HTTP status of an API error from any backend"""
+        http_error = loaded_attr('googleapiclient.errors', 'HttpError')
+        if http_error and isinstance(exception, http_error):
+            return exception.resp.status
+        if isinstance(exception, DriveBackendError):
+            return exception.status
+        return None
+    
+    def _upload_resumable(self, upload: ResumableUpload, key: str, file_path: str):
+        """Send a resumable upload chunk by chunk, checkpointing after each one (blocking)"""
+        total = upload.size
+        checkpoint = self._load_checkpoint(key)
+        if checkpoint and checkpoint.get('resumable_uri'):
+            logger.info("Resuming upload of %s from byte %d", file_path, checkpoint['offset'])
+            upload.resume(checkpoint['resumable_uri'], checkpoint['offset'])
+            # Bytes confirmed before the restart were counted by the previous worker
+            with self._progress_lock:
+                self.upload_progress[key] = {'sent': checkpoint['offset'], 'total': total}
+        
+        response = None
+        while response is None:
+            try:
+                # Resending a chunk is safe: the session continues from the confirmed offset
+                offset, response = self._call(upload.next_chunk)
+            except _api_errors() as e:
+                if checkpoint and self._error_status(e) in (404, 410):
+                    # The session expired; start a fresh one from byte zero
+                    logger.warning("Upload session expired, restarting upload of %s", file_path)
+                    self._clear_checkpoint(key)
+                    checkpoint = None
+                    upload.restart()
+                    continue
+                raise
+            
+            if offset is not None:
+                checkpoint = {
+                    'resumable_uri': upload.resumable_uri,
+                    'offset': offset,
+                    'file_path': file_path,
+                    'size': total,
+                    'updated_at': time.time()
+                }
+                self._save_checkpoint(key, checkpoint)
+                self._record_progress(key, offset, total)
+        
+        self._record_progress(key, total, total)
+        self._clear_checkpoint(key)
+        return response
+    
+    async def _ensure_backend(self) -> bool:
+        """Authenticate on first use unless a backend was provided"""
+        if self.backend is not None:
+            return True
+        return await self.authenticate()
+    
+    @property
+    def resume_store(self) -> ResumeStore:
+        """Content-addressed store used to skip re-uploading identical resumes"""
+        if self._resume_store is None:
+            self._resume_store = ResumeStore(UPLOAD_CONFIG['folder'], UPLOAD_CONFIG['chunk_size'])
+        return self._resume_store
+    
+    @resume_store.setter
+    def resume_store(self, store: ResumeStore):
+        self._resume_store = store
     
     async def authenticate(self) -> bool:
         """Authenticate with Google Drive API"""
         try:
-            print("=== GOOGLE DRIVE AUTHENTICATION ===")
-            
             # Check if credentials file exists
             if not os.path.exists(self.credentials_file):
-                print(f"Credentials file not found: {self.credentials_file}")
+                logger.error("Credentials file not found: %s", self.credentials_file)
                 return False
             
-            # Load existing token if available
-            if os.path.exists(self.token_file):
-                print("Loading existing token...")
-                async with aiofiles.open(self.token_file, 'r') as f:
-                    token_data = await f.read()
-                    self.creds = Credentials.from_authorized_user_info(
-                        json.loads(token_data), self.scopes
-                    )
+            # Shared token: loaded from disk and refreshed under a cross-process lock
+            shared = get_shared_credentials(self.token_file, self.scopes)
+            self.creds = await self._run_blocking(shared.refresh_if_needed)
             
-            # If no valid credentials, get new ones
+            # No usable token yet: run the interactive OAuth flow once
             if not self.creds or not self.creds.valid:
-                if self.creds and self.creds.expired and self.creds.refresh_token:
-                    print("Refreshing expired token...")
-                    self.creds.refresh(Request())
-                else:
-                    print("Getting new credentials...")
-                    flow = InstalledAppFlow.from_client_secrets_file(
-                        self.credentials_file, self.scopes
-                    )
-                    self.creds = flow.run_local_server(port=0)
-                
-                # Save credentials for next run
-                async with aiofiles.open(self.token_file, 'w') as f:
-                    await f.write(self.creds.to_json())
+                creds = await self._run_blocking(self._obtain_credentials)
+                await self._run_blocking(shared.save, creds)
+                self.creds = creds
+            
+            # Build the service once per process from the bundled discovery document
+            self.service = await self._run_blocking(get_drive_service, self.creds)
+            self.backend = GoogleApiBackend(self.service, self.creds, shared)
             
-            # Build the service
-            self.service = build('drive', 'v3', credentials=self.creds)
-            print("Google Drive authentication successful!")
+            # Normally already running since worker start (app.server.start_worker_services)
+            shared.start_refresher()
+            logger.info("Google Drive authentication successful")
             return True
             
         except Exception as e:
-            print(f"Google Drive authentication failed: {e}")
+            logger.exception("Google Drive authentication failed")
             return False
     
-    async def upload_file(self, file_path: str, filename: str, email: str) -> Optional[Dict[str, Any]]:
+    def _obtain_credentials(self):
+        """Create credentials through the OAuth browser flow (blocking; one thread at a time)"""
+        with self._auth_lock:
+            logger.info("Running the OAuth flow for new Drive credentials")
+            flow = oauth_flow.InstalledAppFlow.from_client_secrets_file(
+                self.credentials_file, self.scopes
+            )
+            return flow.run_local_server(port=0)
+    
+    async def upload_file(self, file_path: str, filename: str, email: str,
+                          sha256: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """Upload file to Google Drive asynchronously"""
         try:
-            print(f"=== UPLOADING TO GOOGLE DRIVE ===")
-            print(f"File: {file_path}")
-            print(f"Filename: {filename}")
-            print(f"User Email: {email}")
+            # Identical bytes already in Drive are not sent again
+            if sha256:
+                delivery = self.resume_store.get_delivery(sha256, 'drive')
+                if delivery and delivery['reference']:
+                    logger.info("Resume already in Google Drive, skipping upload", extra={'resume_sha256': sha256})
+                    return dict(delivery['reference'], user_email=email, original_filename=filename)
+            
+            logger.debug("Uploading to Google Drive", extra={'file_path': file_path, 'original_filename': filename})
             
             # Authenticate if not already done
-            if not self.service:
-                if not await self.authenticate():
-                    return None
+            if not await self._ensure_backend():
+                return None
             
-            # Create file metadata
+            # Create file metadata (uploads are sharded into dated subfolders)
             file_metadata = {
                 'name': f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{email}_{filename}",
-                'parents': [self.folder_id],
+                'parents': [await self.resolve_shard_folder()],
                 'description': f'Resume submission from {email} at {datetime.now().isoformat()}'
             }
+            if sha256:
+                file_metadata['appProperties'] = {'sha256': sha256}
             
-            # Create media upload
-            media = MediaFileUpload(file_path, resumable=True)
+            # Create chunked, resumable media upload
+            upload_key = self._upload_key(file_path, sha256)
             
-            # Upload file
-            print("Starting file upload...")
-            file = self.service.files().create(
-                body=file_metadata,
-                media_body=media,
-                fields='id,name,webViewLink,createdTime'
-            ).execute()
+            # Upload file; the semaphore bounds concurrent uploads
+            async with self._upload_semaphore():
+                with stage('drive_upload'):
+                    upload = await self._run_blocking(
+                        self._call, self.backend.create_upload, file_metadata, file_path,
+                        self.upload_chunk_size, 'id,name,webViewLink,createdTime'
+                    )
+                    file = await self._run_blocking(self._upload_resumable, upload, upload_key, file_path)
             
-            print(f"File uploaded successfully!")
-            print(f"File ID: {file.get('id')}")
-            print(f"File Name: {file.get('name')}")
-            print(f"Web View Link: {file.get('webViewLink')}")
+            logger.info("File uploaded to Google Drive", extra={'file_id': file.get('id'), 'file_name': file.get('name')})
             
-            return {
+            result = {
                 'file_id': file.get('id'),
                 'file_name': file.get('name'),
                 'web_view_link': file.get('webViewLink'),
@@ -117,138 +527,240 @@ class GoogleDriveManager:
                 'user_email': email,
                 'original_filename': filename
             }
+            if sha256:
+                self.resume_store.mark_delivered(sha256, 'drive', result)
+            return result
             
-        except HttpError as e:
-            print(f"Google Drive upload error: {e}")
+        except CircuitOpenError as e:
+            logger.warning("Google Drive upload skipped: %s", e)
+            return None
+        except _api_errors() as e:
+            logger.error("Google Drive upload error: %s", e)
             return None
         except Exception as e:
-            print(f"Unexpected error during upload: {e}")
+            logger.exception("Unexpected error during upload")
             return None
     
-    async def create_folder_if_not_exists(self, folder_name: str) -> Optional[str]:
+    async def create_folder_if_not_exists(self, folder_name: str, parent_id: Optional[str] = None) -> Optional[str]:
         """Create a folder in Google Drive if it doesn't exist"""
+        parent_id = parent_id or self.folder_id
+        key = f"{parent_id}/{folder_name}"
+        
+        # Common case: resolved recently, no API call at all
+        folder_id = self.folder_cache.get(key)
+        if folder_id:
+            return folder_id
+        
+        # Concurrent callers for the same folder share one in-flight request
+        inflight = self._inflight_folders.setdefault(asyncio.get_running_loop(), {})
+        task = inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._resolve_folder(folder_name, parent_id, key))
+            inflight[key] = task
+            task.add_done_callback(lambda _: inflight.pop(key, None))
+        return await asyncio.shield(task)
+    
+    async def _resolve_folder(self, folder_name: str, parent_id: str, key: str) -> Optional[str]:
         try:
+            if not await self._ensure_backend():
+                return None
+            return await self._run_blocking(self._find_or_create_folder, folder_name, parent_id, key)
+        except Exception as e:
+            logger.error("Error creating folder: %s", e)
+            return None
+    
+    def _find_or_create_folder(self, folder_name: str, parent_id: str, key: str) -> Optional[str]:
+        """Look up a folder by name under parent_id, creating it if missing (blocking)"""
+        # Serialise per folder across threads/event loops, then re-check the cache
+        with self._folder_locks_lock:
+            lock = self._folder_locks.setdefault(key, threading.Lock())
+        with lock:
+            folder_id = self.folder_cache.get(key)
+            if folder_id:
+                return folder_id
+            
             # Check if folder already exists
-            query = f"name='{folder_name}' and mimeType='application/vnd.google-apps.folder' and '{self.folder_id}' in parents and trashed=false"
-            results = self.service.files().list(q=query, spaces='drive', fields='files(id, name)').execute()
-            files = results.get('files', [])
-            
-            if files:
-                print(f"Folder '{folder_name}' already exists")
-                return files[0]['id']
-            
-            # Create new folder
-            folder_metadata = {
-                'name': folder_name,
-                'mimeType': 'application/vnd.google-apps.folder',
-                'parents': [self.folder_id]
-            }
+            folder_id = self._call(self.backend.find_folder, folder_name, parent_id)
             
-            folder = self.service.files().create(body=folder_metadata, fields='id').execute()
-            print(f"Created folder '{folder_name}' with ID: {folder.get('id')}")
-            return folder.get('id')
+            if folder_id:
+                logger.debug("Folder %r already exists", folder_name)
+            else:
+                # Create new folder
+                # Not retried: a create whose reply was lost would leave a duplicate folder
+                folder_id = self._call(self.backend.create_folder, folder_name, parent_id, attempts=1)
+                logger.info("Created folder %r with ID %s", folder_name, folder_id)
             
-        except Exception as e:
-            print(f"Error creating folder: {e}")
-            return None
+            self.folder_cache.set(key, folder_id)
+            return folder_id
+    
+    async def resolve_shard_folder(self, when: Optional[datetime] = None) -> str:
+        """Folder for uploads made at `when`: root/YYYY-MM[/YYYY-MM-DD] depending on shard_by"""
+        if not self.shard_by:
+            return self.folder_id
+        when = when or datetime.now()
+        
+        folder_id = await self.create_folder_if_not_exists(when.strftime('%Y-%m'), self.folder_id)
+        if folder_id and self.shard_by == 'day':
+            folder_id = await self.create_folder_if_not_exists(when.strftime('%Y-%m-%d'), folder_id)
+        # Fall back to the root folder rather than failing the upload
+        return folder_id or self.folder_id
+    
+    async def iter_file_pages(self, folder_id: str = None, page_size: Optional[int] = None,
+                              fields: str = 'id, name, createdTime, webViewLink',
+                              modified_after=None, order_by: Optional[str] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Stream a folder listing page by page, fetching the next page while the caller works
+        
+        fields is projected into files(...) so only the needed metadata is sent.
+        modified_after (datetime or RFC 3339 string) restricts the listing to
+        files changed since the last sync; results are then ordered by modifiedTime.
+        """
+        if not folder_id:
+            folder_id = self.folder_id
+        if not await self._ensure_backend():
+            return
+        
+        if modified_after:
+            if isinstance(modified_after, datetime):
+                modified_after = modified_after.isoformat()
+            order_by = order_by or 'modifiedTime'
+        
+        list_page = functools.partial(
+            self.backend.list_page, folder_id, page_size or self.list_page_size, fields,
+            modified_after=modified_after, order_by=order_by
+        )
+        fetch_page = functools.partial(self._call, list_page)
+        
+        pending = asyncio.ensure_future(self._run_blocking(fetch_page, None))
+        try:
+            while pending is not None:
+                page = await pending
+                next_token = page.get('nextPageToken')
+                # Prefetch before handing this page to the caller
+                pending = asyncio.ensure_future(self._run_blocking(fetch_page, next_token)) if next_token else None
+                yield page.get('files', [])
+        finally:
+            if pending is not None:
+                pending.cancel()
+    
+    async def iter_files(self, folder_id: str = None, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """Stream every file in a folder (see iter_file_pages for options)"""
+        async for page in self.iter_file_pages(folder_id, **kwargs):
+            for file in page:
+                yield file
+    
+    @classmethod
+    def _is_retryable(cls, exception) -> bool:
+        status = cls._error_status(exception)
+        if status is not None:
+            if status == 403:
+                # Drive reports per-user rate limiting as 403
+                return 'rateLimitExceeded' in str(exception) or 'userRateLimitExceeded' in str(exception)
+            return status == 429 or status >= 500
+        return isinstance(exception, (ConnectionError, TimeoutError, OSError))
+    
+    async def batch_update(self, operations: List[Dict[str, Any]],
+                           max_attempts: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Apply many metadata operations using Drive HTTP batch requests
+        
+        Each operation is a dict with 'action' ('update', 'move', 'trash' or
+        'delete') and 'file_id', plus 'body' for update, 'parent_id' (and
+        optionally 'remove_parents') for move, and optional 'fields'.
+        Operations are grouped batch_size per request; only items that fail
+        with a retryable error are resent, with exponential backoff.
+        Returns one result per operation, in order.
+        """
+        max_attempts = max_attempts or self.batch_max_attempts
+        results = [
+            {'file_id': op.get('file_id'), 'action': op.get('action'), 'success': False,
+             'response': None, 'error': None, 'attempts': 0}
+            for op in operations
+        ]
+        if not operations:
+            return results
+        if not await self._ensure_backend():
+            for result in results:
+                result['error'] = 'Google Drive authentication failed'
+            return results
+        
+        pending = list(range(len(operations)))
+        for attempt in range(1, max_attempts + 1):
+            retry = []
+            for start in range(0, len(pending), self.batch_size):
+                chunk = [(i, operations[i]) for i in pending[start:start + self.batch_size]]
+                try:
+                    outcomes = await self._run_blocking(self.backend.execute_batch, chunk)
+                except Exception as e:
+                    # The whole batch request failed; every item in it is retryable
+                    outcomes = {i: (None, e) for i, _ in chunk}
+                
+                for i, _ in chunk:
+                    response, exception = outcomes.get(i, (None, RuntimeError('No response in batch')))
+                    result = results[i]
+                    result['attempts'] = attempt
+                    if exception is None:
+                        result.update(success=True, response=response, error=None)
+                    else:
+                        result['error'] = str(exception)
+                        if self._is_retryable(exception):
+                            retry.append(i)
+            
+            if not retry or attempt == max_attempts:
+                break
+            logger.warning("Retrying %d failed Drive batch item(s) (attempt %d)", len(retry), attempt + 1)
+            await asyncio.sleep(self.batch_retry_delay * (2 ** (attempt - 1)) * (0.5 + random.random()))
+            pending = retry
+        
+        return results
     
     async def list_files(self, folder_id: str = None) -> list:
         """List files in a Google Drive folder"""
         try:
-            if not folder_id:
-                folder_id = self.folder_id
-            
-            query = f"'{folder_id}' in parents and trashed=false"
-            results = self.service.files().list(
-                q=query,
-                spaces='drive',
-                fields='files(id, name, createdTime, webViewLink)'
-            ).execute()
-            
-            return results.get('files', [])
+            return [file async for file in self.iter_files(folder_id)]
             
         except Exception as e:
-            print(f"Error listing files: {e}")
+            logger.error("Error listing files: %s", e)
             return []
 
-
 # Global instance
 drive_manager = GoogleDriveManager()
 
 
-async def upload_resume_to_drive(file_path: str, filename: str, email: str) -> Optional[Dict[str, Any]]:
+async def upload_resume_to_drive(file_path: str, filename: str, email: str,
+                                 sha256: Optional[str] = None) -> Optional[Dict[str, Any]]:
     """Upload resume file to Google Drive"""
-    return await drive_manager.upload_file(file_path, filename, email)
+    return await drive_manager.upload_file(file_path, filename, email, sha256)
 
 
-async def send_drive_notification(upload_result: Dict[str, Any]) -> bool:
-    """Send notification about new file upload"""
-    try:
-        from app.utils import send_email
-        
-        notification_config = {
-            'smtp_server': 'smtp.gmail.com',
-            'smtp_port': 587,
-            'sender_email': 'your-email@gmail.com',  # Update with your email
-            'sender_password': 'your-app-password',  # Update with your app password
-            'admin_email': 'notifications@applybooststudio.com'  # Update with notification email
-        }
-        
-        subject = "New Resume Uploaded to Google Drive"
-        message = f"""
-        New resume has been uploaded to Google Drive!
-        
-        User Email: {upload_result['user_email']}
-        File Name: {upload_result['file_name']}
-        Original Filename: {upload_result['original_filename']}
-        Upload Time: {upload_result['created_time']}
-        
-        View in Google Drive: {upload_result['web_view_link']}
-        
-        File ID: {upload_result['file_id']}
-        """
-        
-        return send_email(
-            notification_config,
-            subject,
-            message,
-            notification_config['admin_email']
-        )
-        
-    except Exception as e:
-        print(f"Error sending drive notification: {e}")
-        return False
-
-
-async def process_resume_upload(file_path: str, filename: str, email: str) -> Dict[str, Any]:
-    """Process resume upload to Google Drive and send notifications"""
+async def process_resume_upload(file_path: str, filename: str, email: str,
+                                sha256: Optional[str] = None) -> Dict[str, Any]:
+    """Upload a resume to Google Drive and report the outcome (the lead email goes out from the job queue)"""
     result = {
         'success': False,
         'drive_upload': None,
-        'notification_sent': False,
         'error': None
     }
     
     try:
         # Upload to Google Drive
-        drive_result = await upload_resume_to_drive(file_path, filename, email)
+        drive_result = await upload_resume_to_drive(file_path, filename, email, sha256)
         
         if drive_result:
             result['drive_upload'] = drive_result
             result['success'] = True
-            
-            # Send notification
-            notification_sent = await send_drive_notification(drive_result)
-            result['notification_sent'] = notification_sent
-            
-            print(f"Resume upload processed successfully!")
-            print(f"Drive upload: {result['drive_upload']}")
-            print(f"Notification sent: {result['notification_sent']}")
+            logger.info("Resume upload processed")
         else:
             result['error'] = "Failed to upload to Google Drive"
             
     except Exception as e:
         result['error'] = str(e)
-        print(f"Error processing resume upload: {e}")
+        logger.exception("Error processing resume upload")
     
-    return result 
\ No newline at end of file
+    return result
+
+
+async def process_resume_uploads(uploads: List[Tuple[str, str, str]]) -> List[Dict[str, Any]]:
+    """Process several (file_path, filename, email) uploads concurrently"""
+    return await asyncio.gather(*(
+        process_resume_upload(file_path, filename, email)
+        for file_path, filename, email in uploads
+    ))
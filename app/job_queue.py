@@ -0,0 +1,362 @@
+"""
+Background Job Queue for Apply Boost Studio
+Durable SQLite-backed queue so slow work (SMTP, cleanup) runs outside the request
+"""
+
+import contextlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional
+from config import QUEUE_CONFIG
+from app.metrics import JOB_SECONDS, JOB_WORKERS_BUSY, JOBS
+from app.logs import correlation_id
+from app.profiling import profile_requested
+from app.resilience import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+
+# Registered job handlers, keyed by job kind
+_handlers: Dict[str, Callable[[Dict[str, Any]], None]] = {}
+# Cleanup for jobs given up on (out of attempts), keyed by job kind
+_dead_handlers: Dict[str, Callable[[Dict[str, Any]], None]] = {}
+
+
+def job_handler(kind: str):
+    """Register a function as the handler for a job kind"""
+    def decorator(func):
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+def dead_job_handler(kind: str):
+    """Register a function called with the payload when a job of this kind goes dead"""
+    def decorator(func):
+        _dead_handlers[kind] = func
+        return func
+    return decorator
+
+
+class JobQueue:
+    """Durable job queue stored in a local SQLite database"""
+
+    def __init__(self, db_path: str, max_attempts: int = 5, retry_delay: float = 30,
+                 lease_timeout: float = 300):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.lease_timeout = lease_timeout
+        self._local = threading.local()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    run_at REAL NOT NULL,
+                    lease_expires REAL,
+                    last_error TEXT,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, run_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return a connection owned by the current thread and process"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], delay: float = 0) -> int:
+        """Persist a new job and return its id"""
+        now = time.time()
+        conn = self._connect()
+        cursor = conn.execute(
+            "INSERT INTO jobs (kind, payload, run_at, created_at) VALUES (?, ?, ?, ?)",
+            (kind, json.dumps(payload), now + delay, now)
+        )
+        return cursor.lastrowid
+
+    def claim(self, on_dead: Optional[Callable[[Dict[str, Any]], None]] = None) -> Optional[Dict[str, Any]]:
+        """Lease the next runnable job, or return None if nothing is ready
+
+        A job whose worker died holding it on its last attempt is marked dead
+        instead of being reclaimed; on_dead is called with each such job.
+        """
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # A payload that kills or hangs its worker must not be reclaimed forever
+            expired = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'running' AND lease_expires <= ? AND attempts >= ?",
+                (now, self.max_attempts)
+            ).fetchall()
+            for dead in expired:
+                conn.execute(
+                    "UPDATE jobs SET status = 'dead', lease_expires = NULL, last_error = ? WHERE id = ?",
+                    (f"lease expired on attempt {dead['attempts']}", dead['id'])
+                )
+            row = conn.execute(
+                """
+                SELECT * FROM jobs
+                WHERE (status = 'pending' AND run_at <= ?)
+                   OR (status = 'running' AND lease_expires <= ?)
+                ORDER BY run_at
+                LIMIT 1
+                """,
+                (now, now)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_expires = ? WHERE id = ?",
+                    (now + self.lease_timeout, row['id'])
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        for dead in expired:
+            logger.error("Job %s (%s) is dead: lease expired on attempt %d", dead['id'], dead['kind'],
+                         dead['attempts'])
+            if on_dead is not None:
+                on_dead({'id': dead['id'], 'kind': dead['kind'], 'payload': json.loads(dead['payload']),
+                         'attempts': dead['attempts']})
+        if row is None:
+            return None
+        return {
+            'id': row['id'],
+            'kind': row['kind'],
+            'payload': json.loads(row['payload']),
+            'attempts': row['attempts'] + 1
+        }
+
+    def complete(self, job_id: int):
+        """Remove a job that finished successfully"""
+        self._connect().execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def fail(self, job_id: int, attempts: int, error: str, retry_at: Optional[float] = None) -> bool:
+        """Schedule a retry with exponential backoff, or mark the job dead (returns True if dead)"""
+        conn = self._connect()
+        if attempts >= self.max_attempts:
+            conn.execute(
+                "UPDATE jobs SET status = 'dead', lease_expires = NULL, last_error = ? WHERE id = ?",
+                (error, job_id)
+            )
+            return True
+        if retry_at is None:
+            retry_at = time.time() + self.retry_delay * (2 ** (attempts - 1))
+        conn.execute(
+            "UPDATE jobs SET status = 'pending', run_at = ?, lease_expires = NULL, last_error = ? WHERE id = ?",
+            (retry_at, error, job_id)
+        )
+        return False
+
+    def postpone(self, job_id: int, delay: float, error: str):
+        """Put a claimed job back without using up an attempt"""
+        self._connect().execute(
+            "UPDATE jobs SET status = 'pending', attempts = attempts - 1, run_at = ?, lease_expires = NULL, "
+            "last_error = ? WHERE id = ?",
+            (time.time() + delay, error, job_id)
+        )
+
+    def depth(self) -> int:
+        """Number of jobs waiting or running"""
+        row = self._connect().execute(
+            "SELECT COUNT(*) FROM jobs WHERE status IN ('pending', 'running')"
+        ).fetchone()
+        return row[0]
+
+    def iter_jobs(self, kind: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Yield stored jobs (of one kind, if given) oldest first, whatever their status"""
+        query = "SELECT * FROM jobs"
+        params = ()
+        if kind is not None:
+            query += " WHERE kind = ?"
+            params = (kind,)
+        for row in self._connect().execute(query + " ORDER BY id", params):
+            job = dict(row)
+            job['payload'] = json.loads(job['payload'])
+            yield job
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Return the stored state of a job"""
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        return job
+
+
+class JobWorkerPool:
+    """Pool of threads draining a JobQueue"""
+
+    def __init__(self, queue: JobQueue, workers: int = 2, poll_interval: float = 1.0, app=None):
+        self.queue = queue
+        self.app = app
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start worker threads in this process (no-op if already running)"""
+        with self._lock:
+            # Threads do not survive fork, so a forked worker starts its own
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stopping.clear()
+            self._threads = []
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f'job-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: float = 5):
+        """Stop worker threads after their current job"""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._pid = None
+
+    def notify(self):
+        """Wake idle workers because a job was just enqueued"""
+        self._wakeup.set()
+
+    def running_threads(self) -> int:
+        """Worker threads alive in this process"""
+        if self._pid != os.getpid():
+            return 0
+        return sum(1 for thread in self._threads if thread.is_alive())
+
+    def run_pending(self) -> int:
+        """Run every job that is ready right now in the calling thread"""
+        count = 0
+        while self.run_once():
+            count += 1
+        return count
+
+    def run_once(self) -> bool:
+        """Claim and run a single job; return False if the queue was empty"""
+        job = self.queue.claim(on_dead=self._bury)
+        if job is None:
+            return False
+
+        handler = _handlers.get(job['kind'])
+        # Log lines of the job carry the ID of the request that queued it
+        token = correlation_id.set(job['payload'].get('request_id') or f"job-{job['id']}")
+        # Jobs queued by a profiled request are profiled too
+        profiles = self.app.extensions.get('profiles') if self.app is not None and job['payload'].get('profile') else None
+        capture = (profiles.capture('job', job['kind'], 'queued by profiled request', job['payload'].get('request_id'))
+                   if profiles is not None else contextlib.nullcontext())
+        JOB_WORKERS_BUSY.inc()
+        start = time.perf_counter()
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job kind '{job['kind']}'")
+            with capture:
+                if self.app is not None:
+                    # Handlers may use current_app (config, extensions)
+                    with self.app.app_context():
+                        handler(job['payload'])
+                else:
+                    handler(job['payload'])
+        except CircuitOpenError as e:
+            # The dependency is known to be down; wait for the breaker instead of burning attempts
+            logger.warning("Job %s (%s) postponed: %s", job['id'], job['kind'], e)
+            self.queue.postpone(job['id'], max(e.retry_after, self.poll_interval), str(e))
+            JOBS.inc(kind=job['kind'], outcome='postponed')
+        except Exception as e:
+            logger.error("Job %s (%s) failed on attempt %d: %s", job['id'], job['kind'], job['attempts'], e)
+            if self.queue.fail(job['id'], job['attempts'], str(e)):
+                self._bury(job)
+            JOBS.inc(kind=job['kind'], outcome='failed')
+        else:
+            self.queue.complete(job['id'])
+            JOBS.inc(kind=job['kind'], outcome='completed')
+        finally:
+            JOB_WORKERS_BUSY.dec()
+            JOB_SECONDS.observe(time.perf_counter() - start, kind=job['kind'])
+            correlation_id.reset(token)
+        return True
+
+    def _bury(self, job: Dict[str, Any]):
+        """Run the kind's dead-job cleanup, e.g. releasing files only the job referenced"""
+        JOBS.inc(kind=job['kind'], outcome='dead')
+        cleanup = _dead_handlers.get(job['kind'])
+        if cleanup is None:
+            return
+        try:
+            if self.app is not None:
+                with self.app.app_context():
+                    cleanup(job['payload'])
+            else:
+                cleanup(job['payload'])
+        except Exception:
+            logger.exception("Cleanup for dead job %s (%s) failed", job['id'], job['kind'])
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                if self.run_once():
+                    continue
+            except Exception:
+                logger.exception("Job worker error")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+
+def init_job_queue(app):
+    """Attach the job queue and worker pool to the app and start workers if enabled"""
+    queue = JobQueue(
+        app.config['JOB_QUEUE_PATH'],
+        max_attempts=QUEUE_CONFIG['max_attempts'],
+        retry_delay=QUEUE_CONFIG['retry_delay'],
+        lease_timeout=QUEUE_CONFIG['lease_timeout']
+    )
+    pool = JobWorkerPool(queue, QUEUE_CONFIG['workers'], QUEUE_CONFIG['poll_interval'], app=app)
+    app.extensions['job_queue'] = queue
+    app.extensions['job_workers'] = pool
+
+    if app.config['JOB_WORKERS_AUTOSTART']:
+        pool.start()
+    return queue
+
+
+def enqueue_job(app, kind: str, payload: Dict[str, Any]) -> int:
+    """Persist a job for the app's queue and wake its workers"""
+    request_id = correlation_id.get()
+    if request_id:
+        payload = dict(payload, request_id=request_id)
+    if profile_requested.get():
+        payload = dict(payload, profile=True)
+    job_id = app.extensions['job_queue'].enqueue(kind, payload)
+    pool = app.extensions['job_workers']
+    if app.config['JOB_WORKERS_AUTOSTART']:
+        pool.start()
+    pool.notify()
+    return job_id
@@ -0,0 +1,58 @@
+"""
+Lazy Imports for Apply Boost Studio
+Heavy libraries (the Google API client, the email.mime stack) are only needed
+by the code paths that send mail or talk to Drive. A LazyModule stands in for
+such a module and imports it on first attribute access, so create_app() and
+worker boot do not pay for them
+"""
+
+import importlib
+import sys
+
+
+class LazyModule:
+    """Module proxy that imports the real module the first time it is used"""
+
+    def __init__(self, name: str):
+        self.__dict__['_lazy_name'] = name
+        self.__dict__['_lazy_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            # The import lock makes concurrent first uses safe
+            module = importlib.import_module(self.__dict__['_lazy_name'])
+            self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        # Monkeypatching the proxy patches the module itself
+        setattr(self._load(), attr, value)
+
+    def __delattr__(self, attr):
+        delattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_lazy_module'] is not None else 'not loaded'
+        return f"<lazy module '{self.__dict__['_lazy_name']}' ({state})>"
+
+
+def lazy_import(name: str):
+    """The module if it is already imported, otherwise a LazyModule for it"""
+    return sys.modules.get(name) or LazyModule(name)
+
+
+def loaded_attr(module_name: str, attr: str):
+    """module.attr if the module has been imported, else None (never triggers an import)
+
+    Useful for isinstance checks: an exception of a library's type cannot exist
+    before that library is loaded.
+    """
+    module = sys.modules.get(module_name)
+    return getattr(module, attr, None) if module is not None else None
@@ -0,0 +1,243 @@
+"""
+Structured Logging for Apply Boost Studio
+Log calls only put a record on an in-memory queue; a background listener
+thread formats it as one JSON line and writes it to stdout. Records carry the
+request's correlation ID, secrets are redacted before they are queued, and
+high-volume debug lines are sampled. When the queue is full, records are
+dropped (and counted) rather than blocking the request
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from logging.handlers import QueueHandler, QueueListener
+from typing import Iterable, Optional
+from flask import g, request
+from config import LOGGING_CONFIG
+from app.metrics import LOG_RECORDS_DROPPED
+
+REDACTED = '[REDACTED]'
+# Accepted X-Request-ID values; anything else is replaced with a fresh ID
+REQUEST_ID_PATTERN = re.compile(r'[A-Za-z0-9._-]{1,64}')
+
+# Correlation ID of the request (or job) the current thread is working on
+correlation_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('correlation_id', default=None)
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamp records with the correlation ID (runs on the logging thread's caller)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, 'request_id'):
+            record.request_id = correlation_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of DEBUG records; other levels always pass"""
+
+    def __init__(self, rate: float = 1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+
+class RedactingFilter(logging.Filter):
+    """Replace known secret values and secret-looking extra fields with [REDACTED]"""
+
+    def __init__(self, secrets: Iterable[str] = (), keys: Iterable[str] = ()):
+        super().__init__()
+        self.secrets = [s for s in secrets if s and len(s) >= 4]
+        self.keys = tuple(k.lower() for k in keys)
+
+    def _redact_text(self, text: str) -> str:
+        for secret in self.secrets:
+            if secret in text:
+                text = text.replace(secret, REDACTED)
+        return text
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.secrets:
+            message = record.getMessage()
+            redacted = self._redact_text(message)
+            if redacted != message:
+                record.msg, record.args = redacted, None
+        for name, value in list(vars(record).items()):
+            if name in _RECORD_ATTRIBUTES:
+                continue
+            if any(key in name.lower() for key in self.keys):
+                setattr(record, name, REDACTED)
+            elif isinstance(value, str) and self.secrets:
+                setattr(record, name, self._redact_text(value))
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request_id and extra fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+            'pid': record.process,
+            'thread': record.threadName
+        }
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES and name not in entry:
+                entry[name] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Readable single-line output for development"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)-7s [%(request_id)s] %(name)s: %(message)s')
+
+
+class _DrainingListener(QueueListener):
+    """QueueListener whose stop() waits for room instead of failing on a full queue"""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that never waits: full queue -> drop, and a forked child gets its own listener"""
+
+    def __init__(self, target: logging.Handler, maxsize: int = 10000):
+        self.target = target
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._pid = None
+        self._listener = None
+        self._start_lock = threading.Lock()
+        super().__init__(queue.Queue(maxsize))
+        self._start_listener()
+
+    def _start_listener(self):
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # Queue locks inherited across fork may be held by a thread that no longer exists
+            if self._pid is not None:
+                self.queue = queue.Queue(self.maxsize)
+            self._listener = _DrainingListener(self.queue, self.target, respect_handler_level=True)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Interpolate and render the traceback now; extra fields are kept for the formatter
+        record = logging.makeLogRecord(vars(record))
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            LOG_RECORDS_DROPPED.inc()
+
+    def emit(self, record: logging.LogRecord):
+        if self._pid != os.getpid():
+            self._start_listener()
+        super().emit(record)
+
+    def stop(self):
+        """Write everything still queued (called at exit)"""
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._pid = None
+
+
+_handler: Optional[NonBlockingQueueHandler] = None
+
+
+def configure_logging(level: Optional[str] = None, fmt: Optional[str] = None,
+                      stream=None) -> NonBlockingQueueHandler:
+    """Route the root logger through the background writer (idempotent per process)"""
+    global _handler
+    root = logging.getLogger()
+    if _handler is not None:
+        root.removeHandler(_handler)
+        _handler.stop()
+
+    target = logging.StreamHandler(stream or sys.stdout)
+    target.setFormatter(TextFormatter() if (fmt or LOGGING_CONFIG['format']) == 'text' else JsonFormatter())
+    handler = NonBlockingQueueHandler(target, LOGGING_CONFIG['queue_size'])
+    handler.addFilter(RequestContextFilter())
+    handler.addFilter(SamplingFilter(LOGGING_CONFIG['debug_sample_rate']))
+    handler.addFilter(RedactingFilter(
+        secrets=(os.environ.get(name, '') for name in LOGGING_CONFIG['secret_env']),
+        keys=LOGGING_CONFIG['redact_keys']
+    ))
+    root.addHandler(handler)
+    root.setLevel(level or LOGGING_CONFIG['level'])
+    _handler = handler
+    return handler
+
+
+@atexit.register
+def _flush_at_exit():
+    if _handler is not None:
+        _handler.stop()
+
+
+def _assign_request_id():
+    # Reuse the proxy's ID (nginx $request_id) so logs line up end to end, unless it
+    # is too long or could forge log fields
+    request_id = request.headers.get('X-Request-ID', '')
+    if not REQUEST_ID_PATTERN.fullmatch(request_id):
+        request_id = uuid.uuid4().hex
+    g.request_id = request_id
+    g.request_id_token = correlation_id.set(request_id)
+
+
+def _return_request_id(response):
+    request_id = g.get('request_id')
+    if request_id:
+        response.headers['X-Request-ID'] = request_id
+    return response
+
+
+def _clear_request_id(exc=None):
+    token = g.pop('request_id_token', None)
+    if token is not None:
+        correlation_id.reset(token)
+
+
+def init_logging(app):
+    """Configure structured logging and give each request a correlation ID"""
+    if _handler is None:
+        configure_logging()
+    app.before_request(_assign_request_id)
+    app.after_request(_return_request_id)
+    app.teardown_request(_clear_request_id)
@@ -0,0 +1,443 @@
+"""
+Metrics for Apply Boost Studio
+Counters, gauges and histograms are kept in process memory and exported at
+/metrics in the Prometheus text format. With a metrics directory configured
+(gunicorn.conf.py sets one), each process also writes its values to its own
+file there and /metrics sums every file, so the numbers cover all workers,
+including ones that have been recycled
+"""
+
+import atexit
+import fcntl
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from flask import Response, current_app, request, g
+from config import METRICS_CONFIG
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+ARCHIVE_FILE = 'archive.json'
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, registry: 'Registry', name: str, help: str, labelnames: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        registry.register(self)
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, Tuple[str, ...]]:
+        return self.name, tuple(str(labels[name]) for name in self.labelnames)
+
+
+class Counter(_Metric):
+    """Monotonic total, summed over every process that ever ran"""
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        self.registry.add('counters', self._key(labels), amount)
+
+
+class Gauge(_Metric):
+    """Current value per process, summed over the processes still running"""
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        self.registry.put('gauges', self._key(labels), value)
+
+    def inc(self, amount: float = 1, **labels):
+        self.registry.add('gauges', self._key(labels), amount)
+
+    def dec(self, amount: float = 1, **labels):
+        self.registry.add('gauges', self._key(labels), -amount)
+
+
+class Histogram(_Metric):
+    """Bucketed observations (seconds or bytes) with their sum and count"""
+    kind = 'histogram'
+
+    def __init__(self, registry: 'Registry', name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(registry, name, help, labelnames)
+
+    def observe(self, value: float, **labels):
+        self.registry.observe(self._key(labels), self.buckets, value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe how long the block took, whether or not it raised"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+
+class Registry:
+    """Process-local metric values, optionally mirrored to a shared directory"""
+
+    def __init__(self, directory: Optional[str] = None, flush_interval: float = 1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.metrics: Dict[str, _Metric] = {}
+        self._samplers: Dict[str, Callable[[], None]] = {}
+        self._lock = threading.Lock()
+        self._flusher_pid = None
+        self._reset_values()
+
+    def _reset_values(self):
+        self._values = {'counters': {}, 'gauges': {}, 'histograms': {}}
+        self._pid = os.getpid()
+
+    def register(self, metric: _Metric):
+        self.metrics[metric.name] = metric
+
+    def add_sampler(self, name: str, sampler: Callable[[], None]):
+        """Run sampler (which sets gauges) before every flush and scrape; replaces one of the same name"""
+        self._samplers[name] = sampler
+
+    def configure(self, directory: Optional[str], flush_interval: Optional[float] = None):
+        self.directory = directory or None
+        if flush_interval is not None:
+            self.flush_interval = flush_interval
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    # Recording
+
+    def _check_process(self):
+        # A forked worker starts from zero; the parent's values are in the parent's file
+        if self._pid != os.getpid():
+            self._reset_values()
+        if self.directory and self._flusher_pid != os.getpid():
+            self._start_flusher()
+
+    def add(self, section: str, key, amount: float):
+        with self._lock:
+            self._check_process()
+            values = self._values[section]
+            values[key] = values.get(key, 0) + amount
+
+    def put(self, section: str, key, value: float):
+        with self._lock:
+            self._check_process()
+            self._values[section][key] = value
+
+    def observe(self, key, buckets: Tuple[float, ...], value: float):
+        with self._lock:
+            self._check_process()
+            state = self._values['histograms'].get(key)
+            if state is None:
+                # Per-bucket counts (+Inf last), then sum and count
+                state = self._values['histograms'][key] = [0] * (len(buckets) + 1) + [0.0, 0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    break
+            else:
+                i = len(buckets)
+            state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    # Sharing between processes
+
+    def _sample(self):
+        for sampler in list(self._samplers.values()):
+            try:
+                sampler()
+            except Exception as e:
+                logger.warning("Metrics sampler failed: %s", e)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """This process's values with JSON-safe keys"""
+        self._sample()
+        with self._lock:
+            self._check_process()
+            return {
+                section: {json.dumps([name, list(labels)]): (list(value) if section == 'histograms' else value)
+                          for (name, labels), value in values.items()}
+                for section, values in self._values.items()
+            }
+
+    def _path(self, pid) -> str:
+        return os.path.join(self.directory, f'metrics_{pid}.json')
+
+    def flush(self):
+        """Write this process's values to its file in the metrics directory"""
+        if not self.directory:
+            return
+        data = self.snapshot()
+        path = self._path(os.getpid())
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def _start_flusher(self):
+        self._flusher_pid = os.getpid()
+        thread = threading.Thread(target=self._flush_loop, name='metrics-flusher', daemon=True)
+        thread.start()
+
+    def _flush_loop(self):
+        pid = os.getpid()
+        while self._flusher_pid == pid:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning("Metrics flush failed: %s", e)
+
+    @contextmanager
+    def _directory_lock(self):
+        with open(os.path.join(self.directory, '.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def mark_process_dead(self, pid: int):
+        """Fold an exited worker's counters and histograms into the archive; drop its gauges"""
+        if not self.directory:
+            return
+        with self._directory_lock():
+            data = _read_json(self._path(pid))
+            if data is None:
+                return
+            archive = _read_json(os.path.join(self.directory, ARCHIVE_FILE)) or _empty()
+            _merge(archive, data, gauges=False)
+            archive_path = os.path.join(self.directory, ARCHIVE_FILE)
+            with open(f"{archive_path}.tmp", 'w') as f:
+                json.dump(archive, f)
+            os.replace(f"{archive_path}.tmp", archive_path)
+            os.remove(self._path(pid))
+
+    def clear_directory(self):
+        """Remove values left by an earlier run (call once, before workers start)"""
+        if not self.directory:
+            return
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            os.remove(path)
+
+    def collect(self) -> Dict[str, Dict[str, Any]]:
+        """Values summed over this process and every file in the metrics directory"""
+        merged = _empty()
+        _merge(merged, self.snapshot(), gauges=True)
+        if not self.directory:
+            return merged
+        with self._directory_lock():
+            paths = glob.glob(os.path.join(self.directory, '*.json'))
+            files = [(path, _read_json(path)) for path in paths]
+        for path, data in files:
+            if data is None:
+                continue
+            name = os.path.basename(path)
+            if name == ARCHIVE_FILE:
+                _merge(merged, data, gauges=False)
+                continue
+            pid = int(name[len('metrics_'):-len('.json')])
+            if pid != os.getpid():
+                _merge(merged, data, gauges=_process_alive(pid))
+        return merged
+
+    def render(self, extra: Optional[List[Tuple[str, str, str, float]]] = None) -> str:
+        """Prometheus text exposition of the collected values"""
+        values = self.collect()
+        samples: Dict[str, List[Tuple[Dict[str, str], Any]]] = {}
+        for section in ('counters', 'gauges', 'histograms'):
+            for key, value in values[section].items():
+                name, labelvalues = json.loads(key)
+                metric = self.metrics.get(name)
+                if metric is not None:
+                    samples.setdefault(name, []).append((dict(zip(metric.labelnames, labelvalues)), value))
+
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            entries = sorted(samples.get(name, []), key=lambda entry: sorted(entry[0].items()))
+            if not entries and not metric.labelnames and metric.kind != 'histogram':
+                entries = [({}, 0)]
+            for labels, value in entries:
+                if metric.kind != 'histogram':
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                    continue
+                cumulative = 0
+                bounds = [_number(b) for b in metric.buckets] + ['+Inf']
+                for bound, count in zip(bounds, value[:-2]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(dict(labels, le=bound))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(value[-2])}")
+                lines.append(f"{name}_count{_labels(labels)} {value[-1]}")
+
+        for name, kind, help, value in extra or []:
+            lines.extend([f"# HELP {name} {help}", f"# TYPE {name} {kind}", f"{name} {_number(value)}"])
+        return '\n'.join(lines) + '\n'
+
+
+def _empty() -> Dict[str, Dict[str, Any]]:
+    return {'counters': {}, 'gauges': {}, 'histograms': {}}
+
+
+def _merge(into: Dict[str, Dict[str, Any]], data: Dict[str, Dict[str, Any]], gauges: bool):
+    for key, value in data.get('counters', {}).items():
+        into['counters'][key] = into['counters'].get(key, 0) + value
+    if gauges:
+        for key, value in data.get('gauges', {}).items():
+            into['gauges'][key] = into['gauges'].get(key, 0) + value
+    for key, value in data.get('histograms', {}).items():
+        existing = into['histograms'].get(key)
+        into['histograms'][key] = list(value) if existing is None else [a + b for a, b in zip(existing, value)]
+
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+# Process-wide registry and the metrics the app records
+registry = Registry()
+
+REQUEST_SECONDS = Histogram(
+    registry, 'ajfm_http_request_duration_seconds', 'Request latency by route',
+    ['route', 'method', 'status']
+)
+STAGE_SECONDS = Histogram(
+    registry, 'ajfm_submission_stage_duration_seconds',
+    'Time spent in each stage of handling a submission (upload_save, mime_build, smtp_connect, '
+    'smtp_starttls, smtp_login, smtp_send, file_delete, drive_upload)',
+    ['stage', 'outcome'], buckets=STAGE_BUCKETS
+)
+SUBMISSIONS = Counter(registry, 'ajfm_form_submissions_total', 'Form submissions by result', ['outcome'])
+UPLOAD_BYTES = Counter(registry, 'ajfm_upload_bytes_total', 'Resume bytes received and stored')
+UPLOADS = Counter(registry, 'ajfm_uploads_total', 'Resumes received and stored')
+JOBS = Counter(registry, 'ajfm_jobs_total', 'Background jobs run by kind and result', ['kind', 'outcome'])
+JOB_SECONDS = Histogram(registry, 'ajfm_job_duration_seconds', 'Background job run time', ['kind'],
+                        buckets=STAGE_BUCKETS)
+JOB_WORKERS = Gauge(registry, 'ajfm_job_workers', 'Job worker threads running')
+JOB_WORKERS_BUSY = Gauge(registry, 'ajfm_job_workers_busy', 'Job worker threads running a job')
+SMTP_CONNECTIONS = Gauge(registry, 'ajfm_smtp_pool_connections', 'Pooled SMTP connections by state', ['state'])
+SMTP_POOL_SIZE = Gauge(registry, 'ajfm_smtp_pool_max_connections', 'SMTP connection limit across pools')
+DEPENDENCY_CALLS = Counter(registry, 'ajfm_dependency_calls_total',
+                           'Calls to SMTP and Drive by result (ok, retried, failed, rejected by an open circuit)',
+                           ['dependency', 'outcome'])
+CIRCUIT_OPEN = Gauge(registry, 'ajfm_circuit_open', 'Processes whose circuit breaker for the dependency is open',
+                     ['dependency'])
+ADMISSIONS = Counter(registry, 'ajfm_admission_total',
+                     'API requests by admission result (admitted, queued then admitted, shed with 503)', ['outcome'])
+RATE_LIMITED = Counter(registry, 'ajfm_rate_limited_total', 'API requests refused with 429 by the per-IP rate limit',
+                       ['endpoint'])
+LOG_RECORDS_DROPPED = Counter(registry, 'ajfm_log_records_dropped_total', 'Log records dropped because the log queue was full')
+
+
+@contextmanager
+def stage(name: str):
+    """Time one submission stage; failures are recorded with outcome="error\""""
+    start = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield
+        outcome = 'ok'
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=name, outcome=outcome)
+
+
+def _sample_smtp_pools():
+    from app.smtp_pool import pool_stats
+    stats = pool_stats()
+    SMTP_CONNECTIONS.set(stats['in_use'], state='in_use')
+    SMTP_CONNECTIONS.set(stats['idle'], state='idle')
+    SMTP_POOL_SIZE.set(stats['max_size'])
+
+
+registry.add_sampler('smtp_pools', _sample_smtp_pools)
+
+
+def _start_timer():
+    g.metrics_start = time.perf_counter()
+
+
+def _observe_request(response):
+    start = g.pop('metrics_start', None)
+    if start is not None:
+        rule = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        REQUEST_SECONDS.observe(time.perf_counter() - start, route=rule,
+                                method=request.method, status=response.status_code)
+    return response
+
+
+def metrics_view():
+    """Prometheus scrape endpoint"""
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return Response('Unauthorized\n', status=401, mimetype='text/plain')
+
+    extra = []
+    queue = current_app.extensions.get('job_queue')
+    if queue is not None:
+        # One shared SQLite queue, so its depth is read once rather than summed
+        extra.append(('ajfm_job_queue_depth', 'gauge', 'Jobs waiting or running', queue.depth()))
+    return Response(registry.render(extra), mimetype='text/plain; version=0.0.4')
+
+
+def init_metrics(app) -> Registry:
+    """Time every request and expose /metrics"""
+    registry.configure(app.config['METRICS_DIR'], METRICS_CONFIG['flush_interval'])
+    app.extensions['metrics'] = registry
+    pool = app.extensions['job_workers']
+    registry.add_sampler('job_workers', lambda: JOB_WORKERS.set(pool.running_threads()))
+    app.before_request(_start_timer)
+    app.after_request(_observe_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+    return registry
+
+
+@atexit.register
+def _flush_at_exit():
+    # Counts from a worker's last second survive its exit
+    if registry.directory and registry._pid == os.getpid():
+        try:
+            registry.flush()
+        except Exception:
+            pass
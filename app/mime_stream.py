@@ -0,0 +1,96 @@
+"""
+Streaming MIME Messages for Apply Boost Studio
+Builds multipart emails whose attachments are base64-encoded chunk by chunk
+while they are written to the SMTP socket, so a send never holds the whole
+resume (or its encoded copy) in memory.
+"""
+
+import base64
+import os
+import re
+from email.utils import formatdate, make_msgid
+from typing import Iterator, List, Tuple
+from app.lazy import lazy_import
+
+# The MIME classes and header policy load on the first email, not at boot
+mime_text = lazy_import('email.mime.text')
+email_policy = lazy_import('email.policy')
+
+# 57 raw bytes encode to exactly one 76 character base64 line
+ENCODE_CHUNK_SIZE = 57 * 1024
+
+_LEADING_DOT = re.compile(rb'^\.', re.MULTILINE)
+
+
+def _header_block(headers: List[Tuple[str, str]]) -> bytes:
+    """Fold and encode headers, ending with the blank separator line"""
+    lines = [email_policy.SMTP.header_factory(name, value).fold(policy=email_policy.SMTP) for name, value in headers]
+    return (''.join(lines) + '\r\n').encode('ascii')
+
+
+class StreamingEmail:
+    """multipart/mixed email with a plain-text body and streamed file attachments"""
+
+    def __init__(self, sender: str, recipient: str, subject: str, body: str):
+        self.sender = sender
+        self.recipient = recipient
+        self.subject = subject
+        self.body = body
+        self.attachments: List[Tuple[str, str, str]] = []
+        self.boundary = '===============' + make_msgid().strip('<>').split('@')[0].replace('.', '')
+        self.message_id = make_msgid()
+        self.date = formatdate(localtime=True)
+
+    def attach_file(self, path: str, filename: str, content_type: str = 'application/octet-stream'):
+        """Attach a file by path; it is only read while the message is sent"""
+        if not os.path.isfile(path):
+            raise FileNotFoundError(path)
+        self.attachments.append((path, filename, content_type))
+
+    def iter_chunks(self, chunk_size: int = ENCODE_CHUNK_SIZE) -> Iterator[bytes]:
+        """Yield the encoded message in CRLF-terminated pieces of bounded size"""
+        # Keep base64 lines whole so every chunk ends on a line boundary
+        chunk_size = max(57, chunk_size - chunk_size % 57)
+        delimiter = f'--{self.boundary}\r\n'.encode('ascii')
+
+        yield _header_block([
+            ('From', self.sender),
+            ('To', self.recipient),
+            ('Subject', self.subject),
+            ('Date', self.date),
+            ('Message-ID', self.message_id),
+            ('MIME-Version', '1.0'),
+            ('Content-Type', f'multipart/mixed; boundary="{self.boundary}"')
+        ])
+
+        yield delimiter
+        yield mime_text.MIMEText(self.body, 'plain', 'utf-8').as_bytes(policy=email_policy.SMTP) + b'\r\n'
+
+        for path, filename, content_type in self.attachments:
+            yield delimiter
+            yield _header_block([
+                ('Content-Type', content_type),
+                ('MIME-Version', '1.0'),
+                ('Content-Transfer-Encoding', 'base64'),
+                ('Content-Disposition', f'attachment; filename="{filename}"')
+            ])
+            with open(path, 'rb') as attachment:
+                while True:
+                    data = attachment.read(chunk_size)
+                    if not data:
+                        break
+                    yield base64.encodebytes(data).replace(b'\n', b'\r\n')
+
+        yield f'--{self.boundary}--\r\n'.encode('ascii')
+
+    def as_bytes(self) -> bytes:
+        """Whole message in memory (for small messages and tests)"""
+        return b''.join(self.iter_chunks())
+
+
+def write_data(server, chunks: Iterator[bytes]):
+    """Send message chunks as the body of an SMTP DATA command"""
+    for chunk in chunks:
+        # Lines starting with '.' must be dot-stuffed (RFC 5321 4.5.2)
+        server.send(_LEADING_DOT.sub(b'..', chunk))
+    server.send(b'.\r\n')
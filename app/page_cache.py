@@ -0,0 +1,132 @@
+"""
+Page Cache for Apply Boost Studio
+Pages whose output only changes between deploys are rendered once into bytes
+with a strong ETag and precompressed variants; conditional requests get a 304
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+from typing import Dict, Tuple
+from flask import Response, current_app, render_template, request
+from config import PAGE_CACHE_CONFIG
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
+
+
+class CachedPage:
+    """Rendered page bytes per content encoding, each with its own strong ETag"""
+
+    def __init__(self, body: bytes, templates_mtime: float, min_compress_size: int):
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.templates_mtime = templates_mtime
+        self.variants: Dict[str, Tuple[bytes, str]] = {'identity': (body, digest)}
+        if len(body) >= min_compress_size:
+            self.variants['gzip'] = (
+                gzip.compress(body, compresslevel=PAGE_CACHE_CONFIG['gzip_level'], mtime=0), f'{digest}-gz'
+            )
+            if brotli is not None:
+                self.variants['br'] = (
+                    brotli.compress(body, quality=PAGE_CACHE_CONFIG['brotli_quality']), f'{digest}-br'
+                )
+
+    def etags(self):
+        return [etag for _, etag in self.variants.values()]
+
+
+class PageCache:
+    """In-memory cache of rendered templates, invalidated when templates change in development"""
+
+    def __init__(self, template_dir: str, max_age: int = 300, min_compress_size: int = 1024):
+        self.template_dir = template_dir
+        self.max_age = max_age
+        self.min_compress_size = min_compress_size
+        self._pages: Dict[Tuple[str, str], CachedPage] = {}
+        self._lock = threading.Lock()
+
+    def _templates_mtime(self) -> float:
+        """Newest modification time under the template folder (base templates included)"""
+        newest = 0.0
+        for directory, _, filenames in os.walk(self.template_dir):
+            for filename in filenames:
+                try:
+                    newest = max(newest, os.stat(os.path.join(directory, filename)).st_mtime)
+                except OSError:
+                    pass
+        return newest
+
+    def get(self, template: str) -> CachedPage:
+        """Rendered page for the current app and script root, rendering it if needed"""
+        # url_for output depends on where the app is mounted
+        key = (template, request.script_root)
+        mtime = self._templates_mtime() if current_app.jinja_env.auto_reload else None
+        page = self._pages.get(key)
+        if page is not None and (mtime is None or page.templates_mtime == mtime):
+            return page
+
+        with self._lock:
+            page = self._pages.get(key)
+            if page is None or (mtime is not None and page.templates_mtime != mtime):
+                body = render_template(template).encode('utf-8')
+                page = CachedPage(body, mtime or 0.0, self.min_compress_size)
+                self._pages[key] = page
+            return page
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+    def _choose_encoding(self, page: CachedPage) -> str:
+        accepted = request.accept_encodings
+        best, best_quality = 'identity', 0
+        # Preference order when the client rates encodings equally
+        for encoding in ('br', 'gzip'):
+            quality = accepted[encoding]
+            if encoding in page.variants and quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def respond(self, template: str) -> Response:
+        """Response for a cached page, or 304 if the client already has it"""
+        page = self.get(template)
+        encoding = self._choose_encoding(page)
+        body, etag = page.variants[encoding]
+
+        if any(request.if_none_match.contains(tag) for tag in page.etags()):
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype='text/html')
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = f'public, max-age={self.max_age}'
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def warm(self, app, templates):
+        """Render pages ahead of the first request (e.g. before workers fork)"""
+        with app.test_request_context('/'):
+            for template in templates:
+                self.get(template)
+
+
+def cached_page(template: str) -> Response:
+    """Serve a template through the app's page cache"""
+    return current_app.extensions['page_cache'].respond(template)
+
+
+def init_page_cache(app) -> PageCache:
+    """Attach the page cache and pre-render the configured pages"""
+    cache = PageCache(
+        os.path.join(app.root_path, app.template_folder),
+        max_age=PAGE_CACHE_CONFIG['max_age'],
+        min_compress_size=PAGE_CACHE_CONFIG['min_compress_size']
+    )
+    app.extensions['page_cache'] = cache
+    if app.config['PAGE_CACHE_PRERENDER']:
+        cache.warm(app, PAGE_CACHE_CONFIG['pages'])
+    return cache
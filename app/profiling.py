@@ -0,0 +1,263 @@
+"""
+Request Profiling for Apply Boost Studio
+Opt-in cProfile capture of single requests. A request is profiled when it
+carries a valid X-Profile-Signature header (see `python -m app.profiling sign`)
+or is picked by the sampling rate; the background job it queues is profiled
+too, so SMTP and MIME time show up next to the upload. Profiles go to a
+directory that keeps only the newest ones and are listed at /_profiles/.
+With no secret and a zero sampling rate the middleware is not installed at all
+"""
+
+import argparse
+import contextvars
+import cProfile
+import glob
+import hashlib
+import hmac
+import html
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import quote
+from flask import Response, abort, current_app, request, send_from_directory
+from config import PROFILING_CONFIG
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = 'X-Profile-Signature'
+VIEWER_SCOPE = '/_profiles'
+
+# Set while a profiled request runs, so the jobs it queues are profiled as well
+profile_requested: contextvars.ContextVar[bool] = contextvars.ContextVar('profile_requested', default=False)
+
+
+def sign(secret: str, path: str, ttl: float = 300, now: Optional[float] = None) -> str:
+    """Signature value allowing one path to be profiled until it expires"""
+    expires = int((now or time.time()) + ttl)
+    digest = hmac.new(secret.encode(), f'{expires}:{path}'.encode(), hashlib.sha256).hexdigest()
+    return f'{expires}.{digest}'
+
+
+def verify(secret: str, value: Optional[str], path: str, max_ttl: float, now: Optional[float] = None) -> bool:
+    """True if value is an unexpired signature for path made with secret"""
+    if not secret or not value:
+        return False
+    expires, _, digest = value.partition('.')
+    if not expires.isdigit():
+        return False
+    now = now or time.time()
+    if not now <= int(expires) <= now + max_ttl:
+        return False
+    expected = hmac.new(secret.encode(), f'{expires}:{path}'.encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, digest)
+
+
+class ProfileStore:
+    """Directory of .prof dumps with a .txt summary and .json index entry each"""
+
+    def __init__(self, directory: str, keep: int = 100):
+        self.directory = directory
+        self.keep = keep
+        os.makedirs(directory, exist_ok=True)
+
+    @contextmanager
+    def capture(self, kind: str, target: str, reason: str, request_id: Optional[str] = None):
+        """Profile the block (this thread only); the caller may set 'status' on the yielded dict"""
+        info: Dict[str, Any] = {'kind': kind, 'target': target, 'reason': reason, 'request_id': request_id}
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler already owns this thread
+            yield info
+            return
+        start = time.perf_counter()
+        try:
+            yield info
+        finally:
+            profile.disable()
+            info['duration_ms'] = (time.perf_counter() - start) * 1000
+            try:
+                self.save(profile, info)
+            except OSError as e:
+                logger.warning("Could not save profile: %s", e)
+
+    def save(self, profile: cProfile.Profile, info: Dict[str, Any]) -> str:
+        """Write the dump, its summary and index entry, then drop the oldest profiles"""
+        now = time.time()
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', info['target']).strip('-')[:40] or 'root'
+        # Timestamp first so names sort oldest to newest, pid so workers never collide
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.gmtime(now)) + f'-{int(now * 1e6) % 1000000:06d}'
+        name = f"{stamp}-{os.getpid()}-{slug}"
+        base = os.path.join(self.directory, name)
+
+        profile.dump_stats(base + '.prof')
+        summary = io.StringIO()
+        pstats.Stats(profile, stream=summary).sort_stats('cumulative').print_stats(40)
+        with open(base + '.txt', 'w') as f:
+            f.write(summary.getvalue())
+        entry = dict(info, name=name, created=now, pid=os.getpid())
+        with open(base + '.json.tmp', 'w') as f:
+            json.dump(entry, f)
+        # The index entry appears last, once the files it points to exist
+        os.replace(base + '.json.tmp', base + '.json')
+        logger.info("Profile saved", extra={'profile': name, 'duration_ms': round(info['duration_ms'], 1)})
+        self.rotate()
+        return name
+
+    def rotate(self):
+        entries = sorted(glob.glob(os.path.join(self.directory, '*.json')))
+        for index_file in entries[:max(0, len(entries) - self.keep)]:
+            base = index_file[:-len('.json')]
+            for path in (index_file, base + '.prof', base + '.txt'):
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    # Another worker rotated it first
+                    pass
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Index entries, newest first"""
+        result = []
+        for index_file in sorted(glob.glob(os.path.join(self.directory, '*.json')), reverse=True):
+            try:
+                with open(index_file) as f:
+                    result.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return result
+
+
+class ProfilingMiddleware:
+    """WSGI wrapper profiling signed or sampled requests, parsing and response included"""
+
+    def __init__(self, wsgi_app, store: ProfileStore, secret: str = '', sample_rate: float = 0.0,
+                 paths: Iterable[str] = (), signature_ttl: float = 300):
+        self.wsgi_app = wsgi_app
+        self.store = store
+        self.secret = secret
+        self.sample_rate = sample_rate
+        self.paths = set(paths)
+        self.signature_ttl = signature_ttl
+
+    def reason(self, environ) -> Optional[str]:
+        path = environ.get('PATH_INFO', '')
+        if path.startswith(VIEWER_SCOPE):
+            return None
+        signature = environ.get('HTTP_X_PROFILE_SIGNATURE')
+        if signature and verify(self.secret, signature, path, self.signature_ttl):
+            return 'signed'
+        if self.sample_rate and (not self.paths or path in self.paths) and random.random() < self.sample_rate:
+            return 'sampled'
+        return None
+
+    def __call__(self, environ, start_response):
+        reason = self.reason(environ)
+        if reason is None:
+            return self.wsgi_app(environ, start_response)
+
+        target = f"{environ.get('REQUEST_METHOD', 'GET')} {environ.get('PATH_INFO', '')}"
+        token = profile_requested.set(True)
+        try:
+            with self.store.capture('request', target, reason) as info:
+                def capture_start_response(status, headers, exc_info=None):
+                    info['status'] = int(status.split(' ', 1)[0])
+                    info['request_id'] = dict(headers).get('X-Request-ID')
+                    return start_response(status, headers, exc_info)
+
+                return self.wsgi_app(environ, capture_start_response)
+        finally:
+            profile_requested.reset(token)
+
+
+def _check_viewer_access():
+    secret = current_app.config['PROFILE_SECRET']
+    signature = request.headers.get(SIGNATURE_HEADER) or request.args.get('signature')
+    if not verify(secret, signature, VIEWER_SCOPE, current_app.config['PROFILE_SIGNATURE_TTL']):
+        abort(403)
+
+
+def profiles_index():
+    """HTML list of the kept profiles"""
+    _check_viewer_access()
+    signature = quote(request.headers.get(SIGNATURE_HEADER) or request.args.get('signature', ''))
+    rows = []
+    for entry in current_app.extensions['profiles'].entries():
+        name = html.escape(entry['name'])
+        rows.append(
+            f"<tr><td>{time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(entry['created']))}</td>"
+            f"<td>{html.escape(entry['kind'])}</td><td>{html.escape(entry['target'])}</td>"
+            f"<td>{entry.get('status', '')}</td><td>{entry['duration_ms']:.1f}</td>"
+            f"<td>{html.escape(entry['reason'])}</td><td>{html.escape(entry.get('request_id') or '')}</td>"
+            f"<td><a href=\"{name}.txt?signature={signature}\">summary</a> "
+            f"<a href=\"{name}.prof?signature={signature}\">.prof</a></td></tr>"
+        )
+    body = (
+        "<!doctype html><title>Profiles</title>"
+        "<style>body{font-family:sans-serif}td,th{padding:2px 8px;text-align:left}</style>"
+        "<h1>Profiles</h1><p>Open a .prof file with <code>python -m pstats</code> or snakeviz.</p>"
+        "<table><tr><th>Time (UTC)</th><th>Kind</th><th>Target</th><th>Status</th><th>ms</th>"
+        "<th>Reason</th><th>Request ID</th><th></th></tr>" + ''.join(rows) + "</table>"
+    )
+    return Response(body, mimetype='text/html', headers={'Cache-Control': 'no-store'})
+
+
+def profile_file(filename):
+    """A profile's summary (.txt) or raw dump (.prof)"""
+    _check_viewer_access()
+    if not filename.endswith(('.txt', '.prof')):
+        abort(404)
+    mimetype = 'text/plain' if filename.endswith('.txt') else 'application/octet-stream'
+    return send_from_directory(os.path.abspath(current_app.extensions['profiles'].directory), filename,
+                               mimetype=mimetype, as_attachment=filename.endswith('.prof'), max_age=0)
+
+
+def init_profiling(app) -> Optional[ProfileStore]:
+    """Wrap the app in the profiling middleware, unless profiling is switched off"""
+    secret = app.config['PROFILE_SECRET']
+    sample_rate = app.config['PROFILE_SAMPLE_RATE']
+    if not secret and not sample_rate:
+        return None
+
+    store = ProfileStore(app.config['PROFILE_DIR'], PROFILING_CONFIG['keep'])
+    app.extensions['profiles'] = store
+    app.wsgi_app = ProfilingMiddleware(app.wsgi_app, store, secret, sample_rate,
+                                       PROFILING_CONFIG['sample_paths'], app.config['PROFILE_SIGNATURE_TTL'])
+    if secret:
+        # Without a secret nobody could be authorised to read them
+        app.add_url_rule(VIEWER_SCOPE + '/', 'profiles_index', profiles_index)
+        app.add_url_rule(VIEWER_SCOPE + '/<path:filename>', 'profile_file', profile_file)
+    return store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sign requests for the profiler')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    sign_parser = subparsers.add_parser('sign', help=f'Print an {SIGNATURE_HEADER} value')
+    sign_parser.add_argument('path', nargs='?', default=VIEWER_SCOPE,
+                             help=f'Request path to profile ({VIEWER_SCOPE} for the index page)')
+    sign_parser.add_argument('--ttl', type=float, default=PROFILING_CONFIG['signature_ttl'])
+    args = parser.parse_args(argv)
+
+    secret = PROFILING_CONFIG['secret']
+    if not secret:
+        print("PROFILE_SECRET is not set", file=sys.stderr)
+        return 1
+    signature = sign(secret, args.path, args.ttl)
+    if args.path == VIEWER_SCOPE:
+        print(f"{VIEWER_SCOPE}/?signature={signature}")
+    else:
+        print(f"{SIGNATURE_HEADER}: {signature}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
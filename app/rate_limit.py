@@ -0,0 +1,188 @@
+"""
+Rate Limiting for Apply Boost Studio
+A token bucket per client IP for the /api routes. Every submission stores a
+file and sends an email, so one client must not be able to use up the Gmail
+quota or the disk. The buckets live in a small memory-mapped file shared by
+every worker process on the host, so the budget holds however many workers
+the request lands on; a check is one flock() and a few struct reads
+"""
+
+import fcntl
+import hashlib
+import ipaddress
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Callable, Iterable, List, Optional, Sequence, Union
+from flask import current_app, jsonify, request
+from config import RATE_LIMIT_CONFIG
+from app.metrics import RATE_LIMITED
+
+logger = logging.getLogger(__name__)
+
+# One bucket: client key hash (0 = empty), tokens left, last update (Unix time)
+ENTRY = struct.Struct('<Qdd')
+
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+class TokenBucketStore:
+    """Fixed-size open-addressing table of token buckets in a shared, flock-guarded file"""
+
+    def __init__(self, path: str, rate: float, burst: float, slots: int = 8192, probes: int = 8,
+                 clock: Callable[[], float] = time.time):
+        # One file per table size: workers still running with another size keep their own file,
+        # so nobody's mapping is ever truncated underneath it
+        root, ext = os.path.splitext(path)
+        self.path = f'{root}-{slots}{ext}'
+        self.rate = rate
+        self.burst = burst
+        self.slots = slots
+        self.probes = probes
+        self.clock = clock
+        self._pid = None
+        self._fd = None
+        self._map = None
+        # flock() does not exclude threads sharing a descriptor
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def _open(self):
+        # A forked worker needs its own open file, or its flock() would be shared with the parent's
+        if self._pid == os.getpid():
+            return
+        size = self.slots * ENTRY.size
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(fd).st_size < size:
+                # New file: zero-filled, i.e. all buckets empty. Growing never invalidates a mapping
+                os.ftruncate(fd, size)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        self._fd, self._map, self._pid = fd, mmap.mmap(fd, size), os.getpid()
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'little') or 1
+
+    def take(self, key: str, cost: float = 1.0) -> float:
+        """Spend cost tokens from key's bucket: 0 if allowed, else seconds until it would be"""
+        h = self._hash(key)
+        with self._lock:
+            self._open()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                now = self.clock()
+                offset, tokens, updated = self._find(h, now)
+                # A bucket idle long enough is full again; clamp in case the clock stepped back
+                tokens = min(self.burst, tokens + max(now - updated, 0.0) * self.rate)
+                wait = 0.0
+                if tokens >= cost:
+                    tokens -= cost
+                else:
+                    wait = (cost - tokens) / self.rate if self.rate else math.inf
+                ENTRY.pack_into(self._map, offset, h, tokens, now)
+                return wait
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _find(self, h: int, now: float):
+        """Offset, tokens and update time of h's bucket, claiming a slot for a new key"""
+        oldest = None
+        for probe in range(self.probes):
+            offset = ((h + probe) % self.slots) * ENTRY.size
+            key, tokens, updated = ENTRY.unpack_from(self._map, offset)
+            if key == h:
+                return offset, tokens, updated
+            if key == 0:
+                # Entries are overwritten but never removed, so h is not further along
+                return offset, self.burst, now
+            if oldest is None or updated < oldest[1]:
+                oldest = (offset, updated)
+        # Table region full: reuse the longest-idle bucket, most likely already refilled
+        return oldest[0], self.burst, now
+
+
+def parse_networks(proxies: Iterable[str]) -> List[IPNetwork]:
+    """Networks for a list of addresses or CIDR ranges, e.g. ['127.0.0.1', '172.16.0.0/12']"""
+    return [ipaddress.ip_network(proxy, strict=False) for proxy in proxies]
+
+
+def _is_trusted(address: str, networks: Sequence[IPNetwork]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in networks)
+
+
+def client_ip(trusted_proxies: Sequence[IPNetwork]) -> str:
+    """The caller's address: the socket peer, unless that is a trusted proxy reporting who it serves
+
+    From a trusted peer, nginx's X-Real-IP wins, else the nearest X-Forwarded-For entry
+    that is not itself a trusted proxy (earlier entries are whatever the client sent)
+    """
+    remote = request.remote_addr or 'unknown'
+    if not _is_trusted(remote, trusted_proxies):
+        return remote
+    real_ip = request.headers.get('X-Real-IP', '').strip()
+    if real_ip:
+        return real_ip
+    hops = [hop.strip() for hop in request.headers.get('X-Forwarded-For', '').split(',') if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted(hop, trusted_proxies):
+            return hop
+    return hops[0] if hops else remote
+
+
+def _check_rate_limit():
+    limiter = current_app.extensions['rate_limit']
+    if request.blueprint != limiter.blueprint or request.endpoint in limiter.exempt:
+        return None
+    ip = client_ip(limiter.trusted_proxies)
+    wait = limiter.store.take(ip)
+    if not wait:
+        return None
+
+    RATE_LIMITED.inc(endpoint=request.endpoint or 'unmatched')
+    logger.warning("Rate limited %s on %s", ip, request.path, extra={'client_ip': ip})
+    response = jsonify({
+        'success': False,
+        'message': 'Too many submissions from your network. Please wait a little and try again.'
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(1, math.ceil(min(wait, 86400))))
+    return response
+
+
+class RateLimiter:
+    """The store plus which requests it applies to"""
+
+    def __init__(self, store: TokenBucketStore, blueprint: str, exempt: Iterable[str] = (),
+                 trusted_proxies: Iterable[str] = ()):
+        self.store = store
+        self.blueprint = blueprint
+        self.exempt = set(exempt)
+        self.trusted_proxies = parse_networks(trusted_proxies)
+
+
+def init_rate_limit(app, blueprint) -> Optional[RateLimiter]:
+    """Rate limit the blueprint's routes per client IP, unless RATE_LIMIT_ENABLED is off"""
+    if not app.config['RATE_LIMIT_ENABLED']:
+        return None
+    path = app.config['RATE_LIMIT_FILE'] or os.path.join(
+        os.path.dirname(os.path.abspath(app.config['JOB_QUEUE_PATH'])), 'ratelimit.bin'
+    )
+    store = TokenBucketStore(path, app.config['RATE_LIMIT_PER_MINUTE'] / 60.0, app.config['RATE_LIMIT_BURST'],
+                             RATE_LIMIT_CONFIG['slots'])
+    limiter = RateLimiter(store, blueprint.name, RATE_LIMIT_CONFIG['exempt'],
+                          app.config['RATE_LIMIT_TRUSTED_PROXIES'])
+    app.extensions['rate_limit'] = limiter
+    # An app-wide hook registered before admission control, so a limited client never takes a slot
+    app.before_request(_check_rate_limit)
+    return limiter
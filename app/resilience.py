@@ -0,0 +1,156 @@
+"""
+Resilience for Apply Boost Studio
+Retries with jittered exponential backoff and a circuit breaker per external
+dependency (SMTP, Google Drive). After repeated failures the breaker opens and
+calls fail immediately with CircuitOpenError instead of tying up a worker on
+a dependency that is down; after reset_timeout one trial call is let through
+and its outcome closes or re-opens the breaker. State is per process
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+from config import RESILIENCE_CONFIG
+from app.metrics import CIRCUIT_OPEN, DEPENDENCY_CALLS
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose breaker is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is unavailable (circuit open, retry in {retry_after:.0f}s)")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Opens after failure_threshold consecutive failures; one trial call after reset_timeout"""
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+        CIRCUIT_OPEN.set(0, dependency=name)
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            logger.warning("Circuit for %s is now %s", self.name, state.replace('_', '-'),
+                           extra={'dependency': self.name, 'circuit': state})
+        self.state = state
+        CIRCUIT_OPEN.set(int(state != CLOSED), dependency=self.name)
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go ahead"""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            remaining = self.opened_at + self.reset_timeout - self.clock()
+            if self.state == OPEN and remaining <= 0:
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return
+        DEPENDENCY_CALLS.inc(dependency=self.name, outcome='rejected')
+        raise CircuitOpenError(self.name, max(remaining, 0))
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._trial_running = False
+            self._set_state(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+                self._set_state(OPEN)
+
+    def release_trial(self):
+        """End a call that proved nothing either way; a half-open breaker lets the next call try"""
+        with self._lock:
+            self._trial_running = False
+
+    def retry_after(self) -> float:
+        """Seconds until the next trial call (0 when closed)"""
+        with self._lock:
+            if self.state == CLOSED:
+                return 0.0
+            return max(self.opened_at + self.reset_timeout - self.clock(), 0.0)
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """Full-jitter exponential backoff before retry number `attempt` (1-based)"""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+
+
+def call_with_retries(func: Callable, *args, attempts: int = 3, base_delay: float = 0.5, max_delay: float = 5.0,
+                      retryable: Callable[[BaseException], bool] = lambda e: True,
+                      breaker: Optional[CircuitBreaker] = None, sleep: Callable[[float], None] = time.sleep,
+                      **kwargs):
+    """Call func, retrying transient failures; every attempt passes through the breaker
+
+    Only retryable errors count against the breaker: a rejected recipient
+    says nothing about whether the server is healthy.
+    """
+    name = breaker.name if breaker else getattr(func, '__name__', 'call')
+    for attempt in range(1, attempts + 1):
+        if breaker is not None:
+            breaker.before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            transient = retryable(e)
+            if breaker is not None:
+                if transient:
+                    breaker.record_failure()
+                else:
+                    breaker.release_trial()
+            if not transient or attempt == attempts:
+                DEPENDENCY_CALLS.inc(dependency=name, outcome='failed')
+                raise
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            DEPENDENCY_CALLS.inc(dependency=name, outcome='retried')
+            logger.warning("%s call failed (%s); retry %d/%d in %.2fs", name, e, attempt, attempts - 1, delay,
+                           extra={'dependency': name})
+            sleep(delay)
+        else:
+            if breaker is not None:
+                breaker.record_success()
+            DEPENDENCY_CALLS.inc(dependency=name, outcome='ok')
+            return result
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """The process-wide breaker for a dependency configured in RESILIENCE_CONFIG"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            settings = RESILIENCE_CONFIG[name]
+            breaker = CircuitBreaker(name, settings['failure_threshold'], settings['reset_timeout'])
+            _breakers[name] = breaker
+        return breaker
+
+
+def retry_policy(name: str) -> Dict[str, float]:
+    """Keyword arguments for call_with_retries from a dependency's settings"""
+    settings = RESILIENCE_CONFIG[name]
+    return {'attempts': settings['attempts'], 'base_delay': settings['base_delay'], 'max_delay': settings['max_delay']}
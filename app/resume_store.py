@@ -0,0 +1,154 @@
+"""
+Resume Storage for Apply Boost Studio
+Content-addressed store: resumes are named by their SHA-256, stored once and
+reference counted, and every delivery (email, Drive) is recorded per hash
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple
+from config import UPLOAD_CONFIG
+
+
+class ResumeStore:
+    """Deduplicating, reference-counted file store keyed by SHA-256"""
+
+    def __init__(self, root: str, chunk_size: int = 64 * 1024):
+        self.root = root
+        self.chunk_size = chunk_size
+        self.objects_dir = os.path.join(root, 'objects')
+        self.tmp_dir = os.path.join(root, 'tmp')
+        self.db_path = os.path.join(root, 'index.sqlite3')
+        self._local = threading.local()
+
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS objects (
+                    digest TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    refcount INTEGER NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS deliveries (
+                    digest TEXT NOT NULL,
+                    channel TEXT NOT NULL,
+                    reference TEXT,
+                    delivered_at REAL NOT NULL,
+                    PRIMARY KEY (digest, channel)
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return a connection owned by the current thread and process"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def path(self, digest: str) -> str:
+        """Filesystem path of a stored object"""
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def put(self, stream: BinaryIO) -> Tuple[str, int]:
+        """Store a stream, hashing it as it is written; returns (digest, size)"""
+        sha256 = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                while True:
+                    chunk = stream.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    sha256.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+            digest = sha256.hexdigest()
+
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT refcount FROM objects WHERE digest = ?", (digest,)).fetchone()
+                if row is not None and os.path.exists(self.path(digest)):
+                    conn.execute("UPDATE objects SET refcount = refcount + 1 WHERE digest = ?", (digest,))
+                else:
+                    os.makedirs(os.path.dirname(self.path(digest)), exist_ok=True)
+                    os.replace(tmp_path, self.path(digest))
+                    conn.execute(
+                        "INSERT OR REPLACE INTO objects (digest, size, refcount, created_at) VALUES (?, ?, 1, ?)",
+                        (digest, size, time.time())
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return digest, size
+
+    def release(self, digest: str) -> bool:
+        """Drop one reference; the file is deleted with the last one. Returns True if deleted"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("UPDATE objects SET refcount = refcount - 1 WHERE digest = ?", (digest,))
+            row = conn.execute("SELECT refcount FROM objects WHERE digest = ?", (digest,)).fetchone()
+            deleted = row is not None and row['refcount'] <= 0
+            if deleted:
+                conn.execute("DELETE FROM objects WHERE digest = ?", (digest,))
+                if os.path.exists(self.path(digest)):
+                    os.remove(self.path(digest))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return deleted
+
+    def refcount(self, digest: str) -> int:
+        """Number of outstanding references to an object"""
+        row = self._connect().execute("SELECT refcount FROM objects WHERE digest = ?", (digest,)).fetchone()
+        return row['refcount'] if row else 0
+
+    def iter_objects(self) -> Iterator[Dict[str, Any]]:
+        """Yield every stored object with its size and reference count"""
+        for row in self._connect().execute("SELECT * FROM objects ORDER BY created_at"):
+            yield dict(row)
+
+    def mark_delivered(self, digest: str, channel: str, reference: Optional[Dict[str, Any]] = None):
+        """Record that these bytes reached a channel (e.g. 'email', 'drive')"""
+        self._connect().execute(
+            "INSERT OR REPLACE INTO deliveries (digest, channel, reference, delivered_at) VALUES (?, ?, ?, ?)",
+            (digest, channel, json.dumps(reference) if reference is not None else None, time.time())
+        )
+
+    def get_delivery(self, digest: str, channel: str) -> Optional[Dict[str, Any]]:
+        """Return the delivery record for these bytes on a channel, if any"""
+        row = self._connect().execute(
+            "SELECT * FROM deliveries WHERE digest = ? AND channel = ?", (digest, channel)
+        ).fetchone()
+        if row is None:
+            return None
+        delivery = dict(row)
+        delivery['reference'] = json.loads(delivery['reference']) if delivery['reference'] else None
+        return delivery
+
+
+def init_resume_store(app):
+    """Attach the resume store for the app's upload folder"""
+    store = ResumeStore(app.config['UPLOAD_FOLDER'], UPLOAD_CONFIG['chunk_size'])
+    app.extensions['resume_store'] = store
+    return store
@@ -1,116 +1,178 @@
-from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for
+from flask import Blueprint, request, jsonify, flash, redirect, url_for, current_app
 import os
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.base import MIMEBase
-from email import encoders
+import logging
+from werkzeug.exceptions import HTTPException
 from werkzeug.utils import secure_filename
 import json
+from config import EMAIL_CONFIG
+from app.smtp_pool import get_smtp_pool
+from app.mime_stream import StreamingEmail
+from app.job_queue import dead_job_handler, job_handler, enqueue_job
+from app.page_cache import cached_page
+from app.testimonials import testimonials_response
+from app.metrics import SUBMISSIONS, UPLOAD_BYTES, UPLOADS, stage
+from app.resilience import CircuitOpenError
 
 # Create blueprints
+logger = logging.getLogger(__name__)
+
 main_bp = Blueprint('main', __name__)
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
 @main_bp.route('/')
 def home():
-    return render_template('home.html')
+    return cached_page('home.html')
 
 @main_bp.route('/get-started')
 def get_started():
-    return render_template('get_started.html')
+    return cached_page('get_started.html')
 
 @main_bp.route('/resume-builder')
 def resume_builder():
-    return render_template('resume_builder.html')
+    return cached_page('resume_builder.html')
 
 @main_bp.route('/login')
 def login():
-    return render_template('login.html')
+    return cached_page('login.html')
 
 @main_bp.route('/profile')
 def profile():
-    return render_template('profile.html')
+    return cached_page('profile.html')
+
+@main_bp.route('/health')
+def health():
+    """Liveness check: no templates, disk or external services"""
+    return jsonify({'status': 'ok'})
 
 @api_bp.route('/submit-form', methods=['POST'])
 def submit_form():
     try:
-        print("=== SUBMIT FORM ROUTE HIT ===")
-        
-        # Get form data
+        # Get form data (parsing validates the resume size and type as it streams)
         name = request.form.get('name')
         email = request.form.get('email')
         phone = request.form.get('phone', '')
         
-        print(f"Form data received: name={name}, email={email}, phone={phone}")
+        logger.debug("Form data received", extra={'lead_name': name, 'lead_email': email})
         
         # Handle file upload
         resume_file = request.files.get('resume')
         resume_filename = None
-        file_path = None
+        resume_sha256 = None
         
         if resume_file and resume_file.filename:
-            print(f"Resume file received: {resume_file.filename}")
             # Secure the filename
             resume_filename = secure_filename(resume_file.filename)
             
-            # Save file to uploads directory
-            upload_folder = 'uploads'
-            os.makedirs(upload_folder, exist_ok=True)
-            file_path = os.path.join(upload_folder, resume_filename)
-            resume_file.save(file_path)
-            print(f"Resume saved to: {file_path}")
-        else:
-            print("No resume file received")
+            # Store by content hash: no name collisions, identical files stored once
+            store = current_app.extensions['resume_store']
+            with stage('upload_save'):
+                resume_sha256, resume_size = store.put(resume_file.stream)
+            UPLOADS.inc()
+            UPLOAD_BYTES.inc(resume_size)
+            logger.debug("Resume stored", extra={'resume_sha256': resume_sha256, 'resume_bytes': resume_size})
         
-        # Send email notification (commented out for now to avoid email errors)
-        email_sent = send_notification_email(name, email, phone, resume_filename)
-        print("Email notification sent")
-        
-        # Delete resume file after successful email
-        if email_sent and file_path and os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-                print(f"✅ Resume file deleted: {file_path}")
-            except Exception as e:
-                print(f"❌ Error deleting resume file: {e}")
+        # Queue the email notification; SMTP and cleanup run in the background
+        try:
+            job_id = enqueue_job(current_app, 'lead_notification', {
+                'name': name,
+                'email': email,
+                'phone': phone,
+                'resume_filename': resume_filename,
+                'resume_sha256': resume_sha256
+            })
+        except Exception:
+            if resume_sha256:
+                # No job will ever release this submission's reference
+                current_app.extensions['resume_store'].release(resume_sha256)
+            raise
+        logger.info("Submission accepted", extra={'job_id': job_id, 'has_resume': resume_sha256 is not None})
+        SUBMISSIONS.inc(outcome='accepted')
         
         return jsonify({
             'success': True,
             'message': 'Form submitted successfully! We\'ll be in touch soon.',
             'redirect_url': 'https://zcal.co/jobsimplified/30min'
-        })
+        }), 202
+        
+    except HTTPException as e:
+        # Upload rejected while streaming (too large or not a resume)
+        logger.info("Submission rejected: %s", e.description, extra={'status': e.code})
+        SUBMISSIONS.inc(outcome='rejected')
+        return jsonify({
+            'success': False,
+            'message': e.description
+        }), e.code
         
     except Exception as e:
-        print(f"=== FORM SUBMISSION ERROR: {str(e)} ===")
+        logger.exception("Submission failed")
+        SUBMISSIONS.inc(outcome='error')
         return jsonify({
             'success': False,
             'message': f'Error submitting form: {str(e)}'
         }), 500
 
-def send_notification_email(name, email, phone, resume_filename):
+@job_handler('lead_notification')
+def process_lead_notification(payload):
+    """Background job: email the lead to the team, then release the stored resume"""
+    store = current_app.extensions['resume_store']
+    digest = payload.get('resume_sha256')
+    
+    # Identical resume bytes already mailed once are referenced, not re-attached
+    already_sent = bool(digest and store.get_delivery(digest, 'email'))
+    email_sent = send_notification_email(
+        payload['name'], payload['email'], payload['phone'],
+        payload['resume_filename'],
+        resume_path=store.path(digest) if digest else None,
+        resume_sha256=digest,
+        attach_resume=not already_sent
+    )
+    if not email_sent:
+        # Raising leaves the job in the queue to be retried
+        raise RuntimeError("Email notification was not sent")
+    
+    if digest:
+        if not already_sent:
+            store.mark_delivered(digest, 'email')
+        # Drop this submission's reference; the file is deleted with the last one
+        with stage('file_delete'):
+            deleted = store.release(digest)
+        if deleted:
+            logger.info("Resume file deleted", extra={'resume_sha256': digest})
+
+@dead_job_handler('lead_notification')
+def keep_dead_lead_resume(payload):
+    """A lead notification was given up on: keep the resume until upload_backlog.py has it in Drive"""
+    digest = payload.get('resume_sha256')
+    if not digest:
+        return
+    store = current_app.extensions['resume_store']
+    if not store.get_delivery(digest, 'drive'):
+        # Nobody has received this resume yet; upload_backlog.py releases it after uploading
+        logger.warning("Lead email given up; resume kept for the Drive backlog", extra={'resume_sha256': digest})
+        return
+    if store.release(digest):
+        logger.info("Resume file deleted", extra={'resume_sha256': digest})
+
+def send_notification_email(name, email, phone, resume_filename, resume_path=None,
+                            resume_sha256=None, attach_resume=True):
     """Send email notification to applyjobsforme9876@gmail.com"""
     
     # Email configuration
     sender_email = os.environ.get('SENDER_EMAIL')  # Replace with your email
     sender_password = os.environ.get('SENDER_PASSWORD')  # Replace with your app password
     recipient_email = "applyjobsforme9876@gmail.com"
-    print(f"Sender email: {sender_email}")
-    print(f"Sender password: {sender_password}")
     
     # Check if email credentials are configured
     if not sender_email or not sender_password:
-        print("⚠️  Email credentials not configured. Skipping email notification.")
-        print("📧 To enable email notifications, set environment variables:")
-        print("   SENDER_EMAIL=your-email@gmail.com")
-        print("   SENDER_PASSWORD=your-app-password")
+        logger.warning("Email credentials not configured (set SENDER_EMAIL and SENDER_PASSWORD); "
+                       "skipping email notification")
         return False
     
-    # Create message
-    msg = MIMEMultipart()
-    msg['From'] = sender_email
-    msg['To'] = "applyjobsforme9876@gmail.com"
-    msg['Subject'] = f"New AJFM Lead: {name}"
+    resume_line = resume_filename if resume_filename else 'Not uploaded'
+    if resume_sha256:
+        resume_line += f" (SHA-256 {resume_sha256})"
+        if not attach_resume:
+            resume_line += " - identical file already sent, not re-attached"
     
     # Email body
     body = f"""
@@ -120,69 +182,44 @@ def send_notification_email(name, email, phone, resume_filename):
     Email: {email}
     Phone: {phone if phone else 'Not provided'}
     
-    Resume: {resume_filename if resume_filename else 'Not uploaded'}
+    Resume: {resume_line}
     
     Please follow up with this potential client.
     """
     
-    msg.attach(MIMEText(body, 'plain'))
-    
-    # Attach resume if uploaded
-    if resume_filename:
-        try:
-            with open(f"uploads/{resume_filename}", "rb") as attachment:
-                part = MIMEBase('application', 'octet-stream')
-                part.set_payload(attachment.read())
-            
-            encoders.encode_base64(part)
-            part.add_header(
-                'Content-Disposition',
-                f'attachment; filename= {resume_filename}',
-            )
-            msg.attach(part)
-            print(f"✅ Resume attached: {resume_filename}")
-        except Exception as e:
-            print(f"❌ Error attaching resume: {e}")
+    # Create message; the attachment is encoded while it is being sent (timed as smtp_send)
+    with stage('mime_build'):
+        msg = StreamingEmail(sender_email, recipient_email, f"New AJFM Lead: {name}", body)
+        
+        # Attach resume if uploaded
+        if resume_filename and attach_resume:
+            try:
+                msg.attach_file(resume_path or os.path.join('uploads', resume_filename), resume_filename)
+                logger.debug("Resume attached", extra={'resume_filename': resume_filename})
+            except Exception:
+                logger.exception("Could not attach resume", extra={'resume_filename': resume_filename})
     
     # Send email
     try:
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()
-        server.login(sender_email, sender_password)
-        text = msg.as_string()
-        server.sendmail(sender_email, recipient_email, text)
-        server.quit()
-        print("✅ Email sent successfully to", recipient_email)
+        pool = get_smtp_pool(EMAIL_CONFIG['smtp_server'], EMAIL_CONFIG['smtp_port'],
+                             sender_email, sender_password)
+        pool.send_streaming(msg)
+        logger.info("Lead notification email sent", extra={'recipient': recipient_email})
         return True
+    except CircuitOpenError:
+        # SMTP is down: let the job queue hold the email until the circuit closes
+        raise
     except Exception as e:
-        print(f"❌ Error sending email: {e}")
-        print("💡 Make sure your Gmail app password is correct and 2FA is enabled")
+        logger.error("Error sending email (check the Gmail app password and 2FA): %s", e)
         return False
 
 @api_bp.route('/testimonials')
 def get_testimonials():
-    """Return testimonials data"""
-    testimonials = [
-        {
-            "name": "Sarah",
-            "role": "Software Engineer",
-            "company": "Amazon",
-            "content": "AJFM helped me land my dream job in just 4 weeks. The personalized approach made all the difference.",
-            "rating": 5
-        },
-        {
-            "name": "Arvind Swamy",
-            "role": "Software Engineer III",
-            "company": "Walmart",
-            "content": "I was spending hours on applications with no results. AJFM turned that around completely.",
-            "rating": 5
-        },
-        {
-            "name": "Mansi",
-            "role": "Product Manager",
-            "company": "Oracle",
-            "content": "The weekly updates and personalized applications helped me get multiple interviews. Highly recommended!",
-            "rating": 5
-        }
-    ]
-    return jsonify(testimonials) 
\ No newline at end of file
+    """Return testimonials data (filter with company, rating, min_rating; paginate with page, per_page)"""
+    try:
+        return testimonials_response()
+    except HTTPException as e:
+        return jsonify({
+            'success': False,
+            'message': e.description
+        }), e.code
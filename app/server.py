@@ -0,0 +1,75 @@
+"""
+Production Server Settings for Apply Boost Studio
+Worker model for gunicorn (see gunicorn.conf.py), derived from the CPU count
+and SERVER_CONFIG, plus the per-worker startup that must happen after fork
+"""
+
+import importlib.util
+import logging
+import os
+from typing import Any, Dict, Optional
+from config import GOOGLE_DRIVE_CONFIG, QUEUE_CONFIG, SERVER_CONFIG
+
+logger = logging.getLogger(__name__)
+
+WORKER_CLASSES = {'sync', 'gthread', 'gevent'}
+DEFAULT_THREADS = 4
+
+
+def worker_settings(cpu_count: Optional[int] = None, worker_class: Optional[str] = None,
+                    workers: Optional[int] = None, threads: Optional[int] = None) -> Dict[str, Any]:
+    """Worker class, process count and threads/connections per process"""
+    cpu_count = cpu_count or os.cpu_count() or 1
+    worker_class = worker_class or SERVER_CONFIG['worker_class']
+    workers = workers if workers is not None else SERVER_CONFIG['workers']
+    threads = threads if threads is not None else SERVER_CONFIG['threads']
+
+    if worker_class not in WORKER_CLASSES:
+        raise ValueError(f"Unknown worker class '{worker_class}' (expected one of {sorted(WORKER_CLASSES)})")
+    if worker_class == 'gevent' and importlib.util.find_spec('gevent') is None:
+        logger.warning("gevent is not installed; falling back to gthread workers")
+        worker_class = 'gthread'
+
+    settings = {'worker_class': worker_class}
+    if worker_class == 'sync':
+        # One request per process: a slow upload pins the whole worker, so
+        # only use this behind nginx request buffering
+        settings['workers'] = workers or cpu_count * 2 + 1
+        settings['threads'] = 1
+    elif worker_class == 'gthread':
+        # Threads wait on slow clients, SMTP and Drive while the GIL is free;
+        # processes cover the CPU-bound rendering
+        settings['workers'] = workers or cpu_count + 1
+        settings['threads'] = threads or DEFAULT_THREADS
+    else:
+        settings['workers'] = workers or cpu_count
+        settings['threads'] = 1
+        settings['worker_connections'] = SERVER_CONFIG['worker_connections']
+    return settings
+
+
+def gunicorn_settings(cpu_count: Optional[int] = None) -> Dict[str, Any]:
+    """Everything gunicorn.conf.py exports, as gunicorn setting names"""
+    settings = worker_settings(cpu_count)
+    settings.update(
+        bind=SERVER_CONFIG['bind'],
+        preload_app=SERVER_CONFIG['preload'],
+        max_requests=SERVER_CONFIG['max_requests'],
+        max_requests_jitter=SERVER_CONFIG['max_requests_jitter'],
+        timeout=SERVER_CONFIG['timeout'],
+        graceful_timeout=SERVER_CONFIG['graceful_timeout'],
+        keepalive=SERVER_CONFIG['keepalive']
+    )
+    return settings
+
+
+def start_worker_services(app):
+    """Start per-process background threads in a freshly forked worker"""
+    # wsgi.py builds the app with autostart off so no thread exists before the fork
+    app.config['JOB_WORKERS_AUTOSTART'] = QUEUE_CONFIG['autostart']
+    if app.config['JOB_WORKERS_AUTOSTART']:
+        app.extensions['job_workers'].start()
+    if GOOGLE_DRIVE_CONFIG['backend'] == 'google' and os.path.exists(GOOGLE_DRIVE_CONFIG['token_file']):
+        # Load and refresh the Drive token now, so the first upload does not wait on it
+        from app.drive_credentials import get_shared_credentials
+        get_shared_credentials().start_refresher()
@@ -0,0 +1,268 @@
+"""
+SMTP Connection Pool for Apply Boost Studio
+Reuses authenticated SMTP sessions across every email sender in the process.
+Sends have connect and read timeouts, retry transient failures with backoff and
+go through the shared SMTP circuit breaker (see app/resilience.py)
+"""
+
+import os
+import smtplib
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+from config import EMAIL_CONFIG, RESILIENCE_CONFIG, SMTP_POOL_CONFIG
+from app.mime_stream import write_data
+from app.metrics import stage
+from app.resilience import CircuitBreaker, call_with_retries, get_breaker, retry_policy
+
+
+class PoolTimeout(TimeoutError):
+    """Every pooled connection stayed busy for acquire_timeout (a local limit, not a server fault)"""
+
+
+def is_transient(exception: BaseException) -> bool:
+    """True for failures worth retrying: dropped or refused connections, timeouts and 4xx replies"""
+    if isinstance(exception, PoolTimeout):
+        return False
+    if isinstance(exception, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    if isinstance(exception, smtplib.SMTPResponseException):
+        return 400 <= exception.smtp_code < 500
+    if isinstance(exception, smtplib.SMTPException):
+        # Refused recipients or senders and missing extensions will fail the same way again
+        return False
+    # Network trouble only: SMTPException and local file errors are OSErrors too
+    return isinstance(exception, (ConnectionError, TimeoutError, socket.gaierror))
+
+
+class SMTPConnectionPool:
+    """Thread-safe pool of logged-in SMTP connections to one server/account"""
+
+    def __init__(self, host: str, port: int, username: str, password: str,
+                 max_size: int = 4, idle_timeout: float = 60, acquire_timeout: float = 30,
+                 starttls: bool = True, connect_timeout: float = 10, timeout: float = 30,
+                 breaker: Optional[CircuitBreaker] = None, retry: Optional[Dict[str, Any]] = None):
+        self.host = host
+        self.port = port
+        self.starttls = starttls
+        self.connect_timeout = connect_timeout
+        self.timeout = timeout
+        self.breaker = breaker
+        # call_with_retries arguments (attempts, base_delay, max_delay); one try by default
+        self.retry = retry or {'attempts': 1}
+        self.username = username
+        self.password = password
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+        self._idle: List[Tuple[smtplib.SMTP, float]] = []
+        self._in_use = 0
+        self._cond = threading.Condition()
+
+    def _open(self) -> smtplib.SMTP:
+        """Open, secure and authenticate a new connection"""
+        with stage('smtp_connect'):
+            server = smtplib.SMTP(self.host, self.port, timeout=self.connect_timeout)
+        sock = getattr(server, 'sock', None)
+        if sock is not None:
+            # Connected: every later reply (greeting, login, DATA) gets the read timeout
+            sock.settimeout(self.timeout)
+        try:
+            if self.starttls:
+                with stage('smtp_starttls'):
+                    server.starttls()
+            with stage('smtp_login'):
+                server.login(self.username, self.password)
+        except Exception:
+            self._close(server)
+            raise
+        return server
+
+    @staticmethod
+    def _close(server: smtplib.SMTP):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    @staticmethod
+    def _is_alive(server: smtplib.SMTP) -> bool:
+        try:
+            return server.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _acquire(self) -> smtplib.SMTP:
+        deadline = time.monotonic() + self.acquire_timeout
+        stale = []
+        try:
+            with self._cond:
+                while True:
+                    # Evict connections the server has probably dropped already
+                    now = time.monotonic()
+                    while self._idle and now - self._idle[0][1] > self.idle_timeout:
+                        stale.append(self._idle.pop(0)[0])
+
+                    if self._idle:
+                        server, _ = self._idle.pop()
+                        self._in_use += 1
+                        break
+                    if self._in_use < self.max_size:
+                        self._in_use += 1
+                        server = None
+                        break
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeout("Timed out waiting for a free SMTP connection")
+                    self._cond.wait(remaining)
+        finally:
+            # Network work happens outside the lock, and evicted sockets are closed even on timeout
+            for old in stale:
+                self._close(old)
+        try:
+            if server is not None and not self._is_alive(server):
+                self._close(server)
+                server = None
+            if server is None:
+                server = self._open()
+        except Exception:
+            self._release(None)
+            raise
+        return server
+
+    def _release(self, server: Optional[smtplib.SMTP]):
+        with self._cond:
+            self._in_use -= 1
+            if server is not None:
+                self._idle.append((server, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a live connection; it is discarded if the session breaks"""
+        server = self._acquire()
+        try:
+            yield server
+        except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+            # The server answered, so the session is reusable once reset
+            try:
+                server.rset()
+            except Exception:
+                self._close(server)
+                self._release(None)
+                raise
+            self._release(server)
+            raise
+        except BaseException:
+            self._close(server)
+            self._release(None)
+            raise
+        else:
+            self._release(server)
+
+    def _call(self, func, *args):
+        return call_with_retries(func, *args, retryable=is_transient, breaker=self.breaker, **self.retry)
+
+    def sendmail(self, from_addr: str, to_addrs, msg) -> dict:
+        """Send a message, retrying transient failures (raises CircuitOpenError while SMTP is down)"""
+        return self._call(self._sendmail_once, from_addr, to_addrs, msg)
+
+    def send_streaming(self, message) -> dict:
+        """Send a StreamingEmail, writing its chunks directly to the socket"""
+        return self._call(self._send_streaming_once, message)
+
+    def _sendmail_once(self, from_addr: str, to_addrs, msg) -> dict:
+        # A pooled session the server dropped is replaced at once, without backoff
+        try:
+            with self.connection() as server, stage('smtp_send'):
+                return server.sendmail(from_addr, to_addrs, msg)
+        except smtplib.SMTPServerDisconnected:
+            with self.connection() as server, stage('smtp_send'):
+                return server.sendmail(from_addr, to_addrs, msg)
+
+    def _send_streaming_once(self, message) -> dict:
+        try:
+            with self.connection() as server, stage('smtp_send'):
+                return self._send_streaming(server, message)
+        except smtplib.SMTPServerDisconnected:
+            with self.connection() as server, stage('smtp_send'):
+                return self._send_streaming(server, message)
+
+    @staticmethod
+    def _send_streaming(server: smtplib.SMTP, message) -> dict:
+        # Same protocol steps as SMTP.sendmail(), but without a full in-memory copy
+        server.ehlo_or_helo_if_needed()
+        code, resp = server.mail(message.sender)
+        if code != 250:
+            raise smtplib.SMTPSenderRefused(code, resp, message.sender)
+        code, resp = server.rcpt(message.recipient)
+        if code not in (250, 251):
+            raise smtplib.SMTPRecipientsRefused({message.recipient: (code, resp)})
+        code, resp = server.docmd('data')
+        if code != 354:
+            raise smtplib.SMTPDataError(code, resp)
+        write_data(server, message.iter_chunks())
+        code, resp = server.getreply()
+        if code != 250:
+            raise smtplib.SMTPDataError(code, resp)
+        return {}
+
+    def stats(self) -> Dict[str, int]:
+        """Current pool utilisation"""
+        with self._cond:
+            return {'in_use': self._in_use, 'idle': len(self._idle), 'max_size': self.max_size}
+
+    def close_all(self):
+        """Close every idle connection"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for server, _ in idle:
+            self._close(server)
+
+
+# Process-wide pools keyed by server and account
+_pools: Dict[Tuple[str, int, str], SMTPConnectionPool] = {}
+_pools_lock = threading.Lock()
+_pools_pid = os.getpid()
+
+
+def get_smtp_pool(host: str, port: int, username: str, password: str) -> SMTPConnectionPool:
+    """Return the shared pool for this server and account"""
+    global _pools_pid
+    key = (host, int(port), username)
+    with _pools_lock:
+        # Sockets inherited across fork must not be shared with the parent
+        if _pools_pid != os.getpid():
+            _pools.clear()
+            _pools_pid = os.getpid()
+        pool = _pools.get(key)
+        if pool is None or pool.password != password:
+            if pool is not None:
+                pool.close_all()
+            pool = SMTPConnectionPool(
+                host, int(port), username, password,
+                max_size=SMTP_POOL_CONFIG['max_size'],
+                idle_timeout=SMTP_POOL_CONFIG['idle_timeout'],
+                acquire_timeout=SMTP_POOL_CONFIG['acquire_timeout'],
+                starttls=EMAIL_CONFIG['smtp_starttls'],
+                connect_timeout=RESILIENCE_CONFIG['smtp']['connect_timeout'],
+                timeout=RESILIENCE_CONFIG['smtp']['timeout'],
+                breaker=get_breaker('smtp'),
+                retry=retry_policy('smtp')
+            )
+            _pools[key] = pool
+        return pool
+
+
+def pool_stats() -> Dict[str, int]:
+    """Utilisation summed over this process's pools"""
+    with _pools_lock:
+        pools = list(_pools.values()) if _pools_pid == os.getpid() else []
+    totals = {'in_use': 0, 'idle': 0, 'max_size': 0}
+    for pool in pools:
+        for name, value in pool.stats().items():
+            totals[name] += value
+    return totals
@@ -0,0 +1,167 @@
+"""
+Testimonials for Apply Boost Studio
+Loaded from a JSON data file and serialized once; filtered and paginated
+views are cached as bytes with their ETag until the data file changes
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+from typing import Any, Dict, List, Optional, Tuple
+from flask import Response, current_app, request
+from werkzeug.exceptions import BadRequest
+from config import TESTIMONIALS_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class SerializedView:
+    """JSON body of one testimonials query with its strong ETag"""
+
+    def __init__(self, items: List[Dict[str, Any]], total: int):
+        self.body = json.dumps(items, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+        self.total = total
+
+
+class TestimonialCatalog:
+    """Testimonials from a data file, reloaded only when the file changes"""
+
+    def __init__(self, path: str, check_interval: float = 1.0, cache_size: int = 128):
+        self.path = path
+        self.check_interval = check_interval
+        self.cache_size = cache_size
+        self.testimonials: List[Dict[str, Any]] = []
+        self._mtime = None
+        self._checked_at = 0.0
+        self._views: 'OrderedDict[Tuple, SerializedView]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._refresh(force=True)
+
+    def _refresh(self, force: bool = False):
+        """Reload if the data file's mtime changed (stat at most once per check_interval)"""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError as e:
+                logger.warning("Testimonials file unavailable: %s", e)
+                return
+            if mtime == self._mtime:
+                return
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    testimonials = json.load(f)
+            except (OSError, ValueError) as e:
+                # Keep serving the last good data while the file is being edited
+                logger.warning("Could not load testimonials: %s", e)
+                return
+            self.testimonials = testimonials
+            self._mtime = mtime
+            self._views = OrderedDict()
+
+    def view(self, company: Optional[str] = None, rating: Optional[int] = None,
+             min_rating: Optional[int] = None, page: Optional[int] = None,
+             per_page: Optional[int] = None) -> SerializedView:
+        """Serialized testimonials matching the filters, one page at a time if page is given"""
+        self._refresh()
+        key = (company.lower() if company else None, rating, min_rating, page, per_page)
+        with self._lock:
+            view = self._views.get(key)
+            if view is not None:
+                self._views.move_to_end(key)
+                return view
+            testimonials = self.testimonials
+
+        matches = [
+            t for t in testimonials
+            if (not company or str(t.get('company', '')).lower() == company.lower())
+            and (rating is None or t.get('rating') == rating)
+            and (min_rating is None or (t.get('rating') or 0) >= min_rating)
+        ]
+        if page is not None:
+            start = (page - 1) * per_page
+            items = matches[start:start + per_page]
+        else:
+            items = matches
+        view = SerializedView(items, len(matches))
+
+        with self._lock:
+            # Data reloaded while serializing: do not cache a stale view
+            if testimonials is self.testimonials:
+                self._views[key] = view
+                while len(self._views) > self.cache_size:
+                    self._views.popitem(last=False)
+        return view
+
+
+def _int_arg(name: str, minimum: int, maximum: Optional[int] = None) -> Optional[int]:
+    value = request.args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        raise BadRequest(f"'{name}' must be a whole number")
+    if number < minimum or (maximum is not None and number > maximum):
+        limit = f"between {minimum} and {maximum}" if maximum is not None else f"at least {minimum}"
+        raise BadRequest(f"'{name}' must be {limit}")
+    return number
+
+
+def testimonials_response() -> Response:
+    """Response for /api/testimonials: still a JSON list, paging details go in headers"""
+    catalog = current_app.extensions['testimonials']
+    max_per_page = TESTIMONIALS_CONFIG['max_per_page']
+    page = _int_arg('page', 1)
+    per_page = _int_arg('per_page', 1, max_per_page)
+    if per_page is not None and page is None:
+        page = 1
+    if page is not None and per_page is None:
+        per_page = TESTIMONIALS_CONFIG['default_per_page']
+
+    view = catalog.view(
+        company=request.args.get('company') or None,
+        rating=_int_arg('rating', 1, 5),
+        min_rating=_int_arg('min_rating', 1, 5),
+        page=page,
+        per_page=per_page
+    )
+
+    if request.if_none_match.contains(view.etag):
+        response = Response(status=304)
+    else:
+        response = Response(view.body, mimetype='application/json')
+    response.set_etag(view.etag)
+    response.headers['Cache-Control'] = f"public, max-age={TESTIMONIALS_CONFIG['max_age']}"
+    response.headers['X-Total-Count'] = str(view.total)
+    if page is not None:
+        links = []
+        if page * per_page < view.total:
+            links.append(f'<{_page_url(page + 1, per_page)}>; rel="next"')
+        if page > 1:
+            links.append(f'<{_page_url(page - 1, per_page)}>; rel="prev"')
+        if links:
+            response.headers['Link'] = ', '.join(links)
+    return response
+
+
+def _page_url(page: int, per_page: int) -> str:
+    args = request.args.to_dict()
+    args.update(page=page, per_page=per_page)
+    return f"{request.path}?{urlencode(args)}"
+
+
+def init_testimonials(app) -> TestimonialCatalog:
+    """Attach the testimonials catalog for the app's data file"""
+    catalog = TestimonialCatalog(app.config['TESTIMONIALS_FILE'], TESTIMONIALS_CONFIG['check_interval'])
+    app.extensions['testimonials'] = catalog
+    return catalog
@@ -0,0 +1,79 @@
+"""
+Upload Handling for Apply Boost Studio
+Validates resume uploads while the multipart body is still being parsed, so
+oversized or non-resume files are rejected before they are buffered or saved
+"""
+
+from tempfile import SpooledTemporaryFile
+from flask import Request, current_app
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+from app.utils import allowed_file
+
+# File signatures accepted for each resume extension
+MAGIC_NUMBERS = {
+    'pdf': b'%PDF-',
+    'doc': b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1',  # OLE2 compound document
+    'docx': b'PK\x03\x04'  # Office Open XML (zip)
+}
+
+
+def _format_size(num_bytes: int) -> str:
+    if num_bytes >= 1024 * 1024:
+        return f'{num_bytes / (1024 * 1024):.0f} MB'
+    return f'{num_bytes / 1024:.0f} KB'
+
+
+class ResumeUploadStream:
+    """Writable upload buffer that enforces a size cap and file signature per chunk"""
+
+    def __init__(self, filename: str, max_bytes: int, spool_size: int):
+        # Reject by extension before a single byte is stored
+        if not filename or not allowed_file(filename):
+            raise UnsupportedMediaType('Resume must be a PDF, DOC or DOCX file')
+        self.magic = MAGIC_NUMBERS[filename.rsplit('.', 1)[1].lower()]
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._head = b''
+        self._file = SpooledTemporaryFile(max_size=spool_size)
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            self._file.close()
+            raise RequestEntityTooLarge(f'Resume must be at most {_format_size(self.max_bytes)}')
+
+        if self._head is not None:
+            self._head += data[:len(self.magic) - len(self._head)]
+            if len(self._head) >= len(self.magic):
+                self._check_signature()
+        return self._file.write(data)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        # The parser rewinds once the part is complete; catch files too short to sniff
+        if self._head is not None:
+            self._check_signature()
+        return self._file.seek(offset, whence)
+
+    def _check_signature(self):
+        if self._head != self.magic:
+            self._file.close()
+            raise UnsupportedMediaType('Resume content does not match its file type')
+        self._head = None
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+    def __iter__(self):
+        return iter(self._file)
+
+
+class UploadRequest(Request):
+    """Request class whose resume part is validated while it streams in"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        # The resume is the only file field, so every named file part is checked as one
+        config = current_app.config
+        if not filename:
+            # No file chosen: browsers still send an empty part
+            return SpooledTemporaryFile(max_size=config['UPLOAD_SPOOL_SIZE'])
+        return ResumeUploadStream(filename, config['MAX_RESUME_BYTES'], config['UPLOAD_SPOOL_SIZE'])
@@ -1,11 +1,16 @@
 import os
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.base import MIMEBase
-from email import encoders
+import logging
 from datetime import datetime
 from config import EMAIL_CONFIG
+from app.smtp_pool import get_smtp_pool
+from app.mime_stream import StreamingEmail
+from app.lazy import lazy_import
+
+logger = logging.getLogger(__name__)
+
+# Only needed once a confirmation email is actually sent
+mime_text = lazy_import('email.mime.text')
+mime_multipart = lazy_import('email.mime.multipart')
 
 def allowed_file(filename):
     """Check if uploaded file has allowed extension"""
@@ -13,17 +18,18 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def _get_pool():
+    """Shared SMTP pool for the configured sender account"""
+    return get_smtp_pool(
+        EMAIL_CONFIG['smtp_server'], EMAIL_CONFIG['smtp_port'],
+        EMAIL_CONFIG['sender_email'], EMAIL_CONFIG['sender_password']
+    )
+
 def send_consultation_email(user_email, resume_filename, resume_path):
     """
     Send consultation scheduling email to admin with user details and resume attachment
     """
     try:
-        # Create message
-        msg = MIMEMultipart()
-        msg['From'] = EMAIL_CONFIG['sender_email']
-        msg['To'] = EMAIL_CONFIG['admin_email']
-        msg['Subject'] = f'New Consultation Request - {user_email}'
-        
         # Email body
         body = f"""
         New consultation request received!
@@ -40,32 +46,24 @@ def send_consultation_email(user_email, resume_filename, resume_path):
         Apply Boost Studio System
         """
         
-        msg.attach(MIMEText(body, 'plain'))
+        # Create message; the resume is encoded while it is being sent
+        msg = StreamingEmail(
+            EMAIL_CONFIG['sender_email'],
+            EMAIL_CONFIG['admin_email'],
+            f'New Consultation Request - {user_email}',
+            body
+        )
         
         # Attach resume file
         if os.path.exists(resume_path):
-            with open(resume_path, 'rb') as attachment:
-                part = MIMEBase('application', 'octet-stream')
-                part.set_payload(attachment.read())
-            
-            encoders.encode_base64(part)
-            part.add_header(
-                'Content-Disposition',
-                f'attachment; filename= {resume_filename}'
-            )
-            msg.attach(part)
-        
-        # Send email
-        server = smtplib.SMTP(EMAIL_CONFIG['smtp_server'], EMAIL_CONFIG['smtp_port'])
-        server.starttls()
-        server.login(EMAIL_CONFIG['sender_email'], EMAIL_CONFIG['sender_password'])
-        text = msg.as_string()
-        server.sendmail(EMAIL_CONFIG['sender_email'], EMAIL_CONFIG['admin_email'], text)
-        server.quit()
+            msg.attach_file(resume_path, resume_filename)
+        
+        # Send email over a pooled connection
+        _get_pool().send_streaming(msg)
         
         return True
     except Exception as e:
-        print(f"Email sending failed: {str(e)}")
+        logger.error("Email sending failed: %s", e)
         return False
 
 def send_confirmation_email(user_email, resume_filename):
@@ -73,7 +71,7 @@ def send_confirmation_email(user_email, resume_filename):
     Send confirmation email to user
     """
     try:
-        msg = MIMEMultipart()
+        msg = mime_multipart.MIMEMultipart()
         msg['From'] = EMAIL_CONFIG['sender_email']
         msg['To'] = user_email
         msg['Subject'] = 'Consultation Request Received - Apply Boost Studio'
@@ -97,16 +95,12 @@ def send_confirmation_email(user_email, resume_filename):
         The Apply Boost Studio Team
         """
         
-        msg.attach(MIMEText(body, 'plain'))
+        msg.attach(mime_text.MIMEText(body, 'plain'))
         
-        server = smtplib.SMTP(EMAIL_CONFIG['smtp_server'], EMAIL_CONFIG['smtp_port'])
-        server.starttls()
-        server.login(EMAIL_CONFIG['sender_email'], EMAIL_CONFIG['sender_password'])
         text = msg.as_string()
-        server.sendmail(EMAIL_CONFIG['sender_email'], user_email, text)
-        server.quit()
+        _get_pool().sendmail(EMAIL_CONFIG['sender_email'], user_email, text)
         
         return True
     except Exception as e:
-        print(f"Confirmation email sending failed: {str(e)}")
+        logger.error("Confirmation email sending failed: %s", e)
         return False 
\ No newline at end of file
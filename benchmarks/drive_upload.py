@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Drive Upload Benchmark for Apply Boost Studio
+Runs GoogleDriveManager uploads and batch housekeeping against the offline
+LocalDriveBackend so concurrency limits, retries and throughput can be
+measured without the real API. Failures and latency are seeded, so two runs
+with the same arguments see the same injected errors.
+
+    python benchmarks/drive_upload.py --files 200 --size-kb 256 --concurrency 1 4 8 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.drive_backends import LocalDriveBackend
+from app.google_drive_utils import FolderCache, GoogleDriveManager
+from app.resume_store import ResumeStore
+
+
+def make_files(directory: str, count: int, size: int, seed: int):
+    """Distinct files whose content (and so SHA-256) only depends on the seed"""
+    files = []
+    for i in range(count):
+        path = os.path.join(directory, f'resume{i}.pdf')
+        block = hashlib.sha256(f'{seed}:{i}'.encode()).digest()
+        content = (b'%PDF-1.4\n' + block * (size // len(block) + 1))[:max(size, 9)]
+        with open(path, 'wb') as f:
+            f.write(content)
+        files.append((path, hashlib.sha256(content).hexdigest()))
+    return files
+
+
+async def run_uploads(manager: GoogleDriveManager, files):
+    return await asyncio.gather(*(
+        manager.upload_file(path, os.path.basename(path), f'bench{i}@example.com', sha256)
+        for i, (path, sha256) in enumerate(files)
+    ))
+
+
+def run_case(args, files, workdir: str, concurrency: int):
+    backend = LocalDriveBackend(
+        os.path.join(workdir, f'drive-{concurrency}'),
+        latency=(args.latency * 0.5, args.latency * 1.5) if args.latency else 0,
+        error_rate={'upload': args.upload_error_rate, 'batch_item': args.batch_error_rate},
+        seed=args.seed,
+        bandwidth=args.bandwidth_kb * 1024 if args.bandwidth_kb else None
+    )
+    manager = GoogleDriveManager(backend=backend)
+    manager.set_concurrency(concurrency)
+    manager.upload_chunk_size = args.chunk_kb * 1024
+    manager.checkpoint_dir = os.path.join(workdir, f'checkpoints-{concurrency}')
+    manager.folder_cache = FolderCache(path=None)
+    manager.batch_retry_delay = args.batch_retry_delay
+    # Fresh delivery records per run, otherwise every upload after the first run is skipped
+    manager.resume_store = ResumeStore(os.path.join(workdir, f'store-{concurrency}'))
+
+    # The manager narrates every upload; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        results = asyncio.run(run_uploads(manager, files))
+        upload_seconds = time.perf_counter() - start
+
+        uploaded = [r for r in results if r]
+        start = time.perf_counter()
+        batch = asyncio.run(manager.batch_update(
+            [{'action': 'trash', 'file_id': r['file_id']} for r in uploaded]
+        ))
+        batch_seconds = time.perf_counter() - start
+
+    total_bytes = sum(os.path.getsize(path) for path, _ in files)
+    return {
+        'concurrency': concurrency,
+        'uploads': len(files),
+        'upload_failures': len(files) - len(uploaded),
+        'upload_seconds': round(upload_seconds, 3),
+        'files_per_second': round(len(uploaded) / upload_seconds, 2) if upload_seconds else None,
+        'mb_per_second': round(manager.bytes_uploaded / upload_seconds / (1024 * 1024), 2) if upload_seconds else None,
+        'input_mb': round(total_bytes / (1024 * 1024), 2),
+        'batch_items': len(batch),
+        'batch_failures': sum(1 for r in batch if not r['success']),
+        'batch_retries': sum(r['attempts'] - 1 for r in batch),
+        'batch_seconds': round(batch_seconds, 3),
+        'backend_calls': dict(backend.calls),
+        'injected_errors': dict(backend.errors)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Drive upload path against the local fake backend')
+    parser.add_argument('--files', type=int, default=50, help='Files to upload per run')
+    parser.add_argument('--size-kb', type=int, default=256, help='Size of each file')
+    parser.add_argument('--chunk-kb', type=int, default=256, help='Resumable chunk size')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help='max_concurrent_uploads values to compare')
+    parser.add_argument('--latency', type=float, default=0.02, help='Mean seconds added to each backend call')
+    parser.add_argument('--bandwidth-kb', type=int, default=0, help='Simulated upload bandwidth per connection (0 = unlimited)')
+    parser.add_argument('--upload-error-rate', type=float, default=0.0, help='Share of upload calls failing with 503')
+    parser.add_argument('--batch-error-rate', type=float, default=0.05, help='Share of batch items failing with 503')
+    parser.add_argument('--batch-retry-delay', type=float, default=0.01, help='Base backoff between batch retries')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for injected latency and errors')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='drive-bench-') as workdir:
+        files = make_files(workdir, args.files, args.size_kb * 1024, args.seed)
+        results = [run_case(args, files, workdir, concurrency) for concurrency in args.concurrency]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'concurrency':>11} {'files/s':>9} {'MB/s':>7} {'failed':>7} {'batch s':>8} {'retries':>8}")
+    for r in results:
+        print(f"{r['concurrency']:>11} {r['files_per_second']:>9} {r['mb_per_second']:>7} "
+              f"{r['upload_failures']:>7} {r['batch_seconds']:>8} {r['batch_retries']:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+HTTP Serving Benchmark for Apply Boost Studio
+Starts the Werkzeug dev server (what `python run.py` runs) and gunicorn with
+gunicorn.conf.py, drives both with the same keep-alive load and reports
+requests per second and latency. --slow-clients adds connections that trickle
+an upload body, to show whether one slow client stalls other requests.
+
+    python benchmarks/http_serving.py --duration 10 --clients 16 --slow-clients 4
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PATHS = ['/', '/get-started', '/api/testimonials']
+
+
+def start_server(kind: str, port: int, workdir: str, args) -> subprocess.Popen:
+    env = dict(os.environ,
+               JOB_QUEUE_DB=os.path.join(workdir, f'{kind}-jobs.sqlite3'),
+               UPLOAD_FOLDER=os.path.join(workdir, f'{kind}-uploads'),
+               JOB_WORKERS_AUTOSTART='0',
+               BIND=f'127.0.0.1:{port}')
+    if kind == 'dev':
+        code = f"from run import app; app.run(host='127.0.0.1', port={port}, debug={args.dev_debug})"
+        command = [sys.executable, '-c', code]
+    else:
+        if args.worker_class:
+            env['GUNICORN_WORKER_CLASS'] = args.worker_class
+        if args.workers:
+            env['WEB_CONCURRENCY'] = str(args.workers)
+        command = [sys.executable, '-m', 'gunicorn', '--access-logfile', os.devnull, '--log-level', 'warning']
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"{kind} server did not start on port {port}")
+
+
+def slow_client(port: int, stop: threading.Event):
+    """Upload that sends one byte every half second until the run ends"""
+    try:
+        sock = socket.create_connection(('127.0.0.1', port))
+        sock.sendall(b'POST /api/submit-form HTTP/1.1\r\nHost: localhost\r\n'
+                     b'Content-Type: multipart/form-data; boundary=slowclient\r\n'
+                     b'Content-Length: 1000000\r\n\r\n'
+                     b'--slowclient\r\nContent-Disposition: form-data; name="name"\r\n\r\n')
+        while not stop.wait(0.5):
+            sock.sendall(b'x')
+        sock.close()
+    except OSError:
+        pass
+
+
+def load_client(port: int, stop: threading.Event, latencies: list, errors: list):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    i = 0
+    while not stop.is_set():
+        path = PATHS[i % len(PATHS)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            conn.request('GET', path)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+            if response.will_close:
+                conn.close()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            # Keep-alive connection closed by a recycled worker; browsers retry these too
+            conn.close()
+            continue
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            conn.close()
+            continue
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+
+
+def percentile(values, p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def run_case(kind: str, port: int, workdir: str, args):
+    process = start_server(kind, port, workdir, args)
+    stop = threading.Event()
+    latencies, errors = [], []
+    try:
+        slow = [threading.Thread(target=slow_client, args=(port, stop), daemon=True) for _ in range(args.slow_clients)]
+        for thread in slow:
+            thread.start()
+        time.sleep(0.5 if slow else 0)
+        clients = [threading.Thread(target=load_client, args=(port, stop, latencies, errors), daemon=True)
+                   for _ in range(args.clients)]
+        start = time.perf_counter()
+        for thread in clients:
+            thread.start()
+        time.sleep(args.duration)
+        stop.set()
+        for thread in clients:
+            thread.join(15)
+        elapsed = time.perf_counter() - start
+    finally:
+        process.terminate()
+        try:
+            process.wait(15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return {
+        'server': kind,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare the dev server with gunicorn')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds of load per server')
+    parser.add_argument('--clients', type=int, default=16, help='Concurrent keep-alive clients')
+    parser.add_argument('--slow-clients', type=int, default=0, help='Connections trickling an upload body')
+    parser.add_argument('--worker-class', choices=['sync', 'gthread', 'gevent'], help='Override the gunicorn worker class')
+    parser.add_argument('--workers', type=int, help='Override the gunicorn worker count')
+    parser.add_argument('--dev-debug', action='store_true', help='Run the dev server with debug=True like run.py')
+    parser.add_argument('--port', type=int, default=5091)
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = [run_case('dev', args.port, workdir, args), run_case('gunicorn', args.port + 1, workdir, args)]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'server':<10} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for r in results:
+        print(f"{r['server']:<10} {r['requests']:>9} {r['errors']:>7} {r['rps']:>9.1f} {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Import-Time Benchmark for Apply Boost Studio
+Runs a cold interpreter with `-X importtime` and breaks the start-up cost of a
+statement (create_app() by default) down by module. Fails when one of the
+deferred heavy modules is imported, or when --budget-ms is exceeded.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --stmt "import app.google_drive_utils" --top 30
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_STMT = "from app import create_app; create_app({'JOB_WORKERS_AUTOSTART': False})"
+
+# Loaded on first use only (see app/lazy.py)
+DEFERRED_MODULES = [
+    'googleapiclient', 'google_auth_oauthlib', 'google_auth_httplib2', 'google.oauth2',
+    'google.auth.transport.requests', 'httplib2', 'email.mime', 'email.policy'
+]
+
+
+def parse_importtime(stderr: str):
+    """(module, self_us, cumulative_us, depth) for every line of -X importtime output"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        parts = line[len('import time:'):].split('|')
+        self_us, cumulative_us, raw_name = int(parts[0]), int(parts[1]), parts[2]
+        name = raw_name.strip()
+        depth = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        modules.append((name, self_us, cumulative_us, depth))
+    return modules
+
+
+def run_once(stmt: str):
+    """Import breakdown and wall time of stmt in a fresh interpreter"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='', JOB_WORKERS_AUTOSTART='0')
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', stmt], cwd=ROOT, env=env,
+                            capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    return parse_importtime(result.stderr), wall
+
+
+def deferred_loaded(modules) -> list:
+    names = {name for name, _, _, _ in modules}
+    return sorted(name for name in names
+                  if any(name == deferred or name.startswith(deferred + '.') for deferred in DEFERRED_MODULES))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Break down import cost of a cold start')
+    parser.add_argument('--stmt', default=DEFAULT_STMT, help='Statement to time')
+    parser.add_argument('--runs', type=int, default=5, help='Cold interpreters to start (median is reported)')
+    parser.add_argument('--top', type=int, default=20, help='Top-level imports to list')
+    parser.add_argument('--budget-ms', type=float, help='Fail if the median import time exceeds this')
+    args = parser.parse_args(argv)
+
+    runs = [run_once(args.stmt) for _ in range(args.runs)]
+    totals = [sum(cumulative for _, _, cumulative, depth in modules if depth == 0) / 1000 for modules, _ in runs]
+    walls = [wall * 1000 for _, wall in runs]
+    modules = runs[totals.index(sorted(totals)[len(totals) // 2])][0]
+
+    print(f"Statement: {args.stmt}")
+    print(f"Imports: {statistics.median(totals):.1f} ms median over {args.runs} run(s) "
+          f"(process wall time {statistics.median(walls):.1f} ms), {len(modules)} modules")
+    print(f"\n{'cumulative ms':>14} {'self ms':>8}  top-level module")
+    top_level = sorted((m for m in modules if m[3] == 0), key=lambda m: m[2], reverse=True)
+    for name, self_us, cumulative_us, _ in top_level[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>8.1f}  {name}")
+
+    failed = False
+    loaded = deferred_loaded(modules)
+    if loaded:
+        print(f"\nFAIL: deferred modules imported at start-up: {', '.join(loaded)}")
+        failed = True
+    if args.budget_ms is not None and statistics.median(totals) > args.budget_ms:
+        print(f"\nFAIL: {statistics.median(totals):.1f} ms exceeds the {args.budget_ms:.1f} ms budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
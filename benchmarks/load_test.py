@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Load Test Suite for Apply Boost Studio
+Runs the real app under gunicorn (gunicorn.conf.py, several worker processes,
+job workers on) with email going to a local SMTP sink, and measures:
+
+  micro   every route through the in-process test client (no network; RSS is
+          this process's peak)
+  pages   keep-alive GETs of every page and /api/testimonials
+  submit  multipart /api/submit-form with resumes of realistic, seeded sizes,
+          then the time until the sink has received every notification email
+
+Each scenario reports requests per second, p50/p95/p99 latency and the peak
+RSS of the server (master plus workers). Results can be saved as a JSON
+baseline; later runs fail (exit 1) when throughput, p95 or RSS regress by more
+than --threshold against it.
+
+    python benchmarks/load_test.py --save-baseline
+    python benchmarks/load_test.py --threshold 0.25
+    python benchmarks/load_test.py --scenarios submit --duration 20 --json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from http_serving import percentile
+from smtp_sink import SMTPSink
+
+PAGES = ['/', '/get-started', '/resume-builder', '/login', '/profile', '/api/testimonials']
+# (size in KB, weight): most resumes are small text PDFs, a few carry images
+RESUME_SIZES = [(40, 30), (120, 35), (350, 20), (900, 10), (2500, 5)]
+SCENARIOS = ['micro', 'pages', 'submit']
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baselines', 'load_test.json')
+BOUNDARY = 'ajfmloadtest'
+
+
+def resume_body(rng: random.Random, i: int):
+    """Multipart form with a unique resume, so no two submissions share a stored file"""
+    size_kb = rng.choices([s for s, _ in RESUME_SIZES], weights=[w for _, w in RESUME_SIZES])[0]
+    resume = b'%PDF-1.4\n' + f'% submission {i} {rng.getrandbits(64):016x}\n'.encode()
+    resume += bytes(rng.getrandbits(8) for _ in range(256)) * (size_kb * 4)
+    parts = []
+    for name, value in (('name', f'Load Test {i}'), ('email', f'load{i}@example.com'), ('phone', '555-0100')):
+        parts.append(f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    parts.append(f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="resume"; filename="resume{i}.pdf"\r\n'
+                 f'Content-Type: application/pdf\r\n\r\n'.encode() + resume + b'\r\n')
+    parts.append(f'--{BOUNDARY}--\r\n'.encode())
+    return b''.join(parts)
+
+
+def process_tree_rss(pid: int) -> int:
+    """Resident memory in bytes of pid and its direct children (gunicorn workers)"""
+    def rss(p):
+        try:
+            with open(f'/proc/{p}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+        return 0
+
+    total = rss(pid)
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    if int(f.read().rsplit(')', 1)[1].split()[1]) == pid:
+                        total += rss(entry)
+            except (OSError, IndexError, ValueError):
+                continue
+    return total
+
+
+class PeakRSS:
+    """Samples the server's memory in the background; .peak is the highest seen"""
+
+    def __init__(self, pid: int, interval: float = 0.2):
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, process_tree_rss(self.pid))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        if os.path.isdir('/proc'):
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+
+def start_server(port: int, workdir: str, smtp_port: int, args) -> subprocess.Popen:
+    env = dict(os.environ,
+               BIND=f'127.0.0.1:{port}',
+               WEB_CONCURRENCY=str(args.workers),
+               GUNICORN_THREADS=str(args.threads),
+               JOB_QUEUE_DB=os.path.join(workdir, 'jobs.sqlite3'),
+               JOB_WORKERS_AUTOSTART='1',
+               UPLOAD_FOLDER=os.path.join(workdir, 'uploads'),
+               METRICS_DIR=os.path.join(workdir, 'metrics'),
+               SMTP_SERVER='127.0.0.1',
+               SMTP_PORT=str(smtp_port),
+               SMTP_STARTTLS='0',
+               SENDER_EMAIL='loadtest@example.com',
+               SENDER_PASSWORD='loadtest-password',
+               LOG_LEVEL='WARNING',
+               ADMISSION_LIMIT=str(args.admission_limit),
+               ADMISSION_DIR=os.path.join(workdir, 'admission'),
+               # Every client is 127.0.0.1, so one bucket would throttle the whole run
+               RATE_LIMIT_ENABLED='0')
+    command = [sys.executable, '-m', 'gunicorn', '--access-logfile', os.devnull, '--log-level', 'warning']
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"gunicorn did not start on port {port}")
+
+
+def client_loop(port: int, stop: threading.Event, make_request, latencies: list, errors: list, accepted: list):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    while not stop.is_set():
+        method, path, body, headers = make_request()
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.will_close:
+                conn.close()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            # Keep-alive connection closed by a recycled worker
+            conn.close()
+            continue
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            conn.close()
+            continue
+        latencies.append(time.perf_counter() - start)
+        if response.status >= 400:
+            errors.append(response.status)
+        elif method == 'POST':
+            accepted.append(1)
+    conn.close()
+
+
+def summarize(name: str, latencies, errors, elapsed: float, peak_rss: int = 0, **extra):
+    result = {
+        'scenario': name,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'peak_rss_mb': peak_rss / 1e6
+    }
+    result.update(extra)
+    return result
+
+
+def run_load(name: str, port: int, pid: int, make_request, args, sink=None):
+    stop = threading.Event()
+    latencies, errors, accepted = [], [], []
+    messages_before = sink.messages if sink else 0
+    with PeakRSS(pid) as memory:
+        clients = [threading.Thread(target=client_loop, args=(port, stop, make_request, latencies, errors, accepted),
+                                    daemon=True) for _ in range(args.clients)]
+        start = time.perf_counter()
+        for thread in clients:
+            thread.start()
+        time.sleep(args.duration)
+        stop.set()
+        for thread in clients:
+            thread.join(60)
+        elapsed = time.perf_counter() - start
+        extra = {}
+        if sink is not None:
+            # Submissions return 202 once queued; emails go out from the job workers
+            delivered = sink.wait_for(messages_before + len(accepted), args.drain_timeout)
+            extra = {
+                'emails': sink.messages - messages_before,
+                'email_drain_s': time.perf_counter() - start - elapsed,
+                'emails_complete': delivered
+            }
+    return summarize(name, latencies, errors, elapsed, memory.peak, **extra)
+
+
+def run_micro(args):
+    """Every route through Flask's test client in this process, sequentially"""
+    from app import create_app
+    from app.logs import configure_logging
+
+    configure_logging(level='WARNING')
+    with tempfile.TemporaryDirectory() as workdir:
+        app = create_app({
+            'TESTING': True,
+            'UPLOAD_FOLDER': os.path.join(workdir, 'uploads'),
+            'JOB_QUEUE_PATH': os.path.join(workdir, 'jobs.sqlite3'),
+            'JOB_WORKERS_AUTOSTART': False,
+            # As in start_server: every request comes from one client
+            'RATE_LIMIT_ENABLED': False,
+            'ADMISSION_LIMIT': args.admission_limit
+        })
+        client = app.test_client()
+        rng = random.Random(args.seed)
+        results = []
+        for path in PAGES:
+            # Warm-up: the first requests pay for template loading and the page cache
+            for _ in range(20):
+                client.get(path)
+        for path in PAGES + ['/api/submit-form']:
+            latencies, errors = [], []
+            start = time.perf_counter()
+            for i in range(args.micro_iterations):
+                begin = time.perf_counter()
+                if path == '/api/submit-form':
+                    response = client.post(path, data=resume_body(rng, i),
+                                           content_type=f'multipart/form-data; boundary={BOUNDARY}')
+                else:
+                    response = client.get(path)
+                latencies.append(time.perf_counter() - begin)
+                if response.status_code >= 400:
+                    errors.append(response.status_code)
+            results.append(summarize(f'micro {path}', latencies, errors, time.perf_counter() - start,
+                                     resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024))
+        return results
+
+
+def run_suite(args):
+    results = []
+    if 'micro' in args.scenarios:
+        results.extend(run_micro(args))
+    if not {'pages', 'submit'} & set(args.scenarios):
+        return results
+
+    with tempfile.TemporaryDirectory() as workdir, SMTPSink() as sink:
+        process = start_server(args.port, workdir, sink.address[1], args)
+        try:
+            if 'pages' in args.scenarios:
+                counter = iter(range(1 << 62))
+                results.append(run_load('pages', args.port, process.pid,
+                                        lambda: ('GET', PAGES[next(counter) % len(PAGES)], None, {}), args))
+            if 'submit' in args.scenarios:
+                rng, lock, counter = random.Random(args.seed), threading.Lock(), iter(range(1 << 62))
+
+                def submission():
+                    with lock:
+                        body = resume_body(rng, next(counter))
+                    return 'POST', '/api/submit-form', body, {
+                        'Content-Type': f'multipart/form-data; boundary={BOUNDARY}'}
+
+                results.append(run_load('submit', args.port, process.pid, submission, args, sink=sink))
+        finally:
+            process.terminate()
+            try:
+                process.wait(30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+    return results
+
+
+def compare(results, baseline, threshold: float, min_delta_ms: float = 1.0):
+    """Regression messages: slower throughput, higher p95 or more memory than the baseline allows"""
+    previous = {r['scenario']: r for r in baseline['results']}
+    failures = []
+    for result in results:
+        base = previous.get(result['scenario'])
+        if base is None:
+            continue
+        if result['rps'] < base['rps'] * (1 - threshold):
+            failures.append(f"{result['scenario']}: {result['rps']:.1f} req/s vs baseline {base['rps']:.1f}")
+        # Sub-millisecond latencies jitter by more than the threshold between runs
+        if result['p95_ms'] > max(base['p95_ms'] * (1 + threshold), base['p95_ms'] + min_delta_ms):
+            failures.append(f"{result['scenario']}: p95 {result['p95_ms']:.1f} ms vs baseline {base['p95_ms']:.1f}")
+        if base['peak_rss_mb'] and result['peak_rss_mb'] > base['peak_rss_mb'] * (1 + threshold):
+            failures.append(f"{result['scenario']}: peak RSS {result['peak_rss_mb']:.0f} MB "
+                            f"vs baseline {base['peak_rss_mb']:.0f}")
+        if result['errors'] > base['errors']:
+            failures.append(f"{result['scenario']}: {result['errors']} error(s) vs baseline {base['errors']}")
+        if result.get('emails_complete') is False:
+            failures.append(f"{result['scenario']}: not every notification email reached the SMTP sink")
+    return failures
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Load test the app and compare with a saved baseline')
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument('--duration', type=float, default=10, help='Seconds of load per server scenario')
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent keep-alive clients')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=4, help='Threads per gunicorn worker')
+    parser.add_argument('--admission-limit', type=int, default=-1,
+                        help='Concurrent /api submissions allowed (-1 = off, so 503s never count as regressions)')
+    parser.add_argument('--micro-iterations', type=int, default=500, help='Test client requests per route')
+    parser.add_argument('--drain-timeout', type=float, default=120, help='Seconds to wait for queued emails')
+    parser.add_argument('--seed', type=int, default=1, help='Seed for resume sizes and content')
+    parser.add_argument('--port', type=int, default=5093)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file')
+    parser.add_argument('--save-baseline', action='store_true', help='Write the results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed regression as a fraction (0.2 = 20%%)')
+    parser.add_argument('--min-delta-ms', type=float, default=1.0, help='Ignore p95 increases smaller than this')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args(argv)
+
+    results = run_suite(args)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'scenario':<28} {'requests':>8} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+              f"{'p99 ms':>8} {'RSS MB':>7}")
+        for r in results:
+            print(f"{r['scenario']:<28} {r['requests']:>8} {r['errors']:>6} {r['rps']:>8.1f} {r['p50_ms']:>8.1f} "
+                  f"{r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['peak_rss_mb']:>7.0f}")
+            if 'emails' in r:
+                print(f"{'':<28} {r['emails']} email(s) delivered, queue drained {r['email_drain_s']:.1f} s after load")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'machine': {'python': platform.python_version(), 'cpus': os.cpu_count(), 'platform': platform.platform()},
+                'settings': {name: getattr(args, name) for name in ('duration', 'clients', 'workers', 'threads',
+                                                                   'micro_iterations', 'seed')},
+                'results': results
+            }, f, indent=2)
+            f.write('\n')
+        print(f"\nBaseline saved to {os.path.relpath(args.baseline, ROOT)}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {os.path.relpath(args.baseline, ROOT)}; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline) as f:
+        failures = compare(results, json.load(f), args.threshold, args.min_delta_ms)
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    print(f"\n{'FAIL' if failures else 'OK'}: compared with {os.path.relpath(args.baseline, ROOT)} "
+          f"(threshold {args.threshold:.0%})")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Local SMTP Sink for Apply Boost Studio Benchmarks
+A threaded SMTP server that accepts any login and message and throws the
+message away, counting messages and bytes. Point the app at it with
+SMTP_SERVER/SMTP_PORT and SMTP_STARTTLS=0 (or pass certfile/keyfile to offer
+STARTTLS, which smtplib accepts without verifying the certificate).
+
+    python benchmarks/smtp_sink.py --port 2525
+"""
+
+import argparse
+import socketserver
+import ssl
+import threading
+import time
+from typing import Optional
+
+
+class _SMTPSession(socketserver.StreamRequestHandler):
+    """One client connection: just enough of RFC 5321 for smtplib"""
+
+    def reply(self, line: str):
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+        self.wfile.flush()
+
+    def handle(self):
+        sink = self.server.sink
+        self.reply('220 ajfm-sink ESMTP ready')
+        while True:
+            line = self.rfile.readline(65536)
+            if not line:
+                return
+            command, _, argument = line.decode('utf-8', 'replace').strip().partition(' ')
+            command = command.upper()
+            if command in ('EHLO', 'HELO'):
+                extensions = ['AUTH PLAIN', 'SIZE 52428800', '8BITMIME']
+                if sink.tls_context is not None and not isinstance(self.connection, ssl.SSLSocket):
+                    extensions.append('STARTTLS')
+                lines = ['ajfm-sink'] + extensions
+                for extension in lines[:-1]:
+                    self.reply(f'250-{extension}')
+                self.reply(f'250 {lines[-1]}')
+            elif command == 'STARTTLS' and sink.tls_context is not None:
+                self.reply('220 Ready to start TLS')
+                self.connection = sink.tls_context.wrap_socket(self.connection, server_side=True)
+                self.rfile = self.connection.makefile('rb')
+                self.wfile = self.connection.makefile('wb')
+            elif command == 'AUTH':
+                # AUTH PLAIN, with or without the initial response; any credentials pass
+                if ' ' not in argument:
+                    self.reply('334 ')
+                    self.rfile.readline()
+                self.reply('235 Authentication successful')
+            elif command in ('MAIL', 'RCPT', 'RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                size = 0
+                while True:
+                    chunk = self.rfile.readline(1 << 20)
+                    if not chunk or chunk == b'.\r\n':
+                        break
+                    size += len(chunk)
+                sink.record(size)
+                self.reply('250 Queued')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SMTPSink:
+    """Background SMTP server counting what it receives"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0,
+                 certfile: Optional[str] = None, keyfile: Optional[str] = None):
+        self.tls_context = None
+        if certfile:
+            self.tls_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            self.tls_context.load_cert_chain(certfile, keyfile)
+        self._server = _Server((host, port), _SMTPSession)
+        self._server.sink = self
+        self._thread = None
+        self._cond = threading.Condition()
+        self.messages = 0
+        self.bytes = 0
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def record(self, size: int):
+        with self._cond:
+            self.messages += 1
+            self.bytes += size
+            self._cond.notify_all()
+
+    def wait_for(self, messages: int, timeout: float) -> bool:
+        """Block until at least this many messages have arrived"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self.messages < messages:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def start(self) -> 'SMTPSink':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='smtp-sink', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run an SMTP server that discards every message')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=2525)
+    parser.add_argument('--certfile', help='Certificate for STARTTLS (off without one)')
+    parser.add_argument('--keyfile')
+    args = parser.parse_args(argv)
+
+    with SMTPSink(args.host, args.port, args.certfile, args.keyfile) as sink:
+        print(f"SMTP sink on {sink.address[0]}:{sink.address[1]} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(5)
+                print(f"{sink.messages} message(s), {sink.bytes / 1e6:.1f} MB")
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,11 @@
 # Email Configuration for Apply Boost Studio
 # Update these settings with your actual email credentials
+import os
 
 EMAIL_CONFIG = {
-    'smtp_server': 'smtp.gmail.com',  # Gmail SMTP server
-    'smtp_port': 587,  # TLS port
+    'smtp_server': os.environ.get('SMTP_SERVER', 'smtp.gmail.com'),  # Gmail SMTP server
+    'smtp_port': int(os.environ.get('SMTP_PORT', 587)),  # TLS port
+    'smtp_starttls': os.environ.get('SMTP_STARTTLS', '1') == '1',  # Upgrade to TLS before logging in
     'sender_email': 'your-email@gmail.com',  # Your Gmail address
     'sender_password': 'your-app-password',  # Gmail App Password (not regular password)
     'admin_email': 'admin@applybooststudio.com'  # Admin email to receive consultation requests
@@ -14,7 +16,28 @@ GOOGLE_DRIVE_CONFIG = {
     'credentials_file': 'credentials.json',  # Path to your Google Drive API credentials
     'token_file': 'token.json',  # Path to store OAuth token
     'folder_id': '10SdBlXu6SfS9K0ou6akgTNvSFbO0auWW',  # Google Drive folder ID where files will be uploaded
-    'scopes': ['https://www.googleapis.com/auth/drive.file']  # Required scopes
+    'scopes': ['https://www.googleapis.com/auth/drive.file'],  # Required scopes
+    'token_refresh_margin': 300,  # Refresh the shared token this many seconds before it expires
+    'token_refresh_interval': 60,  # Longest sleep between background token checks
+    'token_refresh_max_backoff': 600,  # Longest wait between retries while refreshing keeps failing
+    'max_workers': 8,  # Threads running blocking Drive API calls
+    'max_concurrent_uploads': 4,  # Uploads allowed in flight at once
+    'upload_chunk_size': 5 * 1024 * 1024,  # Resumable upload chunk size (multiple of 256 KB)
+    'checkpoint_dir': os.environ.get('DRIVE_CHECKPOINT_DIR', 'drive_uploads'),  # Resumable session checkpoints
+    'list_page_size': 100,  # Files per files().list page (Drive allows up to 1000)
+    'batch_size': 100,  # Metadata calls per HTTP batch request (Drive maximum is 100)
+    'batch_max_attempts': 4,  # Attempts for batch items failing with retryable errors
+    'batch_retry_delay': 1.0,  # Base backoff in seconds between batch retries
+    'shard_by': 'day',  # Upload into dated subfolders: 'day' (YYYY-MM/YYYY-MM-DD), 'month' or None
+    'folder_cache_size': 256,  # Folder name -> ID entries kept in memory
+    'folder_cache_ttl': 24 * 60 * 60,  # Seconds a cached folder ID is trusted
+    'folder_cache_file': 'drive_uploads/folders.json',  # Persist the folder cache across restarts (None to disable)
+    'backlog_manifest': 'drive_uploads/backlog_manifest.jsonl',  # Files already sent by upload_backlog.py
+    'backend': os.environ.get('DRIVE_BACKEND', 'google'),  # 'google', or 'local' for the offline filesystem fake
+    'local_dir': os.environ.get('DRIVE_LOCAL_DIR', 'drive_local'),  # Where the local backend keeps files
+    'local_latency': float(os.environ.get('DRIVE_LOCAL_LATENCY', 0)),  # Seconds added to each local backend call
+    'local_error_rate': float(os.environ.get('DRIVE_LOCAL_ERROR_RATE', 0)),  # Share of local calls failing with 503
+    'local_seed': int(os.environ.get('DRIVE_LOCAL_SEED', 0))  # Makes injected latency and errors reproducible
 }
 
 # Notification Configuration
@@ -32,6 +55,147 @@ NOTIFICATION_CONFIG = {
     '''
 }
 
+# Resume Upload Configuration
+UPLOAD_CONFIG = {
+    'folder': os.environ.get('UPLOAD_FOLDER', 'uploads'),  # Content-addressed resume store
+    'max_resume_bytes': int(os.environ.get('MAX_RESUME_BYTES', 10 * 1024 * 1024)),  # Largest accepted resume
+    'form_overhead_bytes': 64 * 1024,  # Allowance for the other form fields in the request body
+    'spool_size': 512 * 1024,  # Uploads larger than this are buffered on disk while parsing
+    'chunk_size': 64 * 1024  # Copy buffer used when saving the resume
+}
+
+# SMTP Connection Pool Configuration (shared by every email sender)
+SMTP_POOL_CONFIG = {
+    'max_size': int(os.environ.get('SMTP_POOL_SIZE', 4)),  # Maximum open connections per account
+    'idle_timeout': 60,  # Seconds before an idle connection is closed
+    'acquire_timeout': 30  # Seconds to wait for a free connection when the pool is full
+}
+
+# Rendered Page Cache Configuration (pages that only change between deploys)
+PAGE_CACHE_CONFIG = {
+    'pages': ['home.html', 'get_started.html', 'resume_builder.html', 'login.html', 'profile.html'],
+    'prerender': os.environ.get('PAGE_CACHE_PRERENDER', '1') == '1',  # Render the pages in create_app()
+    'max_age': int(os.environ.get('PAGE_CACHE_MAX_AGE', 300)),  # Cache-Control max-age for browsers and proxies
+    'min_compress_size': 1024,  # Smaller pages are not worth compressing
+    'gzip_level': 9,  # Compressed once per deploy, so use the best ratio
+    'brotli_quality': 11  # Used when the optional Brotli package is installed
+}
+
+# Static Asset Pipeline Configuration (flask assets build)
+ASSET_CONFIG = {
+    'output_dir': 'dist',  # Fingerprinted files and manifest.json, under the static folder
+    'hash_length': 10,  # Hex digits of the content hash in file names
+    'min_compress_size': 512,  # Smaller text files are not precompressed
+    'image_widths': [480, 960, 1440],  # WebP variant widths for srcset (the original width is always added)
+    'webp_quality': 80,
+    'max_age': 365 * 24 * 60 * 60  # Cache-Control max-age for fingerprinted files
+}
+
+# Testimonials API Configuration
+TESTIMONIALS_CONFIG = {
+    'data_file': os.environ.get('TESTIMONIALS_FILE', 'data/testimonials.json'),  # Relative to the project root
+    'check_interval': 1.0,  # Seconds between checks of the data file's mtime
+    'max_age': 300,  # Cache-Control max-age for /api/testimonials
+    'default_per_page': 10,
+    'max_per_page': 50
+}
+
+# Production Server Configuration (gunicorn.conf.py)
+SERVER_CONFIG = {
+    'bind': os.environ.get('BIND', '0.0.0.0:5000'),
+    'worker_class': os.environ.get('GUNICORN_WORKER_CLASS', 'gthread'),  # sync, gthread or gevent
+    'workers': int(os.environ.get('WEB_CONCURRENCY', 0)),  # 0 = derive from the CPU count
+    'threads': int(os.environ.get('GUNICORN_THREADS', 0)),  # gthread only; 0 = default of 4
+    'worker_connections': 1000,  # gevent only: concurrent greenlets per worker
+    'preload': os.environ.get('GUNICORN_PRELOAD', '1') == '1',  # Load the app once, share it copy-on-write
+    'max_requests': int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000)),  # Recycle workers after N requests
+    'max_requests_jitter': 200,  # Spread recycling so workers do not restart together
+    'timeout': 60,  # Seconds a worker may stay silent before it is killed
+    'graceful_timeout': 30,  # Seconds in-flight requests get on reload or shutdown
+    'keepalive': 5  # Seconds to hold idle keep-alive connections from nginx
+}
+
+# Logging Configuration
+LOGGING_CONFIG = {
+    'level': os.environ.get('LOG_LEVEL', 'INFO'),
+    'format': os.environ.get('LOG_FORMAT', 'json'),  # json, or text for local development
+    'queue_size': 10000,  # Records waiting for the writer thread; more are dropped, never waited on
+    'debug_sample_rate': float(os.environ.get('LOG_DEBUG_SAMPLE_RATE', 0.1)),  # Share of DEBUG records kept
+    'secret_env': ['SENDER_PASSWORD', 'METRICS_TOKEN', 'PROFILE_SECRET'],  # Values of these variables never reach the logs
+    'redact_keys': ['password', 'secret', 'token', 'authorization']  # Extra fields with these in the name
+}
+
+# Metrics Configuration (/metrics)
+METRICS_CONFIG = {
+    'dir': os.environ.get('METRICS_DIR', ''),  # Shared by all worker processes; empty = this process only
+    'flush_interval': 1.0,  # Seconds between writes of a process's values to the directory
+    'token': os.environ.get('METRICS_TOKEN', '')  # If set, scrapes need "Authorization: Bearer <token>"
+}
+
+# Timeouts, Retries and Circuit Breakers for external services
+RESILIENCE_CONFIG = {
+    'smtp': {
+        'connect_timeout': float(os.environ.get('SMTP_CONNECT_TIMEOUT', 10)),  # Seconds to open the connection
+        'timeout': float(os.environ.get('SMTP_TIMEOUT', 30)),  # Seconds to wait for any later reply
+        'attempts': 3,  # Tries per send, including the first
+        'base_delay': 0.5,  # Backoff before the first retry (doubles each time, with full jitter)
+        'max_delay': 5.0,  # Longest backoff between tries
+        'failure_threshold': 5,  # Consecutive transient failures that open the circuit
+        'reset_timeout': 30  # Seconds an open circuit fails fast before one trial call
+    },
+    'drive': {
+        'timeout': float(os.environ.get('DRIVE_TIMEOUT', 60)),  # Socket timeout for connect and each read (httplib2)
+        'attempts': 4,
+        'base_delay': 1.0,
+        'max_delay': 16.0,
+        'failure_threshold': 5,
+        'reset_timeout': 60
+    }
+}
+
+# Admission Control for form submissions (limits are shared by every worker process on the host)
+ADMISSION_CONFIG = {
+    'limit': int(os.environ.get('ADMISSION_LIMIT', 0)),  # Submissions in flight; 0 = half the server's threads, -1 = off
+    'queue_size': int(os.environ.get('ADMISSION_QUEUE_SIZE', -1)),  # Requests that may wait for a slot; -1 = half the limit
+    'max_wait': float(os.environ.get('ADMISSION_MAX_WAIT', 2)),  # Seconds a queued request waits before a 503
+    'retry_after': int(os.environ.get('ADMISSION_RETRY_AFTER', 5)),  # Retry-After sent with the 503
+    'endpoints': ['api.submit_form'],  # Endpoints that take a slot; pages, testimonials and /health never wait
+    'dir': os.environ.get('ADMISSION_DIR', '')  # Slot lock files; empty = "admission" next to the job queue database
+}
+
+# Per-IP Rate Limiting for /api (token buckets shared by every worker process on the host)
+RATE_LIMIT_CONFIG = {
+    'enabled': os.environ.get('RATE_LIMIT_ENABLED', '1') == '1',
+    'burst': float(os.environ.get('RATE_LIMIT_BURST', 5)),  # Requests a client may make back to back
+    'per_minute': float(os.environ.get('RATE_LIMIT_PER_MINUTE', 2)),  # Sustained requests per client per minute
+    # Proxy addresses or networks (comma separated) whose X-Real-IP / X-Forwarded-For are believed; empty = none
+    'trusted_proxies': [p.strip() for p in os.environ.get('RATE_LIMIT_TRUSTED_PROXIES', '').split(',') if p.strip()],
+    'exempt': ['api.get_testimonials'],  # Cached reads that cost no disk or email
+    'slots': 8192,  # Buckets in the shared table (24 bytes each)
+    'file': os.environ.get('RATE_LIMIT_FILE', '')  # Shared table (slots go in the name); empty = next to the job queue
+}
+
+# Request Profiling Configuration (off unless a secret or sampling rate is set)
+PROFILING_CONFIG = {
+    'secret': os.environ.get('PROFILE_SECRET', ''),  # HMAC key for X-Profile-Signature and /_profiles/
+    'sample_rate': float(os.environ.get('PROFILE_SAMPLE_RATE', 0)),  # Share of sample_paths requests profiled
+    'sample_paths': ['/api/submit-form'],  # Paths eligible for sampling (signed requests may target any path)
+    'dir': os.environ.get('PROFILE_DIR', 'profiles'),  # Local directory holding the kept profiles
+    'keep': 100,  # Newest profiles kept; older ones are deleted
+    'signature_ttl': 300  # Longest a signature may stay valid, in seconds
+}
+
+# Background Job Queue Configuration
+QUEUE_CONFIG = {
+    'db_path': os.environ.get('JOB_QUEUE_DB', 'queue/jobs.sqlite3'),  # SQLite file holding queued jobs
+    'workers': int(os.environ.get('JOB_WORKERS', 2)),  # Worker threads per process
+    'autostart': os.environ.get('JOB_WORKERS_AUTOSTART', '1') == '1',  # Start workers in create_app()
+    'poll_interval': 1.0,  # Seconds an idle worker waits before checking the queue again
+    'max_attempts': 5,  # Attempts before a job is marked dead
+    'retry_delay': 30,  # Base retry delay in seconds (doubled on each attempt)
+    'lease_timeout': 300  # Seconds before a running job from a crashed worker is reclaimed
+}
+
 # Instructions for Gmail setup:
 # 1. Enable 2-factor authentication on your Gmail account
 # 2. Generate an App Password: Google Account > Security > App Passwords
@@ -0,0 +1,60 @@
+"""
+Gunicorn configuration for Apply Boost Studio
+
+    gunicorn wsgi:app                      # settings below, from SERVER_CONFIG
+    WEB_CONCURRENCY=8 gunicorn wsgi:app    # override the derived worker count
+    kill -HUP <master pid>                 # graceful reload: new workers, then old ones drain
+
+With preload_app (the default), HUP re-forks the already loaded code; deploy new
+code by restarting the container or with USR2 followed by WINCH/TERM on the old master.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Workers share metrics through per-process files (read before config.py is imported)
+os.environ.setdefault('METRICS_DIR', '/tmp/ajfm-metrics')
+
+from app.server import gunicorn_settings, start_worker_services
+
+_settings = gunicorn_settings()
+
+wsgi_app = 'wsgi:app'
+bind = _settings['bind']
+worker_class = _settings['worker_class']
+workers = _settings['workers']
+threads = _settings['threads']
+worker_connections = _settings.get('worker_connections', 1000)
+preload_app = _settings['preload_app']
+max_requests = _settings['max_requests']
+max_requests_jitter = _settings['max_requests_jitter']
+timeout = _settings['timeout']
+graceful_timeout = _settings['graceful_timeout']
+keepalive = _settings['keepalive']
+accesslog = '-'
+errorlog = '-'
+
+
+def on_starting(server):
+    # Values from a previous run would otherwise be added to this one
+    from app.metrics import registry
+    registry.configure(os.environ['METRICS_DIR'])
+    registry.clear_directory()
+
+
+def when_ready(server):
+    server.log.info(f"Serving with {workers} {worker_class} worker(s) x {threads} thread(s), preload={preload_app}")
+
+
+def post_worker_init(worker):
+    # Runs in the worker after the app is loaded (or inherited from the preloading master)
+    start_worker_services(worker.wsgi)
+
+
+def child_exit(server, worker):
+    # Keep a recycled worker's counters, forget its gauges
+    from app.metrics import registry
+    registry.configure(os.environ['METRICS_DIR'])
+    registry.mark_process_dead(worker.pid)
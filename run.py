@@ -3,9 +3,11 @@
 Main application entry point for AJFM - Job application made easy
 """
 
+import os
 from app import create_app
 
 app = create_app()
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
+    # Development server only; production runs gunicorn (see gunicorn.conf.py)
+    app.run(debug=os.environ.get('FLASK_DEBUG', '1') == '1', host='0.0.0.0', port=5000) 
\ No newline at end of file
@@ -2,6 +2,7 @@
 Pytest configuration for Apply Boost Studio tests
 """
 
+import io
 import pytest
 import os
 import sys
@@ -9,18 +10,37 @@ import sys
 # Add the parent directory to the Python path so we can import app modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+def submit(client, headers=None, environ_base=None, **fields):
+    """Post the contact form with a small PDF resume; fields replace or add form fields"""
+    data = {
+        'name': 'Test User',
+        'email': 'test@example.com',
+        'resume': (io.BytesIO(b'%PDF-1.4 test'), 'resume.pdf')
+    }
+    data.update(fields)
+    return client.post('/api/submit-form', data={key: value for key, value in data.items() if value is not None},
+                       content_type='multipart/form-data', headers=headers or {}, environ_base=environ_base or {})
+
 @pytest.fixture
-def app():
-    """Create a test Flask app instance"""
+def make_app(tmp_path):
+    """Factory for test Flask apps: temporary storage, no job threads, plus any config overrides"""
     from app import create_app
-    app = create_app()
-    app.config['TESTING'] = True
-    app.config['UPLOAD_FOLDER'] = 'test_uploads'
-    
-    # Ensure test upload folder exists
-    os.makedirs('test_uploads', exist_ok=True)
-    
-    return app
+
+    def make(**overrides):
+        config = {
+            'TESTING': True,
+            'UPLOAD_FOLDER': str(tmp_path / 'uploads'),
+            'JOB_QUEUE_PATH': str(tmp_path / 'jobs.sqlite3'),
+            'JOB_WORKERS_AUTOSTART': False
+        }
+        config.update(overrides)
+        return create_app(config)
+    return make
+
+@pytest.fixture
+def app(make_app):
+    """Create a test Flask app instance"""
+    return make_app()
 
 @pytest.fixture
 def client(app):
@@ -30,4 +50,4 @@ def client(app):
 @pytest.fixture
 def runner(app):
     """Create a test CLI runner for the Flask app"""
-    return app.test_cli_runner() 
\ No newline at end of file
+    return app.test_cli_runner()
@@ -0,0 +1,75 @@
+"""
+Tests for admission control on form submissions
+"""
+
+import multiprocessing
+import threading
+import pytest
+from app.admission import AdmissionController
+from tests.conftest import submit
+
+@pytest.fixture
+def limited_app(make_app):
+    return make_app(ADMISSION_LIMIT=1, ADMISSION_QUEUE_SIZE=0)
+
+def other_worker(app):
+    """A second controller on the same lock files, as another gunicorn worker would have"""
+    controller = app.extensions['admission']
+    return AdmissionController(controller.slots.directory, controller.limit)
+
+def test_sheds_when_full_and_pages_still_served(limited_app):
+    """Test that a busy limit sheds submissions with 503 + Retry-After while pages and /health answer"""
+    client = limited_app.test_client()
+    worker = other_worker(limited_app)
+    slot = worker.acquire()
+    assert slot is not None
+
+    response = submit(client)
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '5'
+    assert response.get_json()['success'] is False
+    assert client.get('/health').get_json() == {'status': 'ok'}
+    assert client.get('/').status_code == 200
+    assert client.get('/api/testimonials').status_code == 200
+
+    worker.release(slot)
+    assert submit(client).status_code == 202
+    # The request gave its slot back
+    assert limited_app.extensions['admission'].slots.in_use() == 0
+
+def test_queued_request_gets_freed_slot(tmp_path):
+    """Test that a waiting request is admitted when a slot frees up within max_wait"""
+    controller = AdmissionController(str(tmp_path), limit=1, queue_size=1, max_wait=2)
+    first = controller.acquire()
+    timer = threading.Timer(0.1, controller.release, [first])
+    timer.start()
+    assert controller.acquire() == first
+    timer.join()
+
+    # Nobody releases this time: the waiter gives up after max_wait
+    controller.max_wait = 0.05
+    assert controller.acquire() is None
+
+def test_wait_queue_is_bounded(tmp_path):
+    controller = AdmissionController(str(tmp_path), limit=1, queue_size=1, max_wait=0.5)
+    assert controller.acquire() is not None
+    waiters = AdmissionController(str(tmp_path), limit=1, queue_size=1).waiters
+    assert waiters.try_acquire() is not None
+    # Limit reached and the only queue place taken: shed immediately
+    assert controller.acquire() is None
+    assert waiters.in_use() == 1
+
+def _hold_slot_and_die(directory):
+    AdmissionController(directory, limit=1).acquire()
+
+def test_dead_worker_releases_its_slot(tmp_path):
+    """Test that slots held by a process that exits without releasing them are freed"""
+    process = multiprocessing.get_context('fork').Process(target=_hold_slot_and_die, args=(str(tmp_path),))
+    process.start()
+    process.join()
+    assert AdmissionController(str(tmp_path), limit=1).acquire() is not None
+
+def test_disabled(make_app):
+    app = make_app(ADMISSION_LIMIT=-1)
+    assert 'admission' not in app.extensions
+    assert submit(app.test_client()).status_code == 202
@@ -0,0 +1,82 @@
+"""
+Tests for the fingerprinted static asset pipeline
+"""
+
+import gzip
+import json
+import os
+import shutil
+import pytest
+from flask import render_template_string, url_for
+from app.assets import build_assets
+
+STATIC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+
+@pytest.fixture
+def built_app(app, tmp_path):
+    """App serving a copy of the static folder that has been built"""
+    static = tmp_path / 'static'
+    shutil.copytree(STATIC, static)
+    app.static_folder = str(static)
+    manifest = build_assets(str(static))
+    app.extensions['assets'].load(str(static / 'dist' / 'manifest.json'))
+    return app, manifest, static
+
+def test_build_writes_hashed_and_compressed_files(tmp_path):
+    """Test content-hashed names, .gz siblings and the manifest"""
+    static = tmp_path / 'static'
+    shutil.copytree(STATIC, static)
+    manifest = build_assets(str(static))
+
+    entry = manifest['css/style.css']
+    assert entry['file'].startswith('dist/css/style.') and entry['file'].endswith('.css')
+    original = (static / 'css' / 'style.css').read_bytes()
+    assert (static / entry['file']).read_bytes() == original
+    assert 'gzip' in entry['encodings']
+    assert gzip.decompress((static / (entry['file'] + '.gz')).read_bytes()) == original
+    assert 'js/README.md' not in manifest
+    assert json.loads((static / 'dist' / 'manifest.json').read_text()) == manifest
+
+    # Rebuilding does not pick up its own output and keeps names stable
+    assert build_assets(str(static)) == manifest
+
+def test_url_for_uses_manifest(built_app):
+    """Test that url_for resolves to fingerprinted files, except in debug"""
+    app, manifest, _ = built_app
+    with app.test_request_context():
+        assert url_for('static', filename='js/main.js') == f"/static/{manifest['js/main.js']['file']}"
+        assert url_for('static', filename='not-built.js') == '/static/not-built.js'
+        app.debug = True
+        assert url_for('static', filename='js/main.js') == '/static/js/main.js'
+
+def test_fingerprinted_files_cached_and_precompressed(built_app):
+    """Test immutable caching and precompressed bodies for built files"""
+    app, manifest, static = built_app
+    client = app.test_client()
+    url = f"/static/{manifest['css/style.css']['file']}"
+
+    plain = client.get(url)
+    assert plain.status_code == 200
+    assert plain.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert plain.mimetype == 'text/css'
+    assert 'Content-Encoding' not in plain.headers
+
+    compressed = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert compressed.mimetype == 'text/css'
+    assert gzip.decompress(compressed.data) == plain.data
+
+    source = client.get('/static/css/style.css')
+    assert 'immutable' not in source.headers.get('Cache-Control', '')
+
+def test_image_variants_and_srcset(built_app):
+    """Test WebP variants never wider than the source, listed in srcset"""
+    pytest.importorskip('PIL')
+    app, manifest, static = built_app
+    variants = manifest['images/hero-professionals.jpg']['variants']
+    assert [v['type'] for v in variants] == ['image/webp'] * len(variants)
+    assert variants == sorted(variants, key=lambda v: v['width'])
+    with app.test_request_context():
+        srcset = render_template_string("{{ asset_srcset('images/hero-professionals.jpg') }}")
+    assert srcset.count('w,') == len(variants) - 1
+    assert all((static / v['file']).exists() for v in variants)
@@ -0,0 +1,158 @@
+"""
+Tests for the offline local Drive backend
+"""
+
+import asyncio
+import time
+import pytest
+from app.drive_backends import DriveBackend, DriveBackendError, LocalDriveBackend, LocalResumableUpload
+
+def upload_all(upload):
+    """Drive a ResumableUpload to completion, returning the confirmed offsets and the file"""
+    offsets = []
+    while True:
+        offset, response = upload.next_chunk()
+        if response is not None:
+            return offsets, response
+        offsets.append(offset)
+
+def test_incomplete_backend_cannot_be_created():
+    """Test that a backend missing a Drive operation fails when created, not on first use"""
+    class NoBatchBackend(DriveBackend):
+        find_folder = LocalDriveBackend.find_folder
+        create_folder = LocalDriveBackend.create_folder
+        list_page = LocalDriveBackend.list_page
+        create_upload = LocalDriveBackend.create_upload
+
+    with pytest.raises(TypeError, match='execute_batch'):
+        NoBatchBackend()
+    from app.google_drive_utils import GoogleApiBackend, GoogleResumableUpload
+    for cls in (LocalDriveBackend, LocalResumableUpload, GoogleApiBackend, GoogleResumableUpload):
+        assert not cls.__abstractmethods__
+
+def test_resumable_upload_stores_file(tmp_path):
+    """Test that chunks are confirmed in order and the file appears in its folder"""
+    backend = LocalDriveBackend(str(tmp_path / 'drive'))
+    path = tmp_path / 'resume.pdf'
+    path.write_bytes(b'%PDF-1.4' + b'0' * 92)
+
+    upload = backend.create_upload({'name': 'resume.pdf', 'parents': ['root']}, str(path), 40, 'id, name, size')
+    offsets, file = upload_all(upload)
+
+    assert offsets == [40, 80]
+    assert file['name'] == 'resume.pdf' and file['size'] == '100'
+    assert set(file) == {'id', 'name', 'size'}
+    with open(backend.blob_path(file['id']), 'rb') as f:
+        assert f.read() == path.read_bytes()
+    assert backend.list_page('root', 10, 'id')['files'] == [{'id': file['id']}]
+
+def test_resume_continues_from_server_offset(tmp_path):
+    """Test that a new upload object resumes a session at the offset the server holds"""
+    backend = LocalDriveBackend(str(tmp_path / 'drive'))
+    path = tmp_path / 'resume.pdf'
+    path.write_bytes(b'x' * 100)
+
+    first = backend.create_upload({'name': 'resume.pdf', 'parents': ['root']}, str(path), 30, 'id')
+    first.next_chunk()
+    first.next_chunk()
+
+    # Checkpoint claims less than the server confirmed; the server wins
+    second = backend.create_upload({'name': 'resume.pdf', 'parents': ['root']}, str(path), 30, 'id')
+    second.resume(first.resumable_uri, 30)
+    offsets, _ = upload_all(second)
+    assert offsets == [90]
+
+    expired = backend.create_upload({'name': 'resume.pdf', 'parents': ['root']}, str(path), 30, 'id')
+    expired.resume(first.resumable_uri, 90)
+    with pytest.raises(DriveBackendError) as excinfo:
+        expired.next_chunk()
+    assert excinfo.value.status == 404
+
+def test_listing_pages_filters_and_orders(tmp_path):
+    """Test pagination, trashed files and modifiedTime filtering"""
+    backend = LocalDriveBackend(str(tmp_path / 'drive'))
+    ids = [backend.create_folder(f'folder-{i}', 'root') for i in range(5)]
+    cutoff = time.time()
+    time.sleep(0.01)
+    backend.execute_batch([(0, {'action': 'trash', 'file_id': ids[0]}),
+                           (1, {'action': 'update', 'file_id': ids[1], 'body': {'description': 'x'}})])
+
+    first = backend.list_page('root', 2, 'id, name', order_by='name desc')
+    assert [f['name'] for f in first['files']] == ['folder-4', 'folder-3']
+    second = backend.list_page('root', 2, 'id, name', page_token=first['nextPageToken'], order_by='name desc')
+    assert [f['name'] for f in second['files']] == ['folder-2', 'folder-1']
+    assert 'nextPageToken' not in second
+
+    from datetime import datetime, timezone
+    changed = backend.list_page('root', 10, 'id', modified_after=datetime.fromtimestamp(cutoff, timezone.utc).isoformat())
+    assert changed['files'] == [{'id': ids[1]}]
+    assert backend.find_folder('folder-0', 'root') is None
+    assert backend.find_folder('folder-2', 'root') == ids[2]
+
+def test_injected_errors_are_reproducible(tmp_path):
+    """Test that the same seed fails the same calls regardless of run"""
+    def failures(root):
+        backend = LocalDriveBackend(str(root), error_rate=0.3, seed=7)
+        outcome = []
+        for i in range(20):
+            try:
+                backend.create_folder(f'folder-{i}', 'root')
+                outcome.append(True)
+            except DriveBackendError as e:
+                assert e.status == 503
+                outcome.append(False)
+        return outcome
+
+    first = failures(tmp_path / 'a')
+    assert first == failures(tmp_path / 'b')
+    assert 0 < first.count(False) < 20
+
+def test_latency_is_injected(tmp_path):
+    """Test that every call waits for the configured latency"""
+    backend = LocalDriveBackend(str(tmp_path / 'drive'), latency=(0.02, 0.04))
+    start = time.monotonic()
+    for i in range(3):
+        backend.find_folder('missing', 'root')
+    assert time.monotonic() - start >= 0.06
+    assert backend.calls['find'] == 3
+
+def test_manager_pipeline_against_local_backend(tmp_path):
+    """Test upload, sharding and batch retries of GoogleDriveManager over the fake"""
+    pytest.importorskip('googleapiclient')
+    from app.google_drive_utils import FolderCache, GoogleDriveManager
+    from app.resume_store import ResumeStore
+
+    backend = LocalDriveBackend(str(tmp_path / 'drive'), error_rate={'batch_item': 0.3}, seed=3)
+    manager = GoogleDriveManager(backend=backend)
+    manager.checkpoint_dir = str(tmp_path / 'checkpoints')
+    manager.folder_cache = FolderCache(path=str(tmp_path / 'folders.json'))
+    manager.shard_by = 'month'
+    manager.batch_retry_delay = 0
+    manager.resume_store = ResumeStore(str(tmp_path / 'store'))
+    digests = []
+    for i in range(4):
+        path = tmp_path / f'resume{i}.pdf'
+        path.write_bytes(b'%PDF-1.4' + bytes([i]) * 500)
+        with open(path, 'rb') as f:
+            digests.append((str(path), manager.resume_store.put(f)[0]))
+
+    async def upload_many():
+        return await asyncio.gather(*(
+            manager.upload_file(path, 'resume.pdf', f'user{i}@example.com', digest)
+            for i, (path, digest) in enumerate(digests)
+        ))
+
+    results = asyncio.run(upload_many())
+    assert all(results)
+    # One month folder under the root, shared by every upload
+    assert backend.calls['create'] == 1
+    shard = backend.find_folder(time.strftime('%Y-%m'), manager.folder_id)
+    files = asyncio.run(manager.list_files(shard))
+    assert sorted(f['id'] for f in files) == sorted(r['file_id'] for r in results)
+
+    outcome = asyncio.run(manager.batch_update(
+        [{'action': 'trash', 'file_id': r['file_id']} for r in results], max_attempts=10
+    ))
+    assert all(r['success'] for r in outcome)
+    assert backend.errors['batch_item'] > 0
+    assert asyncio.run(manager.list_files(shard)) == []
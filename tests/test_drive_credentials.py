@@ -0,0 +1,110 @@
+"""
+Tests for the shared Google Drive credential cache
+"""
+
+import json
+import threading
+from datetime import datetime, timedelta
+import pytest
+
+pytest.importorskip('googleapiclient')
+
+from google.oauth2.credentials import Credentials
+from app.drive_credentials import SharedCredentials
+
+def write_token(path, token, expires_in):
+    expiry = datetime.utcnow() + timedelta(seconds=expires_in)
+    path.write_text(json.dumps({
+        'token': token,
+        'refresh_token': 'refresh',
+        'client_id': 'client',
+        'client_secret': 'secret',
+        'expiry': expiry.strftime('%Y-%m-%dT%H:%M:%SZ')
+    }))
+
+@pytest.fixture
+def fake_refresh(monkeypatch):
+    """Replace the network refresh with a counter that issues a 1 hour token"""
+    calls = []
+    
+    def refresh(self, request):
+        calls.append(1)
+        self.token = f'refreshed-{len(calls)}'
+        self.expiry = datetime.utcnow() + timedelta(hours=1)
+    
+    monkeypatch.setattr(Credentials, 'refresh', refresh)
+    return calls
+
+def test_fresh_token_not_refreshed(tmp_path, fake_refresh):
+    """Test that a token outside the refresh margin is used as-is"""
+    token_file = tmp_path / 'token.json'
+    write_token(token_file, 'current', expires_in=3600)
+    
+    creds = SharedCredentials(str(token_file), ['scope']).refresh_if_needed()
+    assert creds.token == 'current'
+    assert fake_refresh == []
+
+def test_expiring_token_refreshed_once_across_workers(tmp_path, fake_refresh):
+    """Test that concurrent workers sharing token.json refresh it only once"""
+    token_file = tmp_path / 'token.json'
+    write_token(token_file, 'old', expires_in=60)
+    workers = [SharedCredentials(str(token_file), ['scope'], refresh_margin=300) for _ in range(4)]
+    
+    tokens = []
+    threads = [threading.Thread(target=lambda w=w: tokens.append(w.refresh_if_needed().token))
+               for w in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(fake_refresh) == 1
+    assert tokens == ['refreshed-1'] * 4
+    assert json.loads(token_file.read_text())['token'] == 'refreshed-1'
+
+def test_credentials_reloaded_after_other_worker_refresh(tmp_path, fake_refresh):
+    """Test that a refresh by another worker is picked up as a new Credentials object"""
+    token_file = tmp_path / 'token.json'
+    write_token(token_file, 'old', expires_in=3600)
+    shared = SharedCredentials(str(token_file), ['scope'])
+    creds = shared.get()
+    
+    other = SharedCredentials(str(token_file), ['scope'], refresh_margin=7200)
+    other.refresh_if_needed()
+    
+    assert shared.get() is not creds
+    assert shared.get().token == 'refreshed-1'
+    assert shared.get().refresh_token == 'refresh'
+
+def test_failed_refreshes_back_off(tmp_path, monkeypatch):
+    """Test that a refresh that keeps failing is retried with growing delays, reset by a success"""
+    def revoked(self, request):
+        raise RuntimeError('invalid_grant: Token has been expired or revoked')
+    
+    monkeypatch.setattr(Credentials, 'refresh', revoked)
+    token_file = tmp_path / 'token.json'
+    write_token(token_file, 'old', expires_in=-60)
+    shared = SharedCredentials(str(token_file), ['scope'], refresh_interval=60, max_backoff=600)
+    
+    sleeps = []
+    def sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 6:
+            raise StopIteration
+    monkeypatch.setattr('app.drive_credentials.time.sleep', sleep)
+    monkeypatch.setattr('app.drive_credentials.backoff_delay', lambda attempt, base, cap: min(cap, base * 2 ** (attempt - 1)))
+    with pytest.raises(StopIteration):
+        shared._refresh_loop()
+    
+    assert shared.refresh_failures == 6
+    assert sleeps == [15, 30, 60, 120, 240, 480]
+    
+    def refresh(self, request):
+        self.token = 'new'
+        self.expiry = datetime.utcnow() + timedelta(hours=1)
+    monkeypatch.setattr(Credentials, 'refresh', refresh)
+    sleeps[:] = [0] * 5
+    with pytest.raises(StopIteration):
+        shared._refresh_loop()
+    assert shared.refresh_failures == 0
+    assert 0 < sleeps[-1] <= 60
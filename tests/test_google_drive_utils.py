@@ -0,0 +1,411 @@
+"""
+Tests for the async Google Drive manager
+"""
+
+import asyncio
+import os
+import time
+import pytest
+
+pytest.importorskip('googleapiclient')
+
+from googleapiclient.http import MediaUploadProgress
+from app.google_drive_utils import FolderCache, GoogleApiBackend, GoogleDriveManager
+from app.resilience import CircuitBreaker
+
+def make_manager(tmp_path, service, shard_by=None):
+    """Manager wired to a fake service with all local state under tmp_path"""
+    # One attempt per call and a private breaker: simulated crashes fail at once
+    manager = GoogleDriveManager(backend=GoogleApiBackend(service), breaker=CircuitBreaker('drive'),
+                                 retry={'attempts': 1})
+    manager.checkpoint_dir = str(tmp_path / 'checkpoints')
+    manager.folder_cache = FolderCache(path=str(tmp_path / 'folders.json'))
+    manager.shard_by = shard_by
+    return manager
+
+class FakeDriveSessions:
+    """Server side of resumable uploads: bytes received per session URI"""
+    
+    def __init__(self):
+        self.received = {}
+        self.chunks_sent = 0
+
+class FakeResumableRequest:
+    """Mimics googleapiclient's resumable HttpRequest.next_chunk() protocol"""
+    
+    def __init__(self, sessions, size, chunk_size, fail_after=None, on_chunk=None):
+        self.sessions = sessions
+        self.total = size
+        self.chunk_size = chunk_size
+        self.fail_after = fail_after
+        self.on_chunk = on_chunk
+        self.resumable_uri = None
+        self.resumable_progress = 0
+        self._in_error_state = False
+        self.resumable = self
+        self.sent_here = 0
+    
+    def size(self):
+        return self.total
+    
+    def next_chunk(self, http=None):
+        if self.resumable_uri is None:
+            self.resumable_uri = f'https://upload.example/session/{len(self.sessions.received)}'
+            self.sessions.received[self.resumable_uri] = 0
+        elif self._in_error_state:
+            self.resumable_progress = self.sessions.received[self.resumable_uri]
+            self._in_error_state = False
+        
+        if self.fail_after is not None and self.sent_here >= self.fail_after:
+            raise ConnectionError('worker killed')
+        if self.on_chunk:
+            self.on_chunk()
+        
+        end = min(self.resumable_progress + self.chunk_size, self.total)
+        self.sessions.chunks_sent += 1
+        self.sent_here += 1
+        self.sessions.received[self.resumable_uri] = end
+        self.resumable_progress = end
+        if end == self.total:
+            return None, {'id': 'file-id', 'name': 'resume.pdf'}
+        return MediaUploadProgress(end, self.total), None
+
+class FakeUploadService:
+    def __init__(self, make_request):
+        self.make_request = make_request
+    
+    def files(self):
+        return self
+    
+    def create(self, **kwargs):
+        return self.make_request()
+
+class SlowRequest:
+    """API request stand-in whose execute() blocks like a network call"""
+    
+    def __init__(self, response, delay):
+        self.response = response
+        self.delay = delay
+    
+    def execute(self, http=None):
+        time.sleep(self.delay)
+        return self.response
+
+class SlowFiles:
+    def __init__(self, delay):
+        self.delay = delay
+    
+    def list(self, **kwargs):
+        return SlowRequest({'files': [{'id': '1', 'name': 'resume.pdf'}]}, self.delay)
+
+class SlowService:
+    def __init__(self, delay):
+        self.delay = delay
+    
+    def files(self):
+        return SlowFiles(self.delay)
+
+def test_blocking_calls_overlap():
+    """Test that concurrent Drive calls run in parallel instead of serialising"""
+    manager = GoogleDriveManager(backend=GoogleApiBackend(SlowService(delay=0.2)))
+    
+    async def list_many():
+        return await asyncio.gather(*(manager.list_files('folder') for _ in range(4)))
+    
+    start = time.monotonic()
+    results = asyncio.run(list_many())
+    elapsed = time.monotonic() - start
+    
+    assert all(files[0]['name'] == 'resume.pdf' for files in results)
+    assert elapsed < 0.6
+
+def test_event_loop_not_blocked():
+    """Test that the event loop keeps running while a Drive call is in flight"""
+    manager = GoogleDriveManager(backend=GoogleApiBackend(SlowService(delay=0.2)))
+    ticks = []
+    
+    async def ticker():
+        for _ in range(5):
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.02)
+    
+    async def main():
+        await asyncio.gather(manager.list_files('folder'), ticker())
+    
+    asyncio.run(main())
+    assert len(ticks) == 5
+    assert ticks[-1] - ticks[0] < 0.18
+
+def test_uploads_limited_by_semaphore(tmp_path):
+    """Test that no more than max_concurrent_uploads uploads run at once"""
+    active = []
+    peak = []
+    
+    def track():
+        active.append(1)
+        peak.append(len(active))
+        time.sleep(0.05)
+        active.pop()
+    
+    sessions = FakeDriveSessions()
+    manager = make_manager(tmp_path, FakeUploadService(
+        lambda: FakeResumableRequest(sessions, 8, 8, on_chunk=track)
+    ))
+    manager.max_concurrent_uploads = 2
+    paths = []
+    for i in range(6):
+        path = tmp_path / f'resume{i}.pdf'
+        path.write_bytes(b'%PDF-1.4')
+        paths.append(str(path))
+    
+    async def upload_many():
+        return await asyncio.gather(*(
+            manager.upload_file(path, 'resume.pdf', 'user@example.com') for path in paths
+        ))
+    
+    results = asyncio.run(upload_many())
+    assert all(result['file_id'] == 'file-id' for result in results)
+    assert max(peak) == 2
+
+def test_interrupted_upload_resumes_from_checkpoint(tmp_path):
+    """Test that a restarted worker continues from the last confirmed chunk"""
+    path = tmp_path / 'resume.pdf'
+    path.write_bytes(b'%PDF-1.4' + b'0' * 92)
+    sessions = FakeDriveSessions()
+    
+    # First worker dies after sending three 10 byte chunks
+    crashed = make_manager(tmp_path, FakeUploadService(
+        lambda: FakeResumableRequest(sessions, 100, 10, fail_after=3)
+    ))
+    assert asyncio.run(crashed.upload_file(str(path), 'resume.pdf', 'user@example.com')) is None
+    assert len(os.listdir(crashed.checkpoint_dir)) == 1
+    
+    # A fresh worker picks up the same session and sends only the rest
+    restarted = make_manager(tmp_path, FakeUploadService(
+        lambda: FakeResumableRequest(sessions, 100, 10)
+    ))
+    result = asyncio.run(restarted.upload_file(str(path), 'resume.pdf', 'user@example.com'))
+    
+    assert result['file_id'] == 'file-id'
+    assert sessions.chunks_sent == 10
+    assert len(sessions.received) == 1
+    assert restarted.bytes_uploaded == 70
+    assert os.listdir(restarted.checkpoint_dir) == []
+
+class FakeFolderService:
+    """files().list/create over an in-memory folder tree, counting API calls"""
+    
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.folders = {}
+        self.calls = []
+    
+    def files(self):
+        return self
+    
+    def list(self, q, **kwargs):
+        name = q.split("name='")[1].split("' and")[0]
+        parent = q.split("and '")[1].split("' in parents")[0]
+        
+        def run():
+            folder_id = self.folders.get((parent, name))
+            return {'files': [{'id': folder_id, 'name': name}] if folder_id else []}
+        return self._request('list', run)
+    
+    def create(self, body, **kwargs):
+        def run():
+            folder_id = f"folder-{len(self.folders)}"
+            self.folders[(body['parents'][0], body['name'])] = folder_id
+            return {'id': folder_id}
+        return self._request('create', run)
+    
+    def _request(self, kind, run):
+        service = self
+        
+        class Request:
+            def execute(self, http=None):
+                service.calls.append(kind)
+                time.sleep(service.delay)
+                return run()
+        return Request()
+
+def test_concurrent_folder_creation_deduplicated(tmp_path):
+    """Test that concurrent lookups of one folder make a single list+create"""
+    service = FakeFolderService(delay=0.05)
+    manager = make_manager(tmp_path, service)
+    
+    async def resolve_many():
+        return await asyncio.gather(*(
+            manager.create_folder_if_not_exists('2026-10') for _ in range(5)
+        ))
+    
+    assert set(asyncio.run(resolve_many())) == {'folder-0'}
+    assert service.calls == ['list', 'create']
+
+def test_cached_folder_costs_no_api_calls(tmp_path):
+    """Test that a resolved folder is served from cache, including after restart"""
+    service = FakeFolderService()
+    manager = make_manager(tmp_path, service)
+    asyncio.run(manager.create_folder_if_not_exists('2026-10'))
+    asyncio.run(manager.create_folder_if_not_exists('2026-10'))
+    assert service.calls == ['list', 'create']
+    
+    fresh_service = FakeFolderService()
+    restarted = make_manager(tmp_path, fresh_service)
+    assert asyncio.run(restarted.create_folder_if_not_exists('2026-10')) == 'folder-0'
+    assert fresh_service.calls == []
+
+def test_uploads_sharded_by_day(tmp_path):
+    """Test that shard folders are nested month then day under the root"""
+    from datetime import datetime
+    service = FakeFolderService()
+    manager = make_manager(tmp_path, service, shard_by='day')
+    
+    folder_id = asyncio.run(manager.resolve_shard_folder(datetime(2026, 10, 17)))
+    assert service.folders == {
+        (manager.folder_id, '2026-10'): 'folder-0',
+        ('folder-0', '2026-10-17'): 'folder-1'
+    }
+    assert folder_id == 'folder-1'
+
+def test_folder_cache_evicts_and_expires():
+    """Test LRU eviction and TTL expiry of cached folder IDs"""
+    cache = FolderCache(max_entries=2, ttl=60)
+    cache.set('a', '1')
+    cache.set('b', '2')
+    cache.get('a')
+    cache.set('c', '3')
+    assert cache.get('b') is None
+    assert cache.get('a') == '1'
+    
+    expired = FolderCache(ttl=-1)
+    expired.set('a', '1')
+    assert expired.get('a') is None
+
+class PagedListService:
+    """files().list over N files served in pages, recording each request"""
+    
+    def __init__(self, total, delay=0):
+        self.total = total
+        self.delay = delay
+        self.requests = []
+    
+    def files(self):
+        return self
+    
+    def list(self, pageToken=None, pageSize=100, **kwargs):
+        service = self
+        self.requests.append(dict(kwargs, pageToken=pageToken, pageSize=pageSize))
+        start = int(pageToken or 0)
+        
+        class Request:
+            def execute(self, http=None):
+                time.sleep(service.delay)
+                end = min(start + pageSize, service.total)
+                page = {'files': [{'id': str(i)} for i in range(start, end)]}
+                if end < service.total:
+                    page['nextPageToken'] = str(end)
+                return page
+        return Request()
+
+def test_list_files_follows_every_page(tmp_path):
+    """Test that listings are no longer truncated to the first page"""
+    service = PagedListService(total=250)
+    manager = make_manager(tmp_path, service)
+    manager.list_page_size = 100
+    
+    files = asyncio.run(manager.list_files('folder'))
+    assert [f['id'] for f in files] == [str(i) for i in range(250)]
+    assert len(service.requests) == 3
+
+def test_iter_files_projection_and_modified_filter(tmp_path):
+    """Test that fields, pageSize and modifiedTime filters reach the API"""
+    from datetime import datetime, timezone
+    service = PagedListService(total=5)
+    manager = make_manager(tmp_path, service)
+    
+    async def collect():
+        return [f async for f in manager.iter_files(
+            'folder', page_size=2, fields='id, modifiedTime',
+            modified_after=datetime(2026, 10, 1, tzinfo=timezone.utc)
+        )]
+    
+    assert len(asyncio.run(collect())) == 5
+    request = service.requests[0]
+    assert request['pageSize'] == 2
+    assert request['fields'] == 'nextPageToken, files(id, modifiedTime)'
+    assert "modifiedTime > '2026-10-01T00:00:00+00:00'" in request['q']
+    assert request['orderBy'] == 'modifiedTime'
+
+def test_next_page_prefetched_while_caller_works(tmp_path):
+    """Test that fetching page N+1 overlaps with processing page N"""
+    manager = make_manager(tmp_path, PagedListService(total=400, delay=0.1))
+    
+    async def consume():
+        async for page in manager.iter_file_pages('folder', page_size=100):
+            await asyncio.sleep(0.1)
+    
+    start = time.monotonic()
+    asyncio.run(consume())
+    # Sequential fetch + process would take about 0.8s
+    assert time.monotonic() - start < 0.7
+
+class FakeBatchService:
+    """new_batch_http_request() over fake update/delete calls with injected failures"""
+    
+    def __init__(self, failures):
+        # file_id -> list of HTTP statuses to fail with, one per attempt
+        self.failures = failures
+        self.batches = []
+    
+    def files(self):
+        return self
+    
+    def update(self, fileId, **kwargs):
+        return ('update', fileId, kwargs)
+    
+    def delete(self, fileId):
+        return ('delete', fileId, {})
+    
+    def new_batch_http_request(self, callback):
+        service = self
+        
+        class Batch:
+            def __init__(self):
+                self.items = []
+            
+            def add(self, request, request_id):
+                self.items.append((request_id, request))
+            
+            def execute(self, http=None):
+                import httplib2
+                from googleapiclient.errors import HttpError
+                service.batches.append([request[1] for _, request in self.items])
+                for request_id, (action, file_id, kwargs) in self.items:
+                    statuses = service.failures.get(file_id, [])
+                    if statuses:
+                        status = statuses.pop(0)
+                        callback(request_id, None, HttpError(httplib2.Response({'status': status}), b'error'))
+                    else:
+                        callback(request_id, {'id': file_id, 'action': action}, None)
+        return Batch()
+
+def test_batch_update_groups_and_retries_failures(tmp_path):
+    """Test batching by batch_size and retrying only the retryable failures"""
+    service = FakeBatchService({'f1': [503], 'f2': [404]})
+    manager = make_manager(tmp_path, service)
+    manager.batch_size = 2
+    manager.batch_retry_delay = 0
+    
+    operations = [
+        {'action': 'trash', 'file_id': 'f0'},
+        {'action': 'update', 'file_id': 'f1', 'body': {'description': 'old'}},
+        {'action': 'delete', 'file_id': 'f2'},
+        {'action': 'move', 'file_id': 'f3', 'parent_id': 'archive'}
+    ]
+    results = asyncio.run(manager.batch_update(operations))
+    
+    assert [r['success'] for r in results] == [True, True, False, True]
+    assert results[1]['attempts'] == 2
+    assert results[2]['attempts'] == 1
+    assert service.batches == [['f0', 'f1'], ['f2', 'f3'], ['f1']]
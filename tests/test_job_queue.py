@@ -0,0 +1,100 @@
+"""
+Tests for the background job queue
+"""
+
+from app.job_queue import JobQueue, JobWorkerPool, dead_job_handler, job_handler
+from tests.conftest import submit
+
+def test_enqueue_and_claim(tmp_path):
+    """Test that a queued job can be claimed with its payload"""
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite3'))
+    job_id = queue.enqueue('test_job', {'value': 1})
+    
+    job = queue.claim()
+    assert job['id'] == job_id
+    assert job['payload'] == {'value': 1}
+    assert job['attempts'] == 1
+    assert queue.claim() is None
+
+def test_jobs_survive_reopen(tmp_path):
+    """Test that jobs persist across queue instances (process restarts)"""
+    db_path = str(tmp_path / 'jobs.sqlite3')
+    JobQueue(db_path).enqueue('test_job', {'value': 2})
+    
+    job = JobQueue(db_path).claim()
+    assert job['payload'] == {'value': 2}
+
+def test_failed_job_is_retried_then_dead(tmp_path):
+    """Test that failures are retried until max_attempts is reached"""
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite3'), max_attempts=2, retry_delay=0)
+    job_id = queue.enqueue('test_job', {})
+    
+    job = queue.claim()
+    queue.fail(job['id'], job['attempts'], 'boom')
+    assert queue.get(job_id)['status'] == 'pending'
+    
+    job = queue.claim()
+    assert job['attempts'] == 2
+    queue.fail(job['id'], job['attempts'], 'boom')
+    assert queue.get(job_id)['status'] == 'dead'
+    assert queue.claim() is None
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    """Test that a job held by a crashed worker is picked up again"""
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite3'), lease_timeout=0)
+    job_id = queue.enqueue('test_job', {})
+    queue.claim()
+    
+    job = queue.claim()
+    assert job['id'] == job_id
+    assert job['attempts'] == 2
+
+def test_job_killing_its_worker_goes_dead(tmp_path):
+    """Test that a job whose lease keeps expiring stops being reclaimed after max_attempts"""
+    seen = []
+    
+    @dead_job_handler('crashing_job')
+    def crashing_job_dead(payload):
+        seen.append(payload['value'])
+    
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite3'), max_attempts=2, lease_timeout=0)
+    job_id = queue.enqueue('crashing_job', {'value': 7})
+    assert queue.claim()['attempts'] == 1
+    assert queue.claim()['attempts'] == 2
+    
+    # The worker holding the last attempt never comes back
+    assert JobWorkerPool(queue).run_once() is False
+    job = queue.get(job_id)
+    assert job['status'] == 'dead'
+    assert 'lease expired' in job['last_error']
+    assert seen == [7]
+
+def test_worker_pool_runs_handler(tmp_path):
+    """Test that the worker pool dispatches to the registered handler"""
+    seen = []
+    
+    @job_handler('record_job')
+    def record_job(payload):
+        seen.append(payload['value'])
+    
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite3'))
+    queue.enqueue('record_job', {'value': 'a'})
+    queue.enqueue('record_job', {'value': 'b'})
+    
+    assert JobWorkerPool(queue).run_pending() == 2
+    assert seen == ['a', 'b']
+    assert queue.depth() == 0
+
+def test_submit_form_queues_notification(app, client):
+    """Test that submit-form returns 202 and leaves the email to the queue"""
+    response = submit(client, phone='555-0100')
+    
+    assert response.status_code == 202
+    assert response.get_json()['success'] is True
+    
+    queue = app.extensions['job_queue']
+    assert queue.depth() == 1
+    job = queue.claim()
+    assert job['kind'] == 'lead_notification'
+    assert job['payload']['email'] == 'test@example.com'
+    assert job['payload']['resume_filename'] == 'resume.pdf'
@@ -0,0 +1,53 @@
+"""
+Tests for deferred imports of the Google client and email.mime stacks
+"""
+
+import os
+import subprocess
+import sys
+from app.lazy import LazyModule, lazy_import, loaded_attr
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFERRED = ('googleapiclient', 'google_auth_oauthlib', 'google_auth_httplib2', 'google.oauth2',
+            'google.auth.transport.requests', 'httplib2', 'email.mime', 'email.policy')
+
+def imported_modules(stmt):
+    """Module names a fresh interpreter imports while running stmt (from -X importtime)"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', stmt], cwd=ROOT,
+                            env=dict(os.environ, JOB_WORKERS_AUTOSTART='0'), capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr[-2000:]
+    return {line.split('|')[2].strip() for line in result.stderr.splitlines()
+            if line.startswith('import time:') and 'self [us]' not in line}
+
+def deferred_in(modules):
+    return sorted(m for m in modules if any(m == d or m.startswith(d + '.') for d in DEFERRED))
+
+def test_create_app_skips_heavy_imports(tmp_path):
+    """Test that booting the app imports neither the Google client nor email.mime"""
+    stmt = ("from app import create_app; "
+            f"create_app({{'UPLOAD_FOLDER': {str(tmp_path / 'uploads')!r}, "
+            f"'JOB_QUEUE_PATH': {str(tmp_path / 'jobs.sqlite3')!r}}})")
+    assert deferred_in(imported_modules(stmt)) == []
+
+def test_drive_module_with_local_backend_skips_google(tmp_path):
+    """Test that the Drive manager on the local backend never loads the Google client"""
+    stmt = ("from app.google_drive_utils import GoogleDriveManager; "
+            "from app.drive_backends import LocalDriveBackend; "
+            f"GoogleDriveManager(backend=LocalDriveBackend({str(tmp_path / 'drive')!r}))")
+    assert deferred_in(imported_modules(stmt)) == []
+
+def test_lazy_module_loads_on_first_use(monkeypatch):
+    """Test that a proxy imports on attribute access and forwards monkeypatching"""
+    monkeypatch.delitem(sys.modules, 'colorsys', raising=False)
+    module = lazy_import('colorsys')
+    assert isinstance(module, LazyModule)
+    assert 'colorsys' not in sys.modules
+    assert loaded_attr('colorsys', 'rgb_to_hsv') is None
+
+    assert module.rgb_to_hsv(1, 0, 0) == (0.0, 1.0, 1)
+    assert 'colorsys' in sys.modules
+    assert loaded_attr('colorsys', 'rgb_to_hsv') is sys.modules['colorsys'].rgb_to_hsv
+    assert lazy_import('colorsys') is sys.modules['colorsys']
+
+    monkeypatch.setattr(module, 'ONE_THIRD', 0.5)
+    assert sys.modules['colorsys'].ONE_THIRD == 0.5
@@ -0,0 +1,119 @@
+"""
+Tests for structured logging, correlation IDs and secret redaction
+"""
+
+import io
+import json
+import logging
+import threading
+import pytest
+from app import logs
+from app.job_queue import JobQueue, JobWorkerPool, enqueue_job, job_handler
+
+@pytest.fixture
+def log_output(monkeypatch):
+    """Route logging to a buffer; call the returned function to flush and read JSON lines"""
+    monkeypatch.setenv('SENDER_PASSWORD', 'hunter2-app-password')
+    buffer = io.StringIO()
+    handler = logs.configure_logging(level='DEBUG', fmt='json', stream=buffer)
+
+    def read():
+        handler.stop()
+        return [json.loads(line) for line in buffer.getvalue().splitlines()]
+
+    yield read
+    handler.stop()
+    logging.getLogger().removeHandler(handler)
+    monkeypatch.setattr(logs, '_handler', None)
+
+def test_json_lines_with_extra_fields(log_output):
+    """Test that records become one JSON object each, extra fields included"""
+    logging.getLogger('app.test').info("Uploaded %s", 'resume.pdf', extra={'bytes': 1024})
+    try:
+        raise ValueError('boom')
+    except ValueError:
+        logging.getLogger('app.test').exception("Upload failed")
+
+    first, second = log_output()
+    assert first['message'] == 'Uploaded resume.pdf'
+    assert first['level'] == 'INFO'
+    assert first['logger'] == 'app.test'
+    assert first['bytes'] == 1024
+    assert 'ValueError: boom' in second['exception']
+
+def test_secrets_redacted(log_output):
+    """Test that the SMTP password and password-like fields never reach the output"""
+    logging.getLogger('app.test').warning("Login with hunter2-app-password failed",
+                                          extra={'smtp_password': 'x', 'detail': 'pw=hunter2-app-password'})
+
+    record, = log_output()
+    assert 'hunter2-app-password' not in json.dumps(record)
+    assert record['message'] == f"Login with {logs.REDACTED} failed"
+    assert record['smtp_password'] == logs.REDACTED
+    assert record['detail'] == f"pw={logs.REDACTED}"
+
+def test_request_id_logged_and_returned(app, log_output):
+    """Test that a request's log lines and response share the incoming X-Request-ID"""
+    @app.route('/log-test')
+    def log_test():
+        logging.getLogger('app.test').info("handling")
+        return 'ok'
+
+    response = app.test_client().get('/log-test', headers={'X-Request-ID': 'req-123'})
+    assert response.headers['X-Request-ID'] == 'req-123'
+    generated = app.test_client().get('/log-test').headers['X-Request-ID']
+    assert len(generated) == 32
+    # Oversized or forged IDs are replaced, never echoed or logged
+    for forged in ('a' * 65, 'req-1" level=ERROR', 'req\u2028x'):
+        replaced = app.test_client().get('/log-test', headers={'X-Request-ID': forged}).headers['X-Request-ID']
+        assert replaced != forged and len(replaced) == 32
+
+    records = [r for r in log_output() if r['message'] == 'handling']
+    assert [r['request_id'] for r in records][:2] == ['req-123', generated]
+    assert len(records) == 5
+    assert logs.correlation_id.get() is None
+
+def test_job_logs_carry_request_id(app, tmp_path, log_output):
+    """Test that a job queued during a request logs with that request's ID"""
+    @job_handler('log_test_job')
+    def log_test_job(payload):
+        logging.getLogger('app.test').info("job ran")
+
+    queue = JobQueue(str(tmp_path / 'log-jobs.sqlite3'))
+    app.extensions['job_queue'] = queue
+    with app.test_request_context(headers={'X-Request-ID': 'req-456'}):
+        app.preprocess_request()
+        enqueue_job(app, 'log_test_job', {})
+        logs._clear_request_id()
+
+    assert JobWorkerPool(queue, app=app).run_once()
+    record, = [r for r in log_output() if r['message'] == 'job ran']
+    assert record['request_id'] == 'req-456'
+
+def test_debug_sampling():
+    """Test that DEBUG records are sampled while warnings always pass"""
+    sampler = logs.SamplingFilter(0.0)
+    debug = logging.makeLogRecord({'levelno': logging.DEBUG})
+    warning = logging.makeLogRecord({'levelno': logging.WARNING})
+    assert not sampler.filter(debug)
+    assert sampler.filter(warning)
+    assert logs.SamplingFilter(1.0).filter(debug)
+
+def test_full_queue_drops_instead_of_blocking():
+    """Test that a stalled writer makes logging drop records, not block the caller"""
+    release = threading.Event()
+
+    class StalledHandler(logging.Handler):
+        def emit(self, record):
+            release.wait(5)
+
+    handler = logs.NonBlockingQueueHandler(StalledHandler(), maxsize=2)
+    logger = logging.Logger('stalled')
+    logger.addHandler(handler)
+    try:
+        for i in range(20):
+            logger.warning("line %d", i)
+        assert handler.dropped >= 15
+    finally:
+        release.set()
+        handler.stop()
@@ -0,0 +1,104 @@
+"""
+Tests for the /metrics endpoint and cross-process metric aggregation
+"""
+
+import io
+import os
+import re
+from app import smtp_pool
+from app.metrics import Counter, Gauge, Histogram, Registry
+from app.smtp_pool import SMTPConnectionPool
+from tests.conftest import submit
+
+def sample(text, line_prefix):
+    """Value of the first exposition line starting with line_prefix (0 if absent)"""
+    for line in text.splitlines():
+        if line.startswith(line_prefix + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    return 0.0
+
+def test_request_and_upload_metrics(client):
+    """Test per-route latency and upload byte totals in the exposition"""
+    before = client.get('/metrics').get_data(as_text=True)
+    route = 'ajfm_http_request_duration_seconds_count{route="/api/testimonials",method="GET",status="200"}'
+    client.get('/api/testimonials')
+    client.get('/api/testimonials')
+    submit(client, resume=(io.BytesIO(b'%PDF-1.4 metrics test'), 'resume.pdf'))
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+    assert sample(text, route) - sample(before, route) == 2
+    assert sample(text, 'ajfm_upload_bytes_total') - sample(before, 'ajfm_upload_bytes_total') == 21
+    stage = 'ajfm_submission_stage_duration_seconds_count{stage="upload_save",outcome="ok"}'
+    assert sample(text, stage) - sample(before, stage) == 1
+    assert '# TYPE ajfm_http_request_duration_seconds histogram' in text
+    assert re.search(r'^ajfm_job_queue_depth 1$', text, re.M)
+
+def test_metrics_token(app, client):
+    app.config['METRICS_TOKEN'] = 'secret'
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer secret'}).status_code == 200
+
+def test_smtp_stages_timed(monkeypatch):
+    """Test that connect, starttls, login and send are timed separately"""
+    class FakeSMTP:
+        def __init__(self, host, port, timeout=None): pass
+        def starttls(self): pass
+        def login(self, username, password): raise smtplib_error
+        def quit(self): pass
+
+    smtplib_error = smtp_pool.smtplib.SMTPAuthenticationError(535, b'bad password')
+    monkeypatch.setattr(smtp_pool.smtplib, 'SMTP', FakeSMTP)
+    registry = Registry()
+    stages = Histogram(registry, 'stages', 'test', ['stage', 'outcome'])
+    monkeypatch.setattr('app.metrics.STAGE_SECONDS', stages)
+
+    pool = SMTPConnectionPool('smtp.example.com', 587, 'user', 'wrong')
+    try:
+        pool.sendmail('a@example.com', 'b@example.com', 'hello')
+    except smtp_pool.smtplib.SMTPAuthenticationError:
+        pass
+    text = registry.render()
+    assert 'stages_count{stage="smtp_connect",outcome="ok"} 1' in text
+    assert 'stages_count{stage="smtp_starttls",outcome="ok"} 1' in text
+    assert 'stages_count{stage="smtp_login",outcome="error"} 1' in text
+    assert 'smtp_send' not in text
+
+def test_values_aggregate_across_processes(tmp_path):
+    """Test that counters and histograms from other (and exited) workers are summed"""
+    registry = Registry(str(tmp_path), flush_interval=60)
+    requests = Counter(registry, 'requests_total', 'test', ['route'])
+    latency = Histogram(registry, 'latency_seconds', 'test', buckets=(0.1, 1))
+    busy = Gauge(registry, 'busy', 'test')
+
+    requests.inc(route='/')
+    latency.observe(0.05)
+    busy.set(1)
+
+    pid = os.fork()
+    if pid == 0:
+        # Worker process: starts from zero, records, flushes and exits
+        try:
+            requests.inc(3, route='/')
+            latency.observe(0.5)
+            latency.observe(5)
+            busy.set(2)
+            registry.flush()
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+
+    text = registry.render()
+    assert 'requests_total{route="/"} 4' in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 2' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+    assert 'latency_seconds_count 3' in text
+    # The worker has exited, so only this process's gauge counts
+    assert 'busy 1' in text
+
+    registry.mark_process_dead(pid)
+    assert not os.path.exists(tmp_path / f'metrics_{pid}.json')
+    assert 'requests_total{route="/"} 4' in registry.render()
@@ -0,0 +1,49 @@
+"""
+Tests for streaming MIME message encoding
+"""
+
+import os
+from email import message_from_bytes
+from email.policy import default
+from app.mime_stream import StreamingEmail, write_data
+
+def test_attachment_round_trips(tmp_path):
+    """Test that a streamed attachment decodes back to the original bytes"""
+    data = os.urandom(200 * 1024 + 7)
+    path = tmp_path / 'resume.pdf'
+    path.write_bytes(data)
+    
+    msg = StreamingEmail('from@example.com', 'to@example.com', 'New AJFM Lead: José', 'Hello')
+    msg.attach_file(str(path), 'résumé.pdf')
+    
+    parsed = message_from_bytes(msg.as_bytes(), policy=default)
+    assert parsed['Subject'] == 'New AJFM Lead: José'
+    body, attachment = list(parsed.iter_parts())
+    assert body.get_content().strip() == 'Hello'
+    assert attachment.get_filename() == 'résumé.pdf'
+    assert attachment.get_content() == data
+
+def test_chunks_are_bounded(tmp_path):
+    """Test that no chunk grows with the size of the attachment"""
+    path = tmp_path / 'resume.pdf'
+    path.write_bytes(os.urandom(2 * 1024 * 1024))
+    
+    msg = StreamingEmail('from@example.com', 'to@example.com', 'Subject', 'Body')
+    msg.attach_file(str(path), 'resume.pdf')
+    
+    chunks = list(msg.iter_chunks(chunk_size=57 * 64))
+    assert max(len(chunk) for chunk in chunks) < 8 * 1024
+    assert all(chunk.endswith(b'\r\n') for chunk in chunks)
+
+def test_write_data_dot_stuffs_lines():
+    """Test that lines starting with a dot are escaped for SMTP DATA"""
+    class Recorder:
+        def __init__(self):
+            self.sent = b''
+        
+        def send(self, data):
+            self.sent += data
+    
+    server = Recorder()
+    write_data(server, iter([b'.hidden\r\n', b'ok\r\n.\r\n']))
+    assert server.sent == b'..hidden\r\nok\r\n..\r\n.\r\n'
@@ -0,0 +1,77 @@
+"""
+Tests for the pre-rendered page cache
+"""
+
+import gzip
+import pytest
+from app import page_cache
+
+@pytest.fixture
+def render_count(monkeypatch):
+    """Count template renders done by the page cache"""
+    calls = []
+    real_render = page_cache.render_template
+
+    def counting_render(template, **context):
+        calls.append(template)
+        return real_render(template, **context)
+
+    monkeypatch.setattr(page_cache, 'render_template', counting_render)
+    return calls
+
+def test_pages_rendered_once(app, client, render_count):
+    """Test that repeated hits are served from memory"""
+    for _ in range(3):
+        assert client.get('/').status_code == 200
+        assert client.get('/login').status_code == 200
+    # Pre-rendered in create_app, before the counter was installed
+    assert render_count == []
+
+    app.extensions['page_cache'].clear()
+    client.get('/')
+    client.get('/')
+    assert render_count == ['home.html']
+
+def test_etag_and_not_modified(client):
+    """Test strong ETag, Cache-Control and 304 on If-None-Match"""
+    response = client.get('/get-started')
+    etag = response.headers['ETag']
+    assert not etag.startswith('W/')
+    assert response.headers['Cache-Control'].startswith('public, max-age=')
+    assert 'Accept-Encoding' in response.headers['Vary']
+
+    cached = client.get('/get-started', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.data == b''
+    assert cached.headers['ETag'] == etag
+
+    assert client.get('/get-started', headers={'If-None-Match': '"stale"'}).status_code == 200
+
+def test_gzip_variant(client):
+    """Test that gzip-capable clients get the precompressed body with its own ETag"""
+    plain = client.get('/')
+    compressed = client.get('/', headers={'Accept-Encoding': 'gzip, deflate'})
+
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed.data) == plain.data
+    assert len(compressed.data) < len(plain.data)
+    assert compressed.headers['ETag'] != plain.headers['ETag']
+    assert client.get('/', headers={'Accept-Encoding': 'gzip', 'If-None-Match': compressed.headers['ETag']}).status_code == 304
+
+def test_template_change_invalidates_in_debug(app, client, render_count, monkeypatch):
+    """Test that a newer template mtime re-renders only when auto reload is on"""
+    cache = app.extensions['page_cache']
+    mtime = [1.0]
+    monkeypatch.setattr(cache, '_templates_mtime', lambda: mtime[0])
+
+    client.get('/profile')
+    mtime[0] = 2.0
+    client.get('/profile')
+    assert render_count == []
+
+    app.jinja_env.auto_reload = True
+    client.get('/profile')
+    client.get('/profile')
+    mtime[0] = 3.0
+    client.get('/profile')
+    assert render_count == ['profile.html', 'profile.html']
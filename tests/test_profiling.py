@@ -0,0 +1,96 @@
+"""
+Tests for opt-in per-request profiling
+"""
+
+import os
+import time
+import pytest
+from app.profiling import ProfileStore, ProfilingMiddleware, sign, verify
+from tests.conftest import submit
+
+SECRET = 'profile-secret'
+
+@pytest.fixture
+def profiled_app(make_app, tmp_path):
+    return make_app(PROFILE_SECRET=SECRET, PROFILE_DIR=str(tmp_path / 'profiles'))
+
+def test_disabled_by_default(app):
+    """Test that without a secret or sampling rate nothing is wrapped or routed"""
+    assert not isinstance(app.wsgi_app, ProfilingMiddleware)
+    assert 'profiles' not in app.extensions
+    assert app.test_client().get('/_profiles/').status_code == 404
+
+def test_signatures():
+    now = time.time()
+    signature = sign(SECRET, '/api/submit-form', ttl=60, now=now)
+    assert verify(SECRET, signature, '/api/submit-form', 300, now=now)
+    assert not verify(SECRET, signature, '/api/testimonials', 300, now=now)
+    assert not verify('other-secret', signature, '/api/submit-form', 300, now=now)
+    assert not verify(SECRET, signature, '/api/submit-form', 300, now=now + 61)
+    # A signature valid for longer than the server allows is refused
+    assert not verify(SECRET, sign(SECRET, '/', ttl=3600, now=now), '/', 300, now=now)
+
+def test_signed_request_and_its_job_are_profiled(profiled_app):
+    """Test that a signed submission saves a profile for the request and for its email job"""
+    client = profiled_app.test_client()
+    assert submit(client).status_code == 202
+    assert profiled_app.extensions['profiles'].entries() == []
+
+    response = submit(client, {'X-Profile-Signature': sign(SECRET, '/api/submit-form')})
+    assert response.status_code == 202
+    entry, = profiled_app.extensions['profiles'].entries()
+    assert entry['target'] == 'POST /api/submit-form'
+    assert entry['reason'] == 'signed'
+    assert entry['status'] == 202
+    assert entry['request_id'] == response.headers['X-Request-ID']
+
+    pool = profiled_app.extensions['job_workers']
+    assert pool.run_once() and pool.run_once()
+    entries = profiled_app.extensions['profiles'].entries()
+    assert [e['kind'] for e in entries] == ['job', 'request']
+    assert entries[0]['target'] == 'lead_notification'
+    assert entries[0]['request_id'] == entry['request_id']
+
+def test_sampling(make_app, tmp_path):
+    """Test that sampling only applies to the configured paths"""
+    app = make_app(PROFILE_SAMPLE_RATE=1.0, PROFILE_DIR=str(tmp_path / 'profiles'))
+    client = app.test_client()
+    client.get('/api/testimonials')
+    submit(client)
+
+    entry, = app.extensions['profiles'].entries()
+    assert entry['reason'] == 'sampled'
+    assert entry['target'] == 'POST /api/submit-form'
+    # No secret, so there is no viewer
+    assert client.get('/_profiles/').status_code == 404
+
+def test_index_page(profiled_app):
+    """Test that the index lists profiles and needs a signature, as do the files"""
+    client = profiled_app.test_client()
+    client.get('/api/testimonials', headers={'X-Profile-Signature': sign(SECRET, '/api/testimonials')})
+    name = profiled_app.extensions['profiles'].entries()[0]['name']
+
+    assert client.get('/_profiles/').status_code == 403
+    assert client.get(f'/_profiles/{name}.txt').status_code == 403
+    signature = sign(SECRET, '/_profiles')
+    page = client.get(f'/_profiles/?signature={signature}')
+    assert page.status_code == 200
+    assert 'GET /api/testimonials' in page.get_data(as_text=True)
+
+    summary = client.get(f'/_profiles/{name}.txt', headers={'X-Profile-Signature': signature})
+    assert summary.status_code == 200
+    assert 'function calls' in summary.get_data(as_text=True)
+    assert client.get(f'/_profiles/{name}.prof?signature={signature}').status_code == 200
+    assert client.get(f'/_profiles/{name}.json?signature={signature}').status_code == 404
+    # Viewing profiles is never profiled itself
+    assert len(profiled_app.extensions['profiles'].entries()) == 1
+
+def test_rotation(tmp_path):
+    """Test that only the newest profiles are kept"""
+    store = ProfileStore(str(tmp_path), keep=2)
+    for i in range(4):
+        with store.capture('request', f'GET /page{i}', 'signed'):
+            sum(range(1000))
+
+    assert [e['target'] for e in store.entries()] == ['GET /page3', 'GET /page2']
+    assert len(os.listdir(tmp_path)) == 6
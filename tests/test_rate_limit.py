@@ -0,0 +1,109 @@
+"""
+Tests for the per-IP rate limit on /api
+"""
+
+import multiprocessing
+import pytest
+from app.rate_limit import TokenBucketStore
+from tests.conftest import submit
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def limited_app(make_app):
+    # The test client connects from 127.0.0.1, standing in for nginx
+    return make_app(RATE_LIMIT_BURST=2, RATE_LIMIT_PER_MINUTE=1, RATE_LIMIT_TRUSTED_PROXIES=['127.0.0.1'])
+
+def test_bucket_refills(tmp_path):
+    """Test burst, refusal with the wait until the next token, and refill over time"""
+    clock = FakeClock()
+    store = TokenBucketStore(str(tmp_path / 'buckets.bin'), rate=0.5, burst=2, slots=16, clock=clock)
+    assert store.take('1.2.3.4') == 0
+    assert store.take('1.2.3.4') == 0
+    assert store.take('1.2.3.4') == pytest.approx(2.0)
+    assert store.take('5.6.7.8') == 0
+
+    clock.now += 2
+    assert store.take('1.2.3.4') == 0
+    assert store.take('1.2.3.4') > 0
+    # A long idle bucket never holds more than the burst
+    clock.now += 3600
+    assert [store.take('1.2.3.4') for _ in range(3)][-1] > 0
+
+def test_full_table_reuses_idle_buckets(tmp_path):
+    clock = FakeClock()
+    store = TokenBucketStore(str(tmp_path / 'buckets.bin'), rate=1, burst=1, slots=4, probes=4, clock=clock)
+    for i in range(10):
+        clock.now += 1
+        assert store.take(f'10.0.0.{i}') == 0
+    assert store.take('10.0.0.9') > 0
+
+def test_table_size_change_uses_new_file(tmp_path):
+    """Test that a worker with another table size never resizes a file others have mapped"""
+    path = str(tmp_path / 'buckets.bin')
+    small = TokenBucketStore(path, rate=0.001, burst=1, slots=16)
+    assert small.take('1.2.3.4') == 0
+    large = TokenBucketStore(path, rate=0.001, burst=1, slots=32)
+    assert large.path != small.path
+    assert large.take('1.2.3.4') == 0
+    assert small.take('1.2.3.4') > 0
+    assert (tmp_path / 'buckets-16.bin').stat().st_size == 16 * 24
+
+def _spend(path):
+    TokenBucketStore(path, rate=0.001, burst=3).take('9.9.9.9')
+
+def test_budget_shared_across_processes(tmp_path):
+    """Test that tokens spent in other worker processes count against the same bucket"""
+    path = str(tmp_path / 'buckets.bin')
+    store = TokenBucketStore(path, rate=0.001, burst=3)
+    store.take('9.9.9.9')
+    context = multiprocessing.get_context('fork')
+    for _ in range(2):
+        process = context.Process(target=_spend, args=(path,))
+        process.start()
+        process.join()
+    assert store.take('9.9.9.9') > 0
+
+def test_api_returns_429_per_client(limited_app):
+    """Test that each client behind the proxy has its own budget and testimonials are exempt"""
+    client = limited_app.test_client()
+    first = {'X-Real-IP': '203.0.113.7'}
+    assert submit(client, first).status_code == 202
+    assert submit(client, first).status_code == 202
+    response = submit(client, first)
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '60'
+    assert response.get_json()['success'] is False
+
+    assert client.get('/api/testimonials', headers=first).status_code == 200
+    assert client.get('/', headers=first).status_code == 200
+
+def test_trusted_proxy_forwarded_clients_get_own_buckets(limited_app):
+    """Test that X-Forwarded-For from a trusted peer picks the bucket, skipping trusted hops"""
+    client = limited_app.test_client()
+    for _ in range(2):
+        assert submit(client, {'X-Forwarded-For': '203.0.113.7'}).status_code == 202
+    assert submit(client, {'X-Forwarded-For': '203.0.113.7'}).status_code == 429
+    # nginx appends the address it saw; earlier entries are client-supplied and ignored
+    assert submit(client, {'X-Forwarded-For': '203.0.113.7, 198.51.100.2'}).status_code == 202
+    assert submit(client, {'X-Forwarded-For': '198.51.100.2, 127.0.0.1'}).status_code == 202
+    assert submit(client, {'X-Forwarded-For': '198.51.100.2'}).status_code == 429
+
+def test_proxy_headers_ignored_from_untrusted_peers(limited_app):
+    """Test that a client that is not a trusted proxy cannot pick its bucket with the headers"""
+    client = limited_app.test_client()
+    direct = {'REMOTE_ADDR': '192.0.2.10'}
+    for i in range(2):
+        assert submit(client, {'X-Real-IP': f'203.0.113.{i}'}, environ_base=direct).status_code == 202
+    assert submit(client, {'X-Forwarded-For': '203.0.113.9'}, environ_base=direct).status_code == 429
+
+def test_no_trusted_proxies_by_default(make_app):
+    """Test that out of the box even a loopback peer cannot pick its bucket with X-Real-IP"""
+    client = make_app(RATE_LIMIT_BURST=1).test_client()
+    assert submit(client, {'X-Real-IP': '203.0.113.7'}).status_code == 202
+    assert submit(client, {'X-Real-IP': '203.0.113.8'}).status_code == 429
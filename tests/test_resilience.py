@@ -0,0 +1,187 @@
+"""
+Tests for timeouts, retries and circuit breakers around SMTP and Drive
+"""
+
+import asyncio
+import smtplib
+import pytest
+from app import smtp_pool
+from app.job_queue import JobQueue, JobWorkerPool, job_handler
+from app.resilience import CircuitBreaker, CircuitOpenError, call_with_retries
+from app.smtp_pool import SMTPConnectionPool
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def failing(error):
+    def call():
+        call.count += 1
+        raise error
+    call.count = 0
+    return call
+
+def test_breaker_opens_then_probes():
+    """Test closed -> open after the threshold -> one half-open trial -> closed or open again"""
+    clock = FakeClock()
+    breaker = CircuitBreaker('dep', failure_threshold=2, reset_timeout=30, clock=clock)
+    down = failing(ConnectionError('down'))
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            call_with_retries(down, attempts=1, breaker=breaker)
+    assert breaker.state == 'open'
+    with pytest.raises(CircuitOpenError) as excinfo:
+        call_with_retries(down, attempts=1, breaker=breaker)
+    assert down.count == 2
+    assert excinfo.value.retry_after == 30
+
+    # After reset_timeout one trial goes through; its failure re-opens the circuit
+    clock.now += 30
+    with pytest.raises(ConnectionError):
+        call_with_retries(down, attempts=1, breaker=breaker)
+    assert breaker.state == 'open'
+    clock.now += 30
+    assert call_with_retries(lambda: 'ok', attempts=1, breaker=breaker) == 'ok'
+    assert breaker.state == 'closed'
+
+def test_only_one_trial_while_half_open():
+    clock = FakeClock()
+    breaker = CircuitBreaker('dep', failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.now += 10
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+def test_permanent_error_does_not_close_half_open_circuit():
+    """Test that a trial ending in bad input frees the trial without declaring the dependency healthy"""
+    clock = FakeClock()
+    breaker = CircuitBreaker('dep', failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.now += 10
+    with pytest.raises(ValueError):
+        call_with_retries(failing(ValueError('bad input')), attempts=1, retryable=lambda e: False, breaker=breaker)
+    assert breaker.state == 'half_open'
+    assert call_with_retries(lambda: 'ok', attempts=1, breaker=breaker) == 'ok'
+    assert breaker.state == 'closed'
+
+def test_retries_back_off_with_jitter():
+    """Test that transient errors are retried with growing, capped, jittered delays"""
+    delays = []
+    flaky = failing(TimeoutError('slow'))
+    with pytest.raises(TimeoutError):
+        call_with_retries(flaky, attempts=4, base_delay=1, max_delay=3, sleep=delays.append)
+    assert flaky.count == 4
+    assert len(delays) == 3
+    assert all(0 <= d <= cap for d, cap in zip(delays, [1, 2, 3]))
+
+    permanent = failing(ValueError('bad input'))
+    with pytest.raises(ValueError):
+        call_with_retries(permanent, attempts=4, retryable=lambda e: isinstance(e, OSError), sleep=delays.append)
+    assert permanent.count == 1
+
+def test_smtp_timeouts_retries_and_fail_fast(monkeypatch):
+    """Test that SMTP gets a connect timeout, 4xx replies are retried and an open circuit skips smtplib"""
+    opened = []
+
+    class BusySMTP:
+        def __init__(self, host, port, timeout=None):
+            opened.append(timeout)
+        def starttls(self): pass
+        def login(self, username, password):
+            raise smtplib.SMTPResponseException(421, b'try again later')
+        def quit(self): pass
+
+    monkeypatch.setattr(smtp_pool.smtplib, 'SMTP', BusySMTP)
+    breaker = CircuitBreaker('smtp', failure_threshold=2, reset_timeout=60)
+    pool = SMTPConnectionPool('smtp.example.com', 587, 'user', 'secret', connect_timeout=3, breaker=breaker,
+                              retry={'attempts': 2, 'base_delay': 0, 'max_delay': 0})
+
+    with pytest.raises(smtplib.SMTPResponseException):
+        pool.sendmail('a@example.com', 'b@example.com', 'hello')
+    assert opened == [3, 3]
+    with pytest.raises(CircuitOpenError):
+        pool.sendmail('a@example.com', 'b@example.com', 'hello')
+    assert len(opened) == 2
+
+def test_auth_failure_not_retried(monkeypatch):
+    class RejectingSMTP:
+        def __init__(self, host, port, timeout=None): pass
+        def starttls(self): pass
+        def login(self, username, password):
+            raise smtplib.SMTPAuthenticationError(535, b'bad credentials')
+        def quit(self): pass
+
+    monkeypatch.setattr(smtp_pool.smtplib, 'SMTP', RejectingSMTP)
+    breaker = CircuitBreaker('smtp', failure_threshold=1)
+    pool = SMTPConnectionPool('smtp.example.com', 587, 'user', 'wrong', breaker=breaker,
+                              retry={'attempts': 3, 'base_delay': 0, 'max_delay': 0})
+    with pytest.raises(smtplib.SMTPAuthenticationError):
+        pool.sendmail('a@example.com', 'b@example.com', 'hello')
+    assert breaker.state == 'closed'
+
+def test_refused_recipient_not_retried(monkeypatch):
+    """Test that a 550 for one address is sent once and leaves the circuit closed for everyone else"""
+    sends = []
+
+    class RefusingSMTP:
+        def __init__(self, host, port, timeout=None): pass
+        def starttls(self): pass
+        def login(self, username, password): pass
+        def noop(self): return (250, b'ok')
+        def rset(self): pass
+        def sendmail(self, from_addr, to_addrs, msg):
+            sends.append(to_addrs)
+            raise smtplib.SMTPRecipientsRefused({to_addrs: (550, b'no such user')})
+        def quit(self): pass
+
+    monkeypatch.setattr(smtp_pool.smtplib, 'SMTP', RefusingSMTP)
+    breaker = CircuitBreaker('smtp', failure_threshold=2)
+    pool = SMTPConnectionPool('smtp.example.com', 587, 'user', 'secret', breaker=breaker,
+                              retry={'attempts': 3, 'base_delay': 0, 'max_delay': 0})
+    for _ in range(2):
+        with pytest.raises(smtplib.SMTPRecipientsRefused):
+            pool.sendmail('a@example.com', 'nobody@example.com', 'hello')
+    assert len(sends) == 2
+    assert breaker.state == 'closed'
+
+def test_open_circuit_postpones_job(tmp_path):
+    """Test that a job hitting an open circuit waits without using up an attempt"""
+    @job_handler('circuit_test_job')
+    def circuit_test_job(payload):
+        raise CircuitOpenError('smtp', 30)
+
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite3'), max_attempts=1)
+    job_id = queue.enqueue('circuit_test_job', {})
+    assert JobWorkerPool(queue).run_once()
+
+    job = queue.get(job_id)
+    assert job['status'] == 'pending'
+    assert job['attempts'] == 0
+    assert 'circuit open' in job['last_error']
+    assert queue.claim() is None
+
+def test_drive_outage_fails_fast(tmp_path):
+    """Test that once the Drive circuit opens, uploads return None without calling the backend"""
+    pytest.importorskip('googleapiclient')
+    from app.drive_backends import LocalDriveBackend
+    from app.google_drive_utils import FolderCache, GoogleDriveManager
+
+    backend = LocalDriveBackend(str(tmp_path / 'drive'), error_rate={'upload': 1.0})
+    manager = GoogleDriveManager(backend=backend, breaker=CircuitBreaker('drive', failure_threshold=2),
+                                 retry={'attempts': 2, 'base_delay': 0, 'max_delay': 0})
+    manager.checkpoint_dir = str(tmp_path / 'checkpoints')
+    manager.folder_cache = FolderCache(path=None)
+    manager.shard_by = None
+    resume = tmp_path / 'resume.pdf'
+    resume.write_bytes(b'%PDF-1.4 outage')
+
+    assert asyncio.run(manager.upload_file(str(resume), 'resume.pdf', 'ada@example.com')) is None
+    calls = backend.calls['upload']
+    assert calls == 2
+    assert asyncio.run(manager.upload_file(str(resume), 'resume.pdf', 'ada@example.com')) is None
+    assert backend.calls['upload'] == calls
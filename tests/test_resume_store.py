@@ -0,0 +1,110 @@
+"""
+Tests for the content-addressed resume store
+"""
+
+import hashlib
+import io
+import os
+from app.resume_store import ResumeStore
+from tests.conftest import submit
+
+def test_put_names_file_by_hash(tmp_path):
+    """Test that stored files are named by their SHA-256"""
+    store = ResumeStore(str(tmp_path))
+    digest, size = store.put(io.BytesIO(b'%PDF-1.4 resume'))
+    
+    assert digest == hashlib.sha256(b'%PDF-1.4 resume').hexdigest()
+    assert size == 15
+    with open(store.path(digest), 'rb') as f:
+        assert f.read() == b'%PDF-1.4 resume'
+
+def test_identical_files_stored_once(tmp_path):
+    """Test that duplicate uploads share one file and are reference counted"""
+    store = ResumeStore(str(tmp_path))
+    first, _ = store.put(io.BytesIO(b'same bytes'))
+    second, _ = store.put(io.BytesIO(b'same bytes'))
+    
+    assert first == second
+    assert store.refcount(first) == 2
+    assert len(list(store.iter_objects())) == 1
+    assert os.listdir(store.tmp_dir) == []
+
+def test_release_deletes_with_last_reference(tmp_path):
+    """Test that the file survives until every reference is released"""
+    store = ResumeStore(str(tmp_path))
+    digest, _ = store.put(io.BytesIO(b'resume'))
+    store.put(io.BytesIO(b'resume'))
+    
+    assert store.release(digest) is False
+    assert os.path.exists(store.path(digest))
+    assert store.release(digest) is True
+    assert not os.path.exists(store.path(digest))
+
+def test_deliveries_are_recorded_per_channel(tmp_path):
+    """Test that email and Drive deliveries are tracked by hash"""
+    store = ResumeStore(str(tmp_path))
+    digest, _ = store.put(io.BytesIO(b'resume'))
+    
+    assert store.get_delivery(digest, 'email') is None
+    store.mark_delivered(digest, 'drive', {'file_id': 'abc'})
+    assert store.get_delivery(digest, 'drive')['reference'] == {'file_id': 'abc'}
+    assert store.get_delivery(digest, 'email') is None
+
+def test_same_resume_from_two_submissions(app, client):
+    """Test that two submissions of resume.pdf do not overwrite each other"""
+    for content in (b'%PDF-1.4 first', b'%PDF-1.4 second'):
+        response = submit(client, resume=(io.BytesIO(content), 'resume.pdf'))
+        assert response.status_code == 202
+    
+    store = app.extensions['resume_store']
+    assert len(list(store.iter_objects())) == 2
+
+def test_repeat_resume_not_reattached(app, monkeypatch):
+    """Test that a resume already emailed once is not attached again"""
+    from app import routes
+    calls = []
+    monkeypatch.setattr(routes, 'send_notification_email',
+                        lambda *args, **kwargs: calls.append(kwargs['attach_resume']) or True)
+    
+    store = app.extensions['resume_store']
+    for _ in range(2):
+        digest, _ = store.put(io.BytesIO(b'%PDF-1.4 resume'))
+        with app.app_context():
+            routes.process_lead_notification({
+                'name': 'Test User',
+                'email': 'test@example.com',
+                'phone': '',
+                'resume_filename': 'resume.pdf',
+                'resume_sha256': digest
+            })
+    
+    assert calls == [True, False]
+    assert not os.path.exists(store.path(digest))
+
+def test_dead_lead_job_keeps_resume(app, client, monkeypatch):
+    """Test that a lead email given up on leaves the resume for the Drive backlog uploader"""
+    from app import routes
+    monkeypatch.setattr(routes, 'send_notification_email', lambda *args, **kwargs: False)
+    app.extensions['job_queue'].max_attempts = 1
+    
+    response = submit(client)
+    assert response.status_code == 202
+    assert app.extensions['job_workers'].run_once()
+    
+    store = app.extensions['resume_store']
+    digest, = [obj['digest'] for obj in store.iter_objects()]
+    job, = app.extensions['job_queue'].iter_jobs('lead_notification')
+    assert job['status'] == 'dead'
+    assert store.refcount(digest) == 1
+    assert os.path.exists(store.path(digest))
+
+def test_unqueued_submission_releases_resume(app, client, monkeypatch):
+    """Test that the resume is released when its email job cannot be queued"""
+    from app import routes
+    
+    def broken_enqueue(*args, **kwargs):
+        raise RuntimeError('queue unavailable')
+    monkeypatch.setattr(routes, 'enqueue_job', broken_enqueue)
+    response = submit(client)
+    assert response.status_code == 500
+    assert list(app.extensions['resume_store'].iter_objects()) == []
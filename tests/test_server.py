@@ -0,0 +1,53 @@
+"""
+Tests for the production server settings
+"""
+
+import pytest
+from app import server
+
+def test_gthread_by_default():
+    """Test that uploads get threaded workers sized from the CPU count"""
+    settings = server.worker_settings(cpu_count=4, worker_class='gthread', workers=0, threads=0)
+    assert settings == {'worker_class': 'gthread', 'workers': 5, 'threads': server.DEFAULT_THREADS}
+
+def test_sync_and_overrides():
+    """Test the sync worker formula and explicit worker/thread counts"""
+    assert server.worker_settings(cpu_count=2, worker_class='sync', workers=0, threads=8)['workers'] == 5
+    assert server.worker_settings(cpu_count=2, worker_class='sync', workers=0, threads=8)['threads'] == 1
+    settings = server.worker_settings(cpu_count=2, worker_class='gthread', workers=3, threads=16)
+    assert (settings['workers'], settings['threads']) == (3, 16)
+
+def test_gevent_falls_back_without_gevent(monkeypatch):
+    """Test that a missing gevent install does not stop the server from booting"""
+    monkeypatch.setattr(server.importlib.util, 'find_spec', lambda name: None)
+    assert server.worker_settings(cpu_count=2, worker_class='gevent')['worker_class'] == 'gthread'
+
+def test_unknown_worker_class():
+    with pytest.raises(ValueError):
+        server.worker_settings(cpu_count=2, worker_class='eventlet')
+
+def test_job_workers_start_after_fork(app, monkeypatch):
+    """Test that the WSGI app starts no job threads until the worker hook runs"""
+    pool = app.extensions['job_workers']
+    started = []
+    monkeypatch.setattr(pool, 'start', lambda: started.append(True))
+    monkeypatch.setitem(server.QUEUE_CONFIG, 'autostart', True)
+
+    server.start_worker_services(app)
+    assert started == [True]
+    assert app.config['JOB_WORKERS_AUTOSTART'] is True
+
+def test_drive_token_refresher_starts_with_worker(app, tmp_path, monkeypatch):
+    """Test that a worker with a Drive token starts refreshing it before the first upload"""
+    from app import drive_credentials
+    monkeypatch.setitem(server.QUEUE_CONFIG, 'autostart', False)
+    monkeypatch.setitem(server.GOOGLE_DRIVE_CONFIG, 'backend', 'google')
+    monkeypatch.setitem(server.GOOGLE_DRIVE_CONFIG, 'token_file', str(tmp_path / 'token.json'))
+    started = []
+    monkeypatch.setattr(drive_credentials.SharedCredentials, 'start_refresher', lambda self: started.append(self))
+
+    server.start_worker_services(app)
+    assert started == []
+    (tmp_path / 'token.json').write_text('{}')
+    server.start_worker_services(app)
+    assert [shared.token_file for shared in started] == [str(tmp_path / 'token.json')]
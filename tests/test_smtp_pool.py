@@ -0,0 +1,120 @@
+"""
+Tests for the shared SMTP connection pool
+"""
+
+import smtplib
+import time
+import pytest
+from app import smtp_pool
+from app.smtp_pool import SMTPConnectionPool, get_smtp_pool
+
+class FakeSMTP:
+    """Stand-in for smtplib.SMTP that records calls instead of using the network"""
+    instances = []
+    
+    def __init__(self, host, port, timeout=None):
+        self.alive = True
+        self.sent = []
+        self.logins = 0
+        self.tls = False
+        FakeSMTP.instances.append(self)
+    
+    def starttls(self):
+        self.tls = True
+    
+    def login(self, username, password):
+        self.logins += 1
+    
+    def noop(self):
+        if not self.alive:
+            raise smtplib.SMTPServerDisconnected()
+        return (250, b'OK')
+    
+    def sendmail(self, from_addr, to_addrs, msg):
+        if not self.alive:
+            raise smtplib.SMTPServerDisconnected()
+        self.sent.append(msg)
+        return {}
+    
+    def rset(self):
+        pass
+    
+    def quit(self):
+        self.alive = False
+    
+    def close(self):
+        self.alive = False
+
+@pytest.fixture(autouse=True)
+def fake_smtp(monkeypatch):
+    FakeSMTP.instances = []
+    monkeypatch.setattr(smtp_pool.smtplib, 'SMTP', FakeSMTP)
+    return FakeSMTP
+
+def test_connection_is_reused():
+    """Test that consecutive sends share one authenticated session"""
+    pool = SMTPConnectionPool('smtp.example.com', 587, 'user', 'secret')
+    pool.sendmail('a@example.com', 'b@example.com', 'one')
+    pool.sendmail('a@example.com', 'b@example.com', 'two')
+    
+    assert len(FakeSMTP.instances) == 1
+    assert FakeSMTP.instances[0].logins == 1
+    assert FakeSMTP.instances[0].sent == ['one', 'two']
+
+def test_starttls_can_be_disabled():
+    """Test that STARTTLS is skipped for a plain local server (the benchmark SMTP sink)"""
+    SMTPConnectionPool('smtp.example.com', 587, 'user', 'secret').sendmail('a@example.com', 'b@example.com', 'tls')
+    SMTPConnectionPool('127.0.0.1', 2525, 'user', 'secret', starttls=False).sendmail('a@example.com', 'b@example.com', 'plain')
+    
+    assert [smtp.tls for smtp in FakeSMTP.instances] == [True, False]
+
+def test_dead_connection_is_replaced():
+    """Test that a connection failing NOOP is reopened transparently"""
+    pool = SMTPConnectionPool('smtp.example.com', 587, 'user', 'secret')
+    pool.sendmail('a@example.com', 'b@example.com', 'one')
+    FakeSMTP.instances[0].alive = False
+    
+    pool.sendmail('a@example.com', 'b@example.com', 'two')
+    assert len(FakeSMTP.instances) == 2
+    assert FakeSMTP.instances[1].sent == ['two']
+
+def test_idle_connections_are_evicted():
+    """Test that connections idle longer than idle_timeout are closed"""
+    pool = SMTPConnectionPool('smtp.example.com', 587, 'user', 'secret', idle_timeout=0)
+    pool.sendmail('a@example.com', 'b@example.com', 'one')
+    pool.sendmail('a@example.com', 'b@example.com', 'two')
+    
+    assert len(FakeSMTP.instances) == 2
+    assert FakeSMTP.instances[0].alive is False
+
+def test_pool_respects_max_size():
+    """Test that acquiring beyond max_size times out"""
+    pool = SMTPConnectionPool('smtp.example.com', 587, 'user', 'secret',
+                              max_size=1, acquire_timeout=0.05)
+    with pool.connection():
+        with pytest.raises(TimeoutError):
+            with pool.connection():
+                pass
+    assert pool.stats() == {'in_use': 0, 'idle': 1, 'max_size': 1}
+
+def test_evicted_connections_closed_on_timeout():
+    """Test that idle connections evicted while waiting are closed even when the wait times out"""
+    pool = SMTPConnectionPool('smtp.example.com', 587, 'user', 'secret',
+                              max_size=2, idle_timeout=0.01, acquire_timeout=0.05)
+    with pool.connection():
+        with pool.connection():
+            pass
+        idle = FakeSMTP.instances[1]
+        # Occupy the freed place so the next caller has to wait, and let the idle one go stale
+        pool._in_use += 1
+        time.sleep(0.02)
+        with pytest.raises(TimeoutError):
+            pool._acquire()
+        pool._in_use -= 1
+    assert idle.alive is False
+
+def test_get_smtp_pool_is_shared():
+    """Test that senders using the same account get the same pool"""
+    first = get_smtp_pool('smtp.example.com', 587, 'user', 'secret')
+    assert get_smtp_pool('smtp.example.com', '587', 'user', 'secret') is first
+    assert get_smtp_pool('smtp.example.com', 587, 'other', 'secret') is not first
@@ -0,0 +1,87 @@
+"""
+Tests for the cached testimonials API
+"""
+
+import json
+import os
+import pytest
+
+TESTIMONIALS = [
+    {'name': 'Ada', 'role': 'Engineer', 'company': 'Amazon', 'text': 'Great', 'rating': 5},
+    {'name': 'Grace', 'role': 'Analyst', 'company': 'Oracle', 'text': 'Good', 'rating': 4},
+    {'name': 'Linus', 'role': 'Developer', 'company': 'amazon', 'text': 'Fine', 'rating': 3},
+]
+
+@pytest.fixture
+def data_file(tmp_path):
+    path = tmp_path / 'testimonials.json'
+    path.write_text(json.dumps(TESTIMONIALS))
+    return path
+
+@pytest.fixture
+def client(make_app, data_file):
+    """Test client serving testimonials from a temporary data file"""
+    app = make_app(TESTIMONIALS_FILE=str(data_file))
+    app.extensions['testimonials'].check_interval = 0
+    return app.test_client()
+
+def test_list_with_etag_and_not_modified(client):
+    """Test that the full list is returned with a strong ETag and 304 on revalidation"""
+    response = client.get('/api/testimonials')
+    assert response.status_code == 200
+    assert [t['name'] for t in response.get_json()] == ['Ada', 'Grace', 'Linus']
+    assert response.headers['X-Total-Count'] == '3'
+    assert response.headers['Cache-Control'].startswith('public, max-age=')
+    etag = response.headers['ETag']
+    assert not etag.startswith('W/')
+
+    cached = client.get('/api/testimonials', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.data == b''
+
+def test_filters(client):
+    """Test company (case-insensitive), rating and min_rating filters"""
+    names = lambda query: [t['name'] for t in client.get(f'/api/testimonials?{query}').get_json()]
+    assert names('company=AMAZON') == ['Ada', 'Linus']
+    assert names('rating=4') == ['Grace']
+    assert names('min_rating=4') == ['Ada', 'Grace']
+    assert names('company=amazon&min_rating=4') == ['Ada']
+    assert names('company=Nowhere') == []
+
+def test_pagination_headers(client):
+    """Test that pages stay JSON lists and link to their neighbours"""
+    first = client.get('/api/testimonials?per_page=2')
+    assert [t['name'] for t in first.get_json()] == ['Ada', 'Grace']
+    assert first.headers['X-Total-Count'] == '3'
+    assert 'page=2' in first.headers['Link'] and 'rel="next"' in first.headers['Link']
+
+    second = client.get('/api/testimonials?page=2&per_page=2')
+    assert [t['name'] for t in second.get_json()] == ['Linus']
+    assert 'rel="prev"' in second.headers['Link'] and 'rel="next"' not in second.headers['Link']
+    assert second.headers['ETag'] != first.headers['ETag']
+
+def test_reloaded_when_data_file_changes(client, data_file):
+    """Test that an edited data file replaces the cached body and ETag"""
+    etag = client.get('/api/testimonials').headers['ETag']
+    data_file.write_text(json.dumps(TESTIMONIALS[:1]))
+    stat = os.stat(data_file)
+    os.utime(data_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    response = client.get('/api/testimonials', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert [t['name'] for t in response.get_json()] == ['Ada']
+
+def test_invalid_data_file_keeps_last_good_copy(client, data_file):
+    """Test that a half-written data file does not break the endpoint"""
+    client.get('/api/testimonials')
+    data_file.write_text('[{"name": ')
+    stat = os.stat(data_file)
+    os.utime(data_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert len(client.get('/api/testimonials').get_json()) == 3
+
+@pytest.mark.parametrize('query', ['rating=high', 'rating=9', 'page=0', 'per_page=1000'])
+def test_invalid_parameters(client, query):
+    """Test that bad query parameters get a JSON 400"""
+    response = client.get(f'/api/testimonials?{query}')
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
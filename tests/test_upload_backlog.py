@@ -0,0 +1,93 @@
+"""
+Tests for the Drive backlog uploader CLI
+"""
+
+import io
+import json
+import pytest
+
+pytest.importorskip('googleapiclient')
+
+import upload_backlog
+from app import google_drive_utils
+from app.drive_backends import LocalDriveBackend
+from app.google_drive_utils import FolderCache, GoogleDriveManager
+from app.job_queue import JobQueue
+from app.resume_store import ResumeStore
+
+@pytest.fixture
+def backlog(tmp_path, monkeypatch):
+    """Upload folder with two stored resumes, one legacy file and one already in Drive"""
+    store = ResumeStore(str(tmp_path / 'uploads'))
+    known, _ = store.put(io.BytesIO(b'%PDF-1.4 known'))
+    anonymous, _ = store.put(io.BytesIO(b'PK\x03\x04 anonymous'))
+    delivered, _ = store.put(io.BytesIO(b'%PDF-1.4 delivered'))
+    store.mark_delivered(delivered, 'drive', {'file_id': 'existing'})
+    (tmp_path / 'uploads' / 'legacy_resume.pdf').write_bytes(b'%PDF-1.4 legacy')
+
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite3'))
+    queue.enqueue('lead_notification', {'name': 'Ada', 'email': 'ada@example.com', 'phone': '',
+                                        'resume_filename': 'ada.pdf', 'resume_sha256': known})
+
+    backend = LocalDriveBackend(str(tmp_path / 'drive'))
+    manager = GoogleDriveManager(backend=backend)
+    manager.checkpoint_dir = str(tmp_path / 'checkpoints')
+    manager.folder_cache = FolderCache(path=None)
+    manager.shard_by = None
+    monkeypatch.setattr(google_drive_utils, 'drive_manager', manager)
+
+    args = ['--uploads', str(tmp_path / 'uploads'), '--queue-db', str(tmp_path / 'jobs.sqlite3'),
+            '--manifest', str(tmp_path / 'manifest.jsonl'), '--concurrency', '3']
+    return {'args': args, 'backend': backend, 'manager': manager, 'manifest': tmp_path / 'manifest.jsonl',
+            'known': known, 'anonymous': anonymous}
+
+def test_backlog_uploaded_once(backlog, capsys):
+    """Test that pending files are uploaded with recovered names and skipped on rerun"""
+    assert upload_backlog.main(backlog['args']) == 0
+    names = sorted(f['name'] for f in backlog['backend'].list_page(backlog['manager'].folder_id, 10, 'name')['files'])
+    assert len(names) == 3
+    assert any(name.endswith('_ada@example.com_ada.pdf') for name in names)
+    assert any(name.endswith(f"_unknown_{backlog['anonymous'][:12]}.docx") for name in names)
+    assert any(name.endswith('_unknown_legacy_resume.pdf') for name in names)
+    assert 'Uploaded: 3' in capsys.readouterr().out
+
+    assert upload_backlog.main(backlog['args']) == 0
+    assert 'Backlog: 0 file(s)' in capsys.readouterr().out
+    assert backlog['backend'].calls['upload'] == 6  # start + one chunk per file, first run only
+
+def test_failures_reported_and_retried(backlog, monkeypatch, capsys):
+    """Test that failed uploads are recorded, reported and sent again on the next run"""
+    real_upload = google_drive_utils.upload_resume_to_drive
+
+    async def flaky_upload(file_path, filename, email, sha256=None):
+        if sha256 == backlog['known']:
+            return None
+        return await real_upload(file_path, filename, email, sha256)
+
+    monkeypatch.setattr(google_drive_utils, 'upload_resume_to_drive', flaky_upload)
+    assert upload_backlog.main(backlog['args']) == 1
+    assert 'Failed: 1' in capsys.readouterr().out
+    entries = [json.loads(line) for line in backlog['manifest'].read_text().splitlines()]
+    assert [e['status'] for e in entries if e['key'] == backlog['known']] == ['failed']
+
+    monkeypatch.setattr(google_drive_utils, 'upload_resume_to_drive', real_upload)
+    assert upload_backlog.main(backlog['args']) == 0
+    output = capsys.readouterr().out
+    assert 'Backlog: 1 file(s)' in output and 'Uploaded: 1' in output
+
+def test_dead_job_resume_released_after_upload(backlog, tmp_path, capsys):
+    """Test that a resume held only by a dead email job is deleted once it is in Drive"""
+    store = ResumeStore(str(tmp_path / 'uploads'))
+    orphan, _ = store.put(io.BytesIO(b'%PDF-1.4 orphan'))
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite3'), max_attempts=1)
+    job_id = queue.enqueue('lead_notification', {'name': 'Bo', 'email': 'bo@example.com', 'phone': '',
+                                                 'resume_filename': 'bo.pdf', 'resume_sha256': orphan})
+    while queue.claim()['id'] != job_id:
+        pass
+    queue.fail(job_id, 1, 'smtp login failed')
+    
+    assert upload_backlog.main(backlog['args']) == 0
+    assert store.get_delivery(orphan, 'drive') is not None
+    assert store.refcount(orphan) == 0
+    # The live job for the other resume still holds its reference
+    assert store.refcount(backlog['known']) == 1
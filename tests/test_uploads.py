@@ -0,0 +1,63 @@
+"""
+Tests for streaming resume upload validation
+"""
+
+import io
+import pytest
+from tests.conftest import submit
+
+def resume(content, filename):
+    return (io.BytesIO(content), filename)
+
+def stored_objects(app):
+    return len(list(app.extensions['resume_store'].iter_objects()))
+
+@pytest.fixture
+def small_app(make_app):
+    """App with a 1 KB resume cap so size limits are cheap to exercise"""
+    return make_app(MAX_RESUME_BYTES=1024, MAX_CONTENT_LENGTH=1024 * 1024)
+
+@pytest.mark.parametrize('content,filename', [
+    (b'%PDF-1.7 resume', 'resume.pdf'),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1 resume', 'resume.doc'),
+    (b'PK\x03\x04 resume', 'resume.docx')
+])
+def test_valid_resume_accepted(small_app, content, filename):
+    """Test that real PDF/DOC/DOCX signatures are accepted and saved"""
+    response = submit(small_app.test_client(), resume=resume(content, filename))
+    assert response.status_code == 202
+    assert stored_objects(small_app) == 1
+
+def test_empty_resume_part_accepted(small_app):
+    """Test that a form sent with no file chosen (an empty resume part) is accepted without a resume"""
+    assert submit(small_app.test_client(), resume=resume(b'', '')).status_code == 202
+    assert stored_objects(small_app) == 0
+
+def test_any_file_part_validated(small_app):
+    """Test that a file sent under another field name gets the same checks as the resume"""
+    response = submit(small_app.test_client(), resume=None, portfolio=resume(b'not a resume', 'portfolio.txt'))
+    assert response.status_code == 415
+
+def test_disallowed_extension_rejected(small_app):
+    """Test that non-resume extensions are rejected with 415"""
+    response = submit(small_app.test_client(), resume=resume(b'MZ executable', 'resume.exe'))
+    assert response.status_code == 415
+    assert response.get_json()['success'] is False
+
+def test_mismatched_signature_rejected(small_app):
+    """Test that a file whose bytes are not a PDF is rejected despite its name"""
+    response = submit(small_app.test_client(), resume=resume(b'<html>not a pdf</html>', 'resume.pdf'))
+    assert response.status_code == 415
+    assert stored_objects(small_app) == 0
+
+def test_oversized_resume_rejected(small_app):
+    """Test that uploads over the cap are aborted with 413"""
+    response = submit(small_app.test_client(), resume=resume(b'%PDF-' + b'0' * 4096, 'resume.pdf'))
+    assert response.status_code == 413
+    assert stored_objects(small_app) == 0
+
+def test_content_length_over_limit_rejected(small_app):
+    """Test that bodies larger than MAX_CONTENT_LENGTH are refused up front"""
+    small_app.config['MAX_CONTENT_LENGTH'] = 2048
+    response = submit(small_app.test_client(), resume=resume(b'%PDF-' + b'0' * 4096, 'resume.pdf'))
+    assert response.status_code == 413
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Drive Backlog Uploader for Apply Boost Studio
+Pushes resumes waiting in the uploads folder to Google Drive with N uploads in
+flight. Every finished file is appended to a manifest, so a rerun after an
+interruption only sends what is left.
+
+    python upload_backlog.py --concurrency 16
+    python upload_backlog.py --dry-run
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional
+from config import GOOGLE_DRIVE_CONFIG, QUEUE_CONFIG, UPLOAD_CONFIG
+from app.job_queue import JobQueue
+from app.resume_store import ResumeStore
+from app.logs import configure_logging
+from app.uploads import MAGIC_NUMBERS
+from app.utils import allowed_file
+from app import google_drive_utils
+
+
+def load_manifest(path: str) -> Dict[str, Dict[str, Any]]:
+    """Latest manifest entry per backlog key"""
+    entries = {}
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash; that file is simply sent again
+                    continue
+                entries[entry['key']] = entry
+    except OSError:
+        pass
+    return entries
+
+
+def submissions_by_digest(queue_db: str) -> Dict[str, Dict[str, Any]]:
+    """Filename and submitter email for each stored resume, from its notification job
+
+    Each entry also counts the dead jobs still holding a reference ('dead_refs'),
+    released once the resume is safely in Drive.
+    """
+    if not os.path.exists(queue_db):
+        return {}
+    submissions = {}
+    for job in JobQueue(queue_db).iter_jobs('lead_notification'):
+        payload = job['payload']
+        digest = payload.get('resume_sha256')
+        if digest:
+            dead_refs = submissions.get(digest, {}).get('dead_refs', 0) + (job['status'] == 'dead')
+            submissions[digest] = dict(payload, dead_refs=dead_refs)
+    return submissions
+
+
+def _guess_extension(path: str) -> str:
+    with open(path, 'rb') as f:
+        head = f.read(16)
+    for extension, magic in MAGIC_NUMBERS.items():
+        if head.startswith(magic):
+            return f'.{extension}'
+    return ''
+
+
+def scan_backlog(store: ResumeStore, queue_db: str) -> Iterator[Dict[str, Any]]:
+    """Resumes in the upload folder that have not reached Drive yet"""
+    submissions = submissions_by_digest(queue_db)
+    for obj in store.iter_objects():
+        digest = obj['digest']
+        path = store.path(digest)
+        if store.get_delivery(digest, 'drive') or not os.path.exists(path):
+            continue
+        submission = submissions.get(digest, {})
+        yield {
+            'key': digest,
+            'path': path,
+            'filename': submission.get('resume_filename') or f"{digest[:12]}{_guess_extension(path)}",
+            'email': submission.get('email') or 'unknown',
+            'sha256': digest,
+            'size': obj['size'],
+            'dead_refs': submission.get('dead_refs', 0)
+        }
+
+    # Files saved directly in the folder before the content-addressed store
+    for name in sorted(os.listdir(store.root)):
+        path = os.path.join(store.root, name)
+        if os.path.isfile(path) and allowed_file(name):
+            stat = os.stat(path)
+            yield {
+                'key': f"file:{name}:{stat.st_size}:{stat.st_mtime_ns}",
+                'path': path,
+                'filename': name,
+                'email': 'unknown',
+                'sha256': None,
+                'size': stat.st_size
+            }
+
+
+async def upload_backlog(items: List[Dict[str, Any]], concurrency: int, manifest_path: str,
+                         out=sys.stdout, progress_every: int = 100,
+                         store: Optional[ResumeStore] = None) -> Dict[str, Any]:
+    """Upload items with `concurrency` workers, recording each result in the manifest
+
+    With a store, references held by dead email jobs are released once their
+    resume is in Drive (live jobs still release their own).
+    """
+    queue = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+    report = {'uploaded': 0, 'failed': 0, 'bytes': 0, 'failures': []}
+    started = time.perf_counter()
+
+    manifest_dir = os.path.dirname(manifest_path)
+    if manifest_dir:
+        os.makedirs(manifest_dir, exist_ok=True)
+
+    with open(manifest_path, 'a') as manifest:
+        def record(item, status, result=None, error=None):
+            entry = {'key': item['key'], 'status': status, 'path': item['path'], 'at': time.time()}
+            if result:
+                entry['file_id'] = result.get('file_id')
+            if error:
+                entry['error'] = error
+            manifest.write(json.dumps(entry) + '\n')
+            manifest.flush()
+
+        async def worker():
+            while True:
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    result = await google_drive_utils.upload_resume_to_drive(
+                        item['path'], item['filename'], item['email'], item['sha256']
+                    )
+                    error = None if result else 'upload failed'
+                except Exception as e:
+                    result, error = None, str(e)
+
+                if result:
+                    report['uploaded'] += 1
+                    report['bytes'] += item['size']
+                    record(item, 'done', result=result)
+                    if store is not None and item['sha256']:
+                        for _ in range(item.get('dead_refs', 0)):
+                            store.release(item['sha256'])
+                else:
+                    report['failed'] += 1
+                    report['failures'].append({'path': item['path'], 'error': error})
+                    record(item, 'failed', error=error)
+
+                done = report['uploaded'] + report['failed']
+                if progress_every and done % progress_every == 0:
+                    elapsed = time.perf_counter() - started
+                    print(f"  {done}/{len(items)} files, {done / elapsed:.1f} files/s", file=out)
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+    report['seconds'] = time.perf_counter() - started
+    return report
+
+
+def print_report(report: Dict[str, Any], skipped: int, out=sys.stdout):
+    seconds = report['seconds'] or 1e-9
+    print("\n" + "=" * 40, file=out)
+    print("📊 BACKLOG UPLOAD REPORT", file=out)
+    print("=" * 40, file=out)
+    print(f"✅ Uploaded: {report['uploaded']} ({report['bytes'] / (1024 * 1024):.1f} MB)", file=out)
+    print(f"⏭️  Skipped (already done): {skipped}", file=out)
+    print(f"❌ Failed: {report['failed']}", file=out)
+    print(f"⏱️  Elapsed: {report['seconds']:.1f}s", file=out)
+    print(f"🚀 Throughput: {report['uploaded'] / seconds:.1f} files/s, "
+          f"{report['bytes'] / seconds / (1024 * 1024):.2f} MB/s", file=out)
+    for failure in report['failures'][:20]:
+        print(f"   - {failure['path']}: {failure['error']}", file=out)
+    if len(report['failures']) > 20:
+        print(f"   ... and {len(report['failures']) - 20} more (see the manifest)", file=out)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Upload the resume backlog to Google Drive')
+    parser.add_argument('--uploads', default=UPLOAD_CONFIG['folder'], help='Upload folder to scan')
+    parser.add_argument('--queue-db', default=QUEUE_CONFIG['db_path'], help='Job queue used to recover submitter emails')
+    parser.add_argument('--manifest', default=GOOGLE_DRIVE_CONFIG['backlog_manifest'], help='Checkpoint manifest')
+    parser.add_argument('--concurrency', type=int, default=GOOGLE_DRIVE_CONFIG['max_concurrent_uploads'],
+                        help='Uploads in flight at once')
+    parser.add_argument('--dry-run', action='store_true', help='Only report what would be uploaded')
+    parser.add_argument('--verbose', action='store_true', help='Log every upload (otherwise warnings and errors only)')
+    args = parser.parse_args(argv)
+    configure_logging(level='INFO' if args.verbose else 'WARNING', fmt='text', stream=sys.stderr)
+
+    store = ResumeStore(args.uploads, UPLOAD_CONFIG['chunk_size'])
+    manifest = load_manifest(args.manifest)
+    items, skipped = [], 0
+    for item in scan_backlog(store, args.queue_db):
+        # Failures from earlier runs are retried; only finished files are skipped
+        if manifest.get(item['key'], {}).get('status') == 'done':
+            skipped += 1
+        else:
+            items.append(item)
+
+    total_mb = sum(item['size'] for item in items) / (1024 * 1024)
+    print(f"📁 Backlog: {len(items)} file(s), {total_mb:.1f} MB ({skipped} already in the manifest)")
+    if args.dry_run or not items:
+        return 0
+
+    manager = google_drive_utils.drive_manager
+    manager.resume_store = store
+    manager.set_concurrency(args.concurrency)
+    print(f"🚀 Uploading with {args.concurrency} concurrent upload(s)...")
+
+    out = sys.stdout
+    report = asyncio.run(upload_backlog(items, args.concurrency, args.manifest, out=out, store=store))
+    print_report(report, skipped, out=out)
+    return 1 if report['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
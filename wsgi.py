@@ -0,0 +1,9 @@
+"""
+WSGI entry point for Apply Boost Studio in production (gunicorn wsgi:app)
+Job worker threads are started in each worker process by gunicorn.conf.py,
+never in the master, since threads do not survive fork
+"""
+
+from app import create_app
+
+app = create_app({'JOB_WORKERS_AUTOSTART': False})